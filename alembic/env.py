@@ -5,6 +5,7 @@ from alembic import context
 from decouple import config as decouple_config
 from api.v1.models import * 
 from api.v1.models.associations import Base
+from api.db.search_ddl import include_object
 
 
 # this is the Alembic Config object, which provides
@@ -50,6 +51,7 @@ def run_migrations_offline() -> None:
         target_metadata=target_metadata,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
+        include_object=include_object,
     )
 
     with context.begin_transaction():
@@ -72,6 +74,7 @@ def run_migrations_online() -> None:
     with connectable.connect() as connection:
         context.configure(
             connection=connection, target_metadata=target_metadata,
+            include_object=include_object,
         )
 
         with context.begin_transaction():
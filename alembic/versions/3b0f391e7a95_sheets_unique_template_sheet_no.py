@@ -0,0 +1,73 @@
+"""unique sheets (template_id, sheet_no) and the foreign keys on it
+
+Columns and rows reference a sheet by (template_id, sheet_no). The baseline
+declared those composite foreign keys without a unique constraint behind
+them, which PostgreSQL refuses; this adds the constraint, then the keys.
+Either may already exist in a database stamped at the baseline (SQLite takes
+the keys without the constraint), so each is only created when missing.
+
+Revision ID: 3b0f391e7a95
+Revises: ace7bedfa0e0
+Create Date: 2026-10-19 10:05:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3b0f391e7a95'
+down_revision: Union[str, None] = 'ace7bedfa0e0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SHEET_KEY = ['template_id', 'sheet_no']
+REFERENCING_TABLES = {'columns': 'fk_columns_sheets', 'rows': 'fk_rows_sheets'}
+
+
+def _existing():
+    """Unique constraints on sheets and sheet foreign keys already in place, by name"""
+    if op.get_context().as_sql:
+        # Offline SQL cannot look; it is written for a database at the baseline
+        return {'unique': [], 'foreign_keys': {table: [] for table in REFERENCING_TABLES}}
+
+    inspector = sa.inspect(op.get_bind())
+    return {
+        'unique': [
+            constraint['name'] for constraint in inspector.get_unique_constraints('sheets')
+            if sorted(constraint['column_names']) == sorted(SHEET_KEY)
+        ],
+        'foreign_keys': {
+            table: [
+                key['name'] for key in inspector.get_foreign_keys(table)
+                if key['referred_table'] == 'sheets' and sorted(key['constrained_columns']) == sorted(SHEET_KEY)
+            ]
+            for table in REFERENCING_TABLES
+        },
+    }
+
+
+def upgrade() -> None:
+    existing = _existing()
+    if not existing['unique']:
+        with op.batch_alter_table('sheets') as batch_op:
+            batch_op.create_unique_constraint('uq_sheets_template_sheet_no', SHEET_KEY)
+    for table, name in REFERENCING_TABLES.items():
+        if not existing['foreign_keys'][table]:
+            with op.batch_alter_table(table) as batch_op:
+                batch_op.create_foreign_key(name, 'sheets', SHEET_KEY, SHEET_KEY)
+
+
+def downgrade() -> None:
+    # Only what this revision created; keys and constraints found in place stay
+    existing = _existing()
+    as_sql = op.get_context().as_sql
+    for table, name in REFERENCING_TABLES.items():
+        if as_sql or name in existing['foreign_keys'][table]:
+            with op.batch_alter_table(table) as batch_op:
+                batch_op.drop_constraint(name, type_='foreignkey')
+    if as_sql or 'uq_sheets_template_sheet_no' in existing['unique']:
+        with op.batch_alter_table('sheets') as batch_op:
+            batch_op.drop_constraint('uq_sheets_template_sheet_no', type_='unique')
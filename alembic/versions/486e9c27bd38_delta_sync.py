@@ -0,0 +1,82 @@
+"""delta sync
+
+Adds what delta sync needs: templates.change_seq and tombstones_pruned_seq,
+rows.change_seq and the row_tombstones table.
+
+On PostgreSQL nothing here rewrites ``rows``: the new columns have constant
+defaults and the index on ``rows`` is built concurrently.
+
+Revision ID: 486e9c27bd38
+Revises: 5f1e0c6a92d4
+Create Date: 2026-10-18 19:40:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from api.db.search_ddl import SQLITE_TRIGGERS
+
+
+# revision identifiers, used by Alembic.
+revision: str = '486e9c27bd38'
+down_revision: Union[str, None] = '5f1e0c6a92d4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _base_columns():
+    return [
+        sa.Column('id', sa.String(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    ]
+
+
+def upgrade() -> None:
+    op.add_column('templates', sa.Column('change_seq', sa.BigInteger(), server_default=sa.text('0'), nullable=False))
+    op.add_column('templates', sa.Column('tombstones_pruned_seq', sa.BigInteger(), server_default=sa.text('0'), nullable=False))
+    op.add_column('rows', sa.Column('change_seq', sa.BigInteger(), server_default=sa.text('0'), nullable=False))
+
+    op.create_table('row_tombstones',
+    sa.Column('row_id', sa.String(), nullable=False),
+    sa.Column('template_id', sa.String(), nullable=False),
+    sa.Column('sheet_no', sa.Numeric(), nullable=False),
+    sa.Column('row_number', sa.Numeric(), nullable=False),
+    sa.Column('change_seq', sa.BigInteger(), nullable=False),
+    *_base_columns(),
+    sa.ForeignKeyConstraint(['template_id'], ['templates.template_id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_row_tombstones_id'), 'row_tombstones', ['id'], unique=False)
+    op.create_index('ix_row_tombstones_template_change_seq', 'row_tombstones', ['template_id', 'change_seq', 'row_id'], unique=False)
+    op.create_index('ix_row_tombstones_created_at', 'row_tombstones', ['created_at'], unique=False)
+
+    if op.get_context().dialect.name == 'postgresql':
+        # Built concurrently, so writes to rows carry on
+        with op.get_context().autocommit_block():
+            op.create_index(
+                'ix_rows_template_change_seq', 'rows', ['template_id', 'change_seq', 'row_id'],
+                unique=False, postgresql_concurrently=True,
+            )
+    else:
+        op.create_index('ix_rows_template_change_seq', 'rows', ['template_id', 'change_seq', 'row_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_row_tombstones_created_at', table_name='row_tombstones')
+    op.drop_index('ix_row_tombstones_template_change_seq', table_name='row_tombstones')
+    op.drop_index(op.f('ix_row_tombstones_id'), table_name='row_tombstones')
+    op.drop_table('row_tombstones')
+
+    op.drop_index('ix_rows_template_change_seq', table_name='rows')
+    with op.batch_alter_table('rows') as batch_op:
+        batch_op.drop_column('change_seq')
+    if op.get_context().dialect.name != 'postgresql':
+        # SQLite drops a column by rebuilding the table, which takes the search triggers with it
+        for statement in SQLITE_TRIGGERS:
+            op.execute(statement)
+    with op.batch_alter_table('templates') as batch_op:
+        batch_op.drop_column('tombstones_pruned_seq')
+        batch_op.drop_column('change_seq')
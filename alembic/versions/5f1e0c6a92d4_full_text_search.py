@@ -0,0 +1,86 @@
+"""full-text search over row cells
+
+Adds the full-text index (see api/db/search_ddl.py): a trigger-filled
+tsvector column with a GIN index on PostgreSQL, an FTS5 table kept in sync by
+triggers on SQLite.
+
+On PostgreSQL nothing here rewrites ``rows``: the new column is nullable, it
+is backfilled in batches of committed updates, and the index is built
+concurrently.
+
+Revision ID: 5f1e0c6a92d4
+Revises: c2d7a41f9e38
+Create Date: 2026-10-19 12:10:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+from api.db.search_ddl import (
+    POSTGRESQL_COLUMN,
+    POSTGRESQL_INDEX,
+    POSTGRESQL_TRIGGER,
+    SQLITE_BACKFILL,
+    SQLITE_TABLES,
+    SQLITE_TRIGGERS,
+)
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5f1e0c6a92d4'
+down_revision: Union[str, None] = 'c2d7a41f9e38'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SEARCH_BACKFILL_BATCH = 10000
+
+
+def upgrade() -> None:
+    if op.get_context().dialect.name == 'postgresql':
+        _upgrade_postgresql()
+    else:
+        _upgrade_sqlite()
+
+
+def _upgrade_postgresql():
+    # New writes fill the vector from here on; the batches below fill the rest
+    op.execute(POSTGRESQL_COLUMN)
+    for statement in POSTGRESQL_TRIGGER:
+        op.execute(statement)
+
+    backfill = (
+        "UPDATE rows SET search_vector = "
+        "jsonb_to_tsvector('simple', data::jsonb, '[\"string\", \"numeric\"]') "
+        "WHERE ctid IN (SELECT ctid FROM rows WHERE search_vector IS NULL LIMIT {batch})"
+    ).format(batch=SEARCH_BACKFILL_BATCH)
+    with op.get_context().autocommit_block():
+        if op.get_context().as_sql:
+            # Offline SQL cannot loop; repeat this statement until it updates nothing
+            op.execute(backfill)
+        else:
+            connection = op.get_bind()
+            while connection.exec_driver_sql(backfill).rowcount:
+                pass
+
+        op.execute(POSTGRESQL_INDEX.format(concurrently="CONCURRENTLY"))
+
+
+def _upgrade_sqlite():
+    for statement in (*SQLITE_TABLES, *SQLITE_BACKFILL, *SQLITE_TRIGGERS):
+        op.execute(statement)
+
+
+def downgrade() -> None:
+    if op.get_context().dialect.name == 'postgresql':
+        op.execute("DROP INDEX IF EXISTS ix_rows_search")
+        op.execute("DROP TRIGGER IF EXISTS rows_search_vector ON rows")
+        op.execute("DROP FUNCTION IF EXISTS rows_search_vector()")
+        op.execute("ALTER TABLE rows DROP COLUMN IF EXISTS search_vector")
+    else:
+        for trigger in ('rows_search_insert', 'rows_search_update', 'rows_search_delete'):
+            op.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+        op.execute("DROP TABLE IF EXISTS rows_search")
+        op.drop_index('ix_rows_search_key', table_name='rows')
+        with op.batch_alter_table('rows') as batch_op:
+            batch_op.drop_column('search_key')
@@ -0,0 +1,34 @@
+"""template and sheet versions
+
+Adds sheets.version and templates.version, the counters ETags are built from
+(see api/v1/services/version.py). Both have a constant default, so on
+PostgreSQL adding them does not rewrite the tables.
+
+Revision ID: 85bb6584f211
+Revises: d563680b3d7b
+Create Date: 2026-10-19 11:10:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '85bb6584f211'
+down_revision: Union[str, None] = 'd563680b3d7b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('sheets', sa.Column('version', sa.Integer(), server_default=sa.text('0'), nullable=False))
+    op.add_column('templates', sa.Column('version', sa.Integer(), server_default=sa.text('0'), nullable=False))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('templates') as batch_op:
+        batch_op.drop_column('version')
+    with op.batch_alter_table('sheets') as batch_op:
+        batch_op.drop_column('version')
@@ -0,0 +1,31 @@
+"""sheet row number counter
+
+Adds sheets.last_row_number, the highest row number handed out in the sheet
+(see RowNumberAllocator). It stays NULL until the first write after the
+upgrade, which seeds it from MAX(rows.row_number), so nothing is backfilled.
+
+Revision ID: 8bc12b573d2b
+Revises: 3b0f391e7a95
+Create Date: 2026-10-19 10:20:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8bc12b573d2b'
+down_revision: Union[str, None] = '3b0f391e7a95'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('sheets', sa.Column('last_row_number', sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('sheets') as batch_op:
+        batch_op.drop_column('last_row_number')
@@ -0,0 +1,48 @@
+"""job files
+
+Adds the job_files table: the rows of ingest jobs and the results of export
+jobs, stored in parts so any API process can run or serve the job.
+
+Revision ID: a4c81e3f7b20
+Revises: 486e9c27bd38
+Create Date: 2026-10-19 12:10:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a4c81e3f7b20'
+down_revision: Union[str, None] = '486e9c27bd38'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _base_columns():
+    return [
+        sa.Column('id', sa.String(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    ]
+
+
+def upgrade() -> None:
+    op.create_table('job_files',
+    sa.Column('job_id', sa.String(), nullable=False),
+    sa.Column('name', sa.String(), nullable=False),
+    sa.Column('part', sa.Integer(), nullable=False),
+    sa.Column('data', sa.LargeBinary(), nullable=False),
+    *_base_columns(),
+    sa.ForeignKeyConstraint(['job_id'], ['jobs.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('job_id', 'name', 'part', name='uq_job_files_job_name_part')
+    )
+    op.create_index(op.f('ix_job_files_id'), 'job_files', ['id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_job_files_id'), table_name='job_files')
+    op.drop_table('job_files')
@@ -0,0 +1,100 @@
+"""baseline schema
+
+The tables as they were before revisions were kept in the repository.
+Databases created back then already have them: mark them with
+``alembic stamp ace7bedfa0e0`` before running ``alembic upgrade head``.
+The composite foreign keys from columns and rows to sheets are left to the
+next revision: PostgreSQL refuses them without a unique constraint on sheets
+(template_id, sheet_no), which these tables never had.
+
+Revision ID: ace7bedfa0e0
+Revises:
+Create Date: 2026-10-18 19:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'ace7bedfa0e0'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _base_columns():
+    return [
+        sa.Column('id', sa.String(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    ]
+
+
+def upgrade() -> None:
+    op.create_table('users',
+    *_base_columns(),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_users_id'), 'users', ['id'], unique=False)
+    op.create_table('user_organisation',
+    sa.Column('user_id', sa.String(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('user_id')
+    )
+    op.create_table('templates',
+    sa.Column('template_id', sa.String(), nullable=False),
+    *_base_columns(),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('template_id')
+    )
+    op.create_index(op.f('ix_templates_id'), 'templates', ['id'], unique=False)
+    op.create_table('sheets',
+    sa.Column('template_id', sa.String(), nullable=False),
+    sa.Column('sheet_no', sa.Numeric(), nullable=False),
+    sa.Column('sheet_name', sa.String(), nullable=False),
+    *_base_columns(),
+    sa.ForeignKeyConstraint(['template_id'], ['templates.template_id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_sheets_id'), 'sheets', ['id'], unique=False)
+    op.create_table('columns',
+    sa.Column('template_id', sa.String(), nullable=False),
+    sa.Column('name', sa.String(), nullable=False),
+    sa.Column('type', sa.String(), nullable=False),
+    sa.Column('required', sa.Boolean(), nullable=True),
+    sa.Column('sheet_no', sa.Numeric(), nullable=False),
+    *_base_columns(),
+    sa.ForeignKeyConstraint(['template_id'], ['templates.template_id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_columns_id'), 'columns', ['id'], unique=False)
+    op.create_table('rows',
+    sa.Column('row_id', sa.String(), nullable=False),
+    sa.Column('template_id', sa.String(), nullable=False),
+    sa.Column('sheet_no', sa.Numeric(), nullable=False),
+    sa.Column('row_number', sa.Numeric(), nullable=False),
+    sa.Column('data', sa.JSON(), nullable=False),
+    *_base_columns(),
+    sa.ForeignKeyConstraint(['template_id'], ['templates.template_id'], ),
+    sa.PrimaryKeyConstraint('row_id', 'id')
+    )
+    op.create_index(op.f('ix_rows_id'), 'rows', ['id'], unique=False)
+    op.create_index('ix_rows_template_sheet_row', 'rows', ['template_id', 'sheet_no', 'row_number'], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_rows_template_sheet_row', table_name='rows')
+    op.drop_index(op.f('ix_rows_id'), table_name='rows')
+    op.drop_table('rows')
+    op.drop_index(op.f('ix_columns_id'), table_name='columns')
+    op.drop_table('columns')
+    op.drop_index(op.f('ix_sheets_id'), table_name='sheets')
+    op.drop_table('sheets')
+    op.drop_index(op.f('ix_templates_id'), table_name='templates')
+    op.drop_table('templates')
+    op.drop_table('user_organisation')
+    op.drop_index(op.f('ix_users_id'), table_name='users')
+    op.drop_table('users')
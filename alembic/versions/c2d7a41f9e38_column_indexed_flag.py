@@ -0,0 +1,31 @@
+"""column indexed flag
+
+Adds columns.indexed, set once a column's expression index exists (see
+api/db/indexes.py). The indexes themselves are built per column by
+background jobs, not here.
+
+Revision ID: c2d7a41f9e38
+Revises: 85bb6584f211
+Create Date: 2026-10-19 11:40:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c2d7a41f9e38'
+down_revision: Union[str, None] = '85bb6584f211'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('columns', sa.Column('indexed', sa.Boolean(), server_default=sa.false(), nullable=False))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('columns') as batch_op:
+        batch_op.drop_column('indexed')
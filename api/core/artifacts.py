@@ -0,0 +1,231 @@
+""" Export artifact store
+
+Rendered exports are kept on disk as ``<template_id>/<version>.<format>``,
+where the version is the template's ETag. A download of an unchanged
+template is then served from the file (with Range support through
+``FileResponse``) instead of being rendered again, and a write to the
+template simply makes the next download build a new version, which then
+replaces the older ones.
+
+Builds go to a temporary file that is renamed into place, so readers never
+see a partial artifact, and concurrent requests for the same artifact in
+one process wait for a single build. The build itself is awaited (it
+normally runs in the CPU pool), so a waiting request holds no thread. Artifacts unused for ``max_age``
+seconds are removed, and the least recently used ones go first once the
+store exceeds ``max_bytes``. ``collect_garbage`` runs at startup and removes
+what a crash or a deleted template left behind.
+"""
+import asyncio
+import os
+import time
+import uuid
+from contextlib import suppress
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy.orm import Session
+
+from api.core.executors import blocking_pool
+from api.db.database import SessionLocal
+from api.utils.settings import settings
+
+
+TEMP_SUFFIX = ".tmp"
+# Artifacts used this recently are never evicted: a response may be about to open them
+IN_USE_GRACE = 60.0
+# Older temporary files belong to builds that died
+ABANDONED_BUILD_AGE = 3600.0
+
+
+class ArtifactStore:
+    """Version-keyed export files with size and age based eviction"""
+
+    def __init__(self, directory: str, max_bytes: int, max_age: float):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._building: Dict[str, asyncio.Lock] = {}
+
+    def path(self, template_id: str, version: str, file_format: str) -> str:
+        if not template_id or template_id.startswith(".") or os.sep in template_id or "/" in template_id:
+            raise ValueError(f"Invalid template id {template_id!r}")
+        version = version.strip('"')
+        return os.path.join(self.directory, template_id, f"{version}.{file_format}")
+
+    async def get_or_build(
+        self, template_id: str, version: str, file_format: str, build: Callable[[str], Awaitable[Any]]
+    ) -> str:
+        """Path of the artifact, awaiting ``build(path)`` first if it does not exist yet"""
+        path = self.path(template_id, version, file_format)
+        if self._touch(path):
+            self.hits += 1
+            return path
+
+        lock = self._building.setdefault(path, asyncio.Lock())
+        async with lock:
+            try:
+                if self._touch(path):
+                    self.hits += 1
+                    return path
+                self.misses += 1
+                await self._build(path, build)
+            finally:
+                self._building.pop(path, None)
+
+        try:
+            await blocking_pool.run(self._settle, path)
+        except HTTPException:
+            # The pool is full; the artifact is ready, and the next build sweeps
+            pass
+        return path
+
+    def evict(self):
+        """Removes idle artifacts, then the least recently used ones above ``max_bytes``"""
+        now = time.time()
+        artifacts = []
+        total = 0
+        for path, stat_result in self._artifacts():
+            if now - stat_result.st_mtime > self.max_age:
+                self._remove(path)
+                continue
+            artifacts.append((stat_result.st_mtime, stat_result.st_size, path))
+            total += stat_result.st_size
+
+        artifacts.sort()
+        for used_at, size, path in artifacts:
+            if total <= self.max_bytes:
+                break
+            if now - used_at < IN_USE_GRACE:
+                continue
+            self._remove(path)
+            total -= size
+
+    def collect_garbage(self):
+        """Startup sweep: abandoned builds, artifacts of deleted templates or old versions"""
+        if not os.path.isdir(self.directory):
+            return
+        now = time.time()
+        db = SessionLocal()
+        try:
+            for template_id in os.listdir(self.directory):
+                folder = os.path.join(self.directory, template_id)
+                if not os.path.isdir(folder):
+                    continue
+                current = self._current_version(db, template_id)
+                for name in os.listdir(folder):
+                    path = os.path.join(folder, name)
+                    if name.endswith(TEMP_SUFFIX):
+                        if now - os.path.getmtime(path) > ABANDONED_BUILD_AGE:
+                            self._remove(path)
+                    elif name.partition(".")[0] != current:
+                        self._remove(path)
+                if not os.listdir(folder):
+                    os.rmdir(folder)
+        finally:
+            db.close()
+        self.evict()
+
+    def stats(self) -> Dict[str, Any]:
+        artifacts = list(self._artifacts())
+        lookups = self.hits + self.misses
+        return {
+            "files": len(artifacts),
+            "bytes": sum(stat_result.st_size for _, stat_result in artifacts),
+            "max_bytes": self.max_bytes,
+            "max_age_seconds": self.max_age,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+    async def _build(self, path: str, build: Callable[[str], Awaitable[Any]]):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = f"{path}.{uuid.uuid4().hex}{TEMP_SUFFIX}"
+        try:
+            await build(temp_path)
+            os.replace(temp_path, path)
+        except BaseException:
+            with suppress(FileNotFoundError):
+                os.remove(temp_path)
+            raise
+
+    def _settle(self, path: str):
+        self._drop_superseded(path)
+        self.evict()
+
+    def _drop_superseded(self, path: str):
+        """Removes older versions of the same template and format.
+
+        Only the build of the template's current version clears the others,
+        which are all older then; a build that raced a write leaves them to
+        the next one. Versions used within IN_USE_GRACE are kept for the
+        responses that may be opening them, and left to ``evict``.
+        """
+        folder, name = os.path.split(path)
+        version, _, file_format = name.partition(".")
+        with SessionLocal() as db:
+            if self._current_version(db, os.path.basename(folder)) != version:
+                return
+
+        now = time.time()
+        for other in os.listdir(folder):
+            if other == name or other.endswith(TEMP_SUFFIX) or other.partition(".")[2] != file_format:
+                continue
+            other_path = os.path.join(folder, other)
+            try:
+                used_at = os.path.getmtime(other_path)
+            except FileNotFoundError:
+                continue
+            if now - used_at >= IN_USE_GRACE:
+                self._remove(other_path)
+
+    def _current_version(self, db: Session, template_id: str) -> Optional[str]:
+        """The template's current ETag as used in artifact names; None if it is gone"""
+        from api.v1.services.version import version_service
+
+        etag = version_service.template_etag(db, template_id)
+        return etag.strip('"') if etag else None
+
+    def _touch(self, path: str) -> bool:
+        """Marks an artifact as just used; False if it does not exist"""
+        try:
+            os.utime(path)
+            return True
+        except FileNotFoundError:
+            return False
+
+    def _artifacts(self) -> List[Tuple[str, os.stat_result]]:
+        if not os.path.isdir(self.directory):
+            return []
+        artifacts = []
+        for template_id in os.listdir(self.directory):
+            folder = os.path.join(self.directory, template_id)
+            if not os.path.isdir(folder):
+                continue
+            for name in os.listdir(folder):
+                if name.endswith(TEMP_SUFFIX):
+                    continue
+                path = os.path.join(folder, name)
+                try:
+                    artifacts.append((path, os.stat(path)))
+                except FileNotFoundError:
+                    continue
+        return artifacts
+
+    def _remove(self, path: str):
+        try:
+            os.remove(path)
+            self.evictions += 1
+        except FileNotFoundError:
+            pass
+
+
+export_artifacts = ArtifactStore(
+    directory=settings.ARTIFACT_DIR,
+    max_bytes=settings.ARTIFACT_MAX_BYTES,
+    max_age=settings.ARTIFACT_MAX_AGE,
+)
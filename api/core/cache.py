@@ -0,0 +1,331 @@
+""" Shared response cache
+
+Assembled response bodies (template documents, sheet pages) are cached as
+bytes under keys that embed the data's ETag, so a write never has to
+invalidate anything: the next read computes a new ETag and misses, and old
+entries age out through their TTL.
+
+``CACHE_BACKEND=memory`` keeps entries in the worker process.
+``CACHE_BACKEND=redis`` talks plain RESP over a socket to anything speaking
+the Redis protocol (Redis, Valkey, KeyDB, a local fake in tests), so every
+worker on every host shares one copy. A cache that is unreachable only costs
+the cache: reads fall back to building the response.
+"""
+import logging
+import secrets
+import socket
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Dict, Optional
+from urllib.parse import unquote, urlparse
+
+from api.utils.cache import LRUCache
+from api.utils.settings import settings
+
+
+logger = logging.getLogger(__name__)
+
+# How long a rebuild may hold a key's lock, and how long others wait on it
+LOCK_TTL = 30.0
+LOCK_WAIT = 5.0
+LOCK_POLL_INTERVAL = 0.05
+# Waiters sleep on blocking-pool threads; past this many per process, callers build instead
+LOCK_MAX_WAITERS = 4
+
+# Deletes KEYS[1] only while it still holds ARGV[1]
+_COMPARE_AND_DELETE = b"""
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+class CacheError(Exception):
+    """The cache backend could not be reached or rejected a command"""
+
+
+class CacheBackend(ABC):
+    """Byte-valued cache with expiry and an atomic add (SET NX)"""
+
+    name = "abstract"
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+        self._waiters = 0
+        self._waiters_lock = threading.Lock()
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[bytes]:
+        pass
+
+    @abstractmethod
+    def set(self, key: str, value: bytes, ttl: Optional[float] = None):
+        pass
+
+    @abstractmethod
+    def add(self, key: str, value: bytes, ttl: Optional[float] = None) -> bool:
+        """Sets ``key`` only if it does not exist; returns whether it did"""
+        pass
+
+    @abstractmethod
+    def delete(self, key: str):
+        pass
+
+    @abstractmethod
+    def delete_if(self, key: str, value: bytes):
+        """Deletes ``key`` only while it still holds ``value``"""
+        pass
+
+    def lookup(self, key: str) -> Optional[bytes]:
+        """``get`` that counts hits and misses and treats backend errors as a miss"""
+        try:
+            value = self.get(key)
+        except CacheError as e:
+            self._failed("get", e)
+            value = None
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def get_or_set(self, key: str, build: Callable[[], bytes], ttl: Optional[float] = None) -> bytes:
+        """Returns the cached value of ``key``, building and storing it on a miss.
+
+        Only one caller at a time rebuilds a key: the others wait (up to
+        LOCK_WAIT) for its result instead of all hitting the database at once.
+        If the rebuild takes too long or its owner dies, waiters build anyway,
+        and so does any caller beyond LOCK_MAX_WAITERS waiting in this
+        process. The lock holds a token of its owner, so an owner that
+        outlived LOCK_TTL does not release a lock another caller took since.
+        """
+        value = self.lookup(key)
+        if value is not None:
+            return value
+
+        lock_key = f"{key}:lock"
+        token = secrets.token_hex(16).encode()
+        try:
+            owner = self.add(lock_key, token, LOCK_TTL)
+        except CacheError as e:
+            self._failed("add", e)
+            return build()
+
+        if not owner:
+            value = self._wait_for(key)
+            if value is not None:
+                return value
+
+        try:
+            value = build()
+            try:
+                self.set(key, value, ttl)
+            except CacheError as e:
+                self._failed("set", e)
+        finally:
+            if owner:
+                try:
+                    self.delete_if(lock_key, token)
+                except CacheError as e:
+                    self._failed("delete", e)
+        return value
+
+    def _wait_for(self, key: str) -> Optional[bytes]:
+        """Polls ``key`` until LOCK_WAIT runs out; None if it is still missing"""
+        with self._waiters_lock:
+            if self._waiters >= LOCK_MAX_WAITERS:
+                return None
+            self._waiters += 1
+        try:
+            deadline = time.monotonic() + LOCK_WAIT
+            while time.monotonic() < deadline:
+                time.sleep(LOCK_POLL_INTERVAL)
+                try:
+                    value = self.get(key)
+                except CacheError as e:
+                    self._failed("get", e)
+                    return None
+                if value is not None:
+                    return value
+            return None
+        finally:
+            with self._waiters_lock:
+                self._waiters -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "backend": self.name,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "errors": self.errors,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+        }
+
+    def _failed(self, command: str, error: Exception):
+        self.errors += 1
+        logger.warning("Cache %s failed: %s", command, error)
+
+
+class MemoryCacheBackend(CacheBackend):
+    """Per-process backend on a bounded LRU"""
+
+    name = "memory"
+
+    def __init__(self, ttl: float, max_entries: int):
+        super().__init__(ttl)
+        self._entries = LRUCache(max_entries, ttl)
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self._entries.get(key)
+
+    def set(self, key: str, value: bytes, ttl: Optional[float] = None):
+        self._entries.set(key, value, ttl)
+
+    def add(self, key: str, value: bytes, ttl: Optional[float] = None) -> bool:
+        return self._entries.add(key, value, ttl)
+
+    def delete(self, key: str):
+        self._entries.pop(key)
+
+    def delete_if(self, key: str, value: bytes):
+        self._entries.pop_if(key, value)
+
+    def stats(self) -> Dict[str, Any]:
+        stats = super().stats()
+        stats["entries"] = self._entries.stats()["size"]
+        return stats
+
+
+class RedisCacheBackend(CacheBackend):
+    """Backend for a Redis-protocol server, e.g. ``redis://:password@host:6379/0``.
+
+    Speaks RESP directly over one socket per thread; no client library is
+    needed. Connection failures raise ``CacheError`` and drop the socket, so
+    the next command reconnects.
+    """
+
+    name = "redis"
+
+    def __init__(self, ttl: float, url: str, timeout: float = 1.0):
+        super().__init__(ttl)
+        parsed = urlparse(url)
+        self.host = parsed.hostname or "localhost"
+        self.port = parsed.port or 6379
+        self.password = unquote(parsed.password) if parsed.password else None
+        self.db = int(parsed.path.lstrip("/") or 0)
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self._command(b"GET", key)
+
+    def set(self, key: str, value: bytes, ttl: Optional[float] = None):
+        self._command(b"SET", key, value, b"PX", self._milliseconds(ttl))
+
+    def add(self, key: str, value: bytes, ttl: Optional[float] = None) -> bool:
+        return self._command(b"SET", key, value, b"PX", self._milliseconds(ttl), b"NX") is not None
+
+    def delete(self, key: str):
+        self._command(b"DEL", key)
+
+    def delete_if(self, key: str, value: bytes):
+        self._command(b"EVAL", _COMPARE_AND_DELETE, 1, key, value)
+
+    def _milliseconds(self, ttl: Optional[float]) -> int:
+        return max(1, int((self.ttl if ttl is None else ttl) * 1000))
+
+    def _command(self, *args):
+        connection = self._connection()
+        try:
+            connection.sendall(_encode_command(args))
+            return _read_reply(self._local.reader)
+        except (OSError, EOFError) as e:
+            self._close()
+            raise CacheError(str(e)) from e
+
+    def _connection(self) -> socket.socket:
+        connection = getattr(self._local, "connection", None)
+        if connection is not None:
+            return connection
+        try:
+            connection = socket.create_connection((self.host, self.port), self.timeout)
+        except OSError as e:
+            raise CacheError(f"Cannot connect to {self.host}:{self.port}: {e}") from e
+        self._local.connection = connection
+        self._local.reader = connection.makefile("rb")
+        try:
+            if self.password:
+                self._command(b"AUTH", self.password)
+            if self.db:
+                self._command(b"SELECT", self.db)
+        except CacheError:
+            self._close()
+            raise
+        return connection
+
+    def _close(self):
+        connection = getattr(self._local, "connection", None)
+        self._local.connection = None
+        if connection is not None:
+            try:
+                self._local.reader.close()
+                connection.close()
+            except OSError:
+                pass
+
+
+def _encode_command(args) -> bytes:
+    parts = [b"*%d\r\n" % len(args)]
+    for arg in args:
+        if not isinstance(arg, bytes):
+            arg = str(arg).encode()
+        parts.append(b"$%d\r\n%s\r\n" % (len(arg), arg))
+    return b"".join(parts)
+
+
+def _read_reply(reader):
+    line = reader.readline()
+    if not line.endswith(b"\r\n"):
+        raise EOFError("Connection closed by cache server")
+    kind, payload = line[:1], line[1:-2]
+    if kind == b"+":
+        return payload
+    if kind == b"-":
+        raise CacheError(payload.decode(errors="replace"))
+    if kind == b":":
+        return int(payload)
+    if kind == b"$":
+        length = int(payload)
+        if length < 0:
+            return None
+        data = reader.read(length + 2)
+        if len(data) != length + 2:
+            raise EOFError("Connection closed by cache server")
+        return data[:-2]
+    if kind == b"*":
+        length = int(payload)
+        return None if length < 0 else [_read_reply(reader) for _ in range(length)]
+    raise CacheError(f"Unexpected reply {line!r}")
+
+
+def build_cache_backend(backend: str, url: str, ttl: float, max_entries: int) -> CacheBackend:
+    if backend == "redis":
+        return RedisCacheBackend(ttl, url)
+    if backend == "memory":
+        return MemoryCacheBackend(ttl, max_entries)
+    raise ValueError(f"Unknown CACHE_BACKEND {backend!r}")
+
+
+shared_cache = build_cache_backend(
+    settings.CACHE_BACKEND,
+    settings.CACHE_URL,
+    settings.CACHE_TTL,
+    settings.CACHE_MAX_ENTRIES,
+)
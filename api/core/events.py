@@ -0,0 +1,257 @@
+""" Row change events
+
+``RowService`` and the ingest path announce every row write on the
+``row_events`` bus, and ``GET /rows/events/{template_id}`` relays them to
+clients as Server-Sent Events. Events are small (ids, row numbers and the
+change sequence); clients fetch the data itself, e.g. through
+``GET /rows/changes``.
+
+An event only leaves the writing session when it commits, so rolled back
+writes are never announced. On PostgreSQL (psycopg2) the commit carries it:
+the event is sent with ``pg_notify`` inside the transaction and every API
+process receives it on a ``LISTEN`` connection. Elsewhere (SQLite, tests)
+it goes straight to the subscribers of the committing process.
+
+Each subscriber has a bounded queue. Pending events for the same row are
+merged, and a subscriber that still falls behind gets one ``resync`` event
+in place of the backlog, telling it to catch up through the change feed.
+"""
+import asyncio
+import logging
+import select
+import threading
+from collections import OrderedDict, defaultdict
+from typing import Any, AsyncIterator, Dict, List, Set
+
+import orjson
+from sqlalchemy import event, func, select as sql_select
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from api.utils.settings import settings
+
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "row_events"
+# Session.info key of the events waiting for the session to commit
+_PENDING = "row_events"
+RECONNECT_DELAY = 5.0
+
+
+class Subscription:
+    """One consumer's queue of a template's events"""
+
+    def __init__(self, template_id: str, max_pending: int, loop: asyncio.AbstractEventLoop):
+        self.template_id = template_id
+        self.max_pending = max_pending
+        self._loop = loop
+        self._ready = asyncio.Event()
+        self._lock = threading.Lock()
+        self._pending: "OrderedDict[Any, Dict[str, Any]]" = OrderedDict()
+        self._overflowed = False
+
+    def push(self, message: Dict[str, Any]):
+        """Queues an event; safe to call from any thread"""
+        with self._lock:
+            if self._overflowed:
+                return
+            key = message.get("row_id") or ("seq", message.get("change_seq"))
+            previous = self._pending.pop(key, None)
+            if previous is not None and previous["type"] == "created" and message["type"] == "updated":
+                # The consumer has not seen the row yet; it is still new to them
+                message = {**message, "type": "created"}
+            self._pending[key] = message
+            if len(self._pending) > self.max_pending:
+                self._pending.clear()
+                self._overflowed = True
+        self._wake()
+
+    def overflow(self):
+        """Replaces whatever is pending with a ``resync``"""
+        with self._lock:
+            self._pending.clear()
+            self._overflowed = True
+        self._wake()
+
+    async def next_batch(self, timeout: float) -> List[Dict[str, Any]]:
+        """Waits up to ``timeout`` seconds for events and takes all pending ones"""
+        try:
+            await asyncio.wait_for(self._ready.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        self._ready.clear()
+        with self._lock:
+            if self._overflowed:
+                self._overflowed = False
+                return [{"type": "resync", "template_id": self.template_id}]
+            messages = list(self._pending.values())
+            self._pending.clear()
+        return messages
+
+    def _wake(self):
+        try:
+            self._loop.call_soon_threadsafe(self._ready.set)
+        except RuntimeError:
+            # The consumer's event loop is gone
+            pass
+
+
+class EventBus:
+    """Per-template fan-out of committed row events"""
+
+    def __init__(self, max_pending: int = 256, keepalive: float = 15.0):
+        self.max_pending = max_pending
+        self.keepalive = keepalive
+        self._subscriptions: Dict[str, Set[Subscription]] = defaultdict(set)
+        self._lock = threading.Lock()
+        self._listener = None
+
+    def publish(self, db: Session, message: Dict[str, Any]):
+        """Announces ``message`` once ``db`` commits"""
+        dialect = db.get_bind().dialect
+        if dialect.name == "postgresql" and dialect.driver == "psycopg2":
+            db.execute(sql_select(func.pg_notify(CHANNEL, orjson.dumps(message).decode())))
+        else:
+            db.info.setdefault(_PENDING, []).append(message)
+
+    def dispatch(self, message: Dict[str, Any]):
+        """Hands a committed event to this process's subscribers"""
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(message.get("template_id"), ()))
+        for subscription in subscriptions:
+            subscription.push(message)
+
+    def resync_all(self):
+        """Tells every subscriber it may have missed events"""
+        with self._lock:
+            subscriptions = [s for group in self._subscriptions.values() for s in group]
+        for subscription in subscriptions:
+            subscription.overflow()
+
+    def subscribe(self, template_id: str) -> Subscription:
+        """Registers a consumer; must run on the consumer's event loop"""
+        subscription = Subscription(template_id, self.max_pending, asyncio.get_running_loop())
+        with self._lock:
+            self._subscriptions[template_id].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            group = self._subscriptions.get(subscription.template_id)
+            if group is not None:
+                group.discard(subscription)
+                if not group:
+                    del self._subscriptions[subscription.template_id]
+
+    async def stream(self, template_id: str) -> AsyncIterator[bytes]:
+        """Server-Sent Events for one template, until the client goes away"""
+        subscription = self.subscribe(template_id)
+        try:
+            yield b"retry: 3000\n\n"
+            while True:
+                messages = await subscription.next_batch(self.keepalive)
+                if not messages:
+                    yield b": keepalive\n\n"
+                for message in messages:
+                    yield _sse_frame(message)
+        finally:
+            self.unsubscribe(subscription)
+
+    def start(self, engine: Engine):
+        """Starts listening for other processes' events on PostgreSQL"""
+        dialect = engine.dialect
+        if dialect.name == "postgresql" and dialect.driver == "psycopg2":
+            self._listener = _PostgresListener(engine, self)
+            self._listener.start()
+
+    def stop(self):
+        if self._listener is not None:
+            self._listener.stop()
+            self._listener = None
+
+
+def row_event(kind: str, template_id: str, sheet_no, change_seq: int, **fields) -> Dict[str, Any]:
+    """Builds an event; ``kind`` is ``created``, ``updated`` or ``deleted``"""
+    return {
+        "type": kind,
+        "template_id": template_id,
+        "sheet_no": int(sheet_no),
+        "change_seq": change_seq,
+        **fields,
+    }
+
+
+def _sse_frame(message: Dict[str, Any]) -> bytes:
+    frame = b"event: " + message["type"].encode() + b"\n"
+    if message.get("change_seq") is not None:
+        frame += b"id: " + str(message["change_seq"]).encode() + b"\n"
+    return frame + b"data: " + orjson.dumps(message) + b"\n\n"
+
+
+class _PostgresListener:
+    """Thread holding a ``LISTEN`` connection and dispatching what arrives"""
+
+    def __init__(self, engine: Engine, bus: EventBus, poll_interval: float = 5.0):
+        self._engine = engine
+        self._bus = bus
+        self._poll_interval = poll_interval
+        self._stopping = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="row-events-listener", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 10.0):
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self):
+        while not self._stopping.is_set():
+            try:
+                self._listen()
+            except Exception:
+                logger.exception("Row event listener lost its connection")
+                self._stopping.wait(RECONNECT_DELAY)
+
+    def _listen(self):
+        pooled = self._engine.raw_connection()
+        try:
+            connection = pooled.driver_connection
+            connection.autocommit = True
+            with connection.cursor() as cursor:
+                cursor.execute(f"LISTEN {CHANNEL}")
+            # Anything sent while we were not listening is lost
+            self._bus.resync_all()
+
+            while not self._stopping.is_set():
+                if select.select([connection], [], [], self._poll_interval) == ([], [], []):
+                    continue
+                connection.poll()
+                while connection.notifies:
+                    notify = connection.notifies.pop(0)
+                    self._bus.dispatch(orjson.loads(notify.payload))
+        finally:
+            # A LISTENing autocommit connection must not go back to the pool
+            pooled.invalidate()
+
+
+@event.listens_for(Session, "after_commit")
+def _dispatch_pending(session: Session):
+    for message in session.info.pop(_PENDING, ()):
+        row_events.dispatch(message)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending(session: Session):
+    session.info.pop(_PENDING, None)
+
+
+row_events = EventBus(
+    max_pending=settings.EVENTS_QUEUE_SIZE,
+    keepalive=settings.EVENTS_KEEPALIVE,
+)
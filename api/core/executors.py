@@ -0,0 +1,196 @@
+""" Execution pools
+
+Route handlers run on the event loop, but sessions block on the database and
+workbook rendering or sheet encoding holds the CPU for seconds. Either one
+done inline stalls every other request of the worker, so that work is handed
+to one of two pools and awaited:
+
+``blocking_pool``
+    Threads for blocking database calls; they release the GIL while they
+    wait on the database.
+``cpu_pool``
+    Spawned processes for CPU-bound rendering, which would hold the GIL (and
+    with it the event loop) in a thread. Tasks open their own database
+    connection through ``worker_session``.
+
+Both are bounded: ``workers`` tasks run at once and at most ``max_queue``
+more wait, after which a submission is refused with a 503 rather than piling
+up behind a burst of exports. ``run`` takes the request to watch: a task
+still queued when its client disconnects is cancelled. A task already
+running is awaited to the end, since neither a thread nor a pool process can
+be stopped safely and the request's session must not be closed under it.
+"""
+import asyncio
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from fastapi import HTTPException, Request, status
+from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from api.utils.settings import settings
+
+
+DISCONNECT_POLL_INTERVAL = 0.5
+RETRY_AFTER_SECONDS = 5
+
+
+class ClientDisconnected(HTTPException):
+    """The client went away before its queued task started"""
+
+    def __init__(self):
+        # 499: nginx's "client closed request"; nobody is left to read it
+        super().__init__(status_code=499, detail="Client closed request")
+
+
+class ExecutionPool:
+    """Bounded thread or process pool that counts its queue depth"""
+
+    def __init__(self, name: str, workers: int, max_queue: int, processes: bool = False):
+        self.name = name
+        self.workers = workers or os.cpu_count() or 1
+        self.max_queue = max_queue
+        self.processes = processes
+        self.completed = 0
+        self.failed = 0
+        self.cancelled = 0
+        self.rejected = 0
+        self.peak_queued = 0
+        self._pending = 0
+        self._executor: Optional[Executor] = None
+        self._lock = threading.Lock()
+
+    def submit(self, fn: Callable[..., Any], *args) -> Future:
+        """Queues ``fn(*args)``; raises a 503 when the queue is full"""
+        with self._lock:
+            if self._pending >= self.workers + self.max_queue:
+                self.rejected += 1
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail=f"Server busy: the {self.name} queue is full, retry shortly",
+                    headers={"Retry-After": str(RETRY_AFTER_SECONDS)},
+                )
+            future = self._get_executor().submit(fn, *args)
+            self._pending += 1
+            self.peak_queued = max(self.peak_queued, self._pending - self.workers)
+        future.add_done_callback(self._finished)
+        return future
+
+    async def run(self, fn: Callable[..., Any], *args, request: Optional[Request] = None) -> Any:
+        """Runs ``fn(*args)`` in the pool and awaits the result off the event loop.
+
+        With ``request`` (whose body must already have been read), the task is
+        cancelled if the client disconnects before it starts, and
+        ``ClientDisconnected`` is raised.
+        """
+        future = self.submit(fn, *args)
+        result = asyncio.wrap_future(future)
+        try:
+            if request is not None:
+                watcher = asyncio.ensure_future(_wait_for_disconnect(request))
+                try:
+                    await asyncio.wait((result, watcher), return_when=asyncio.FIRST_COMPLETED)
+                finally:
+                    watcher.cancel()
+                if not result.done() and future.cancel():
+                    raise ClientDisconnected()
+            return await result
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            running = min(self._pending, self.workers)
+            return {
+                "kind": "processes" if self.processes else "threads",
+                "workers": self.workers,
+                "running": running,
+                "queued": self._pending - running,
+                "max_queue": self.max_queue,
+                "peak_queued": self.peak_queued,
+                "completed": self.completed,
+                "failed": self.failed,
+                "cancelled": self.cancelled,
+                "rejected": self.rejected,
+            }
+
+    def shutdown(self):
+        """Drops queued tasks; the pool is recreated on the next submission"""
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.processes:
+                # Spawned rather than forked: the API process runs threads
+                # (job workers, event listener) whose locks a fork would copy
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.workers, thread_name_prefix=f"{self.name}-pool"
+                )
+        return self._executor
+
+    def _finished(self, future: Future):
+        with self._lock:
+            self._pending -= 1
+            if future.cancelled():
+                self.cancelled += 1
+            elif future.exception() is not None:
+                self.failed += 1
+            else:
+                self.completed += 1
+
+
+async def _wait_for_disconnect(request: Request):
+    while not await request.is_disconnected():
+        await asyncio.sleep(DISCONNECT_POLL_INTERVAL)
+
+
+def task_database_url(db: Session) -> str:
+    """What a process pool task needs to reach the database ``db`` is bound to"""
+    return db.get_bind().url.render_as_string(hide_password=False)
+
+
+# Engines of a pool process, by database URL
+_worker_engines: Dict[str, Engine] = {}
+
+
+def worker_session(database_url: str) -> Session:
+    """A session for a task running in a pool process"""
+    engine = _worker_engines.get(database_url)
+    if engine is None:
+        engine = _worker_engines[database_url] = create_engine(database_url)
+    return Session(engine)
+
+
+def pool_stats() -> Dict[str, Any]:
+    return {"blocking": blocking_pool.stats(), "cpu": cpu_pool.stats()}
+
+
+def shutdown_pools():
+    blocking_pool.shutdown()
+    cpu_pool.shutdown()
+
+
+blocking_pool = ExecutionPool(
+    "blocking",
+    workers=settings.BLOCKING_WORKERS,
+    max_queue=settings.BLOCKING_QUEUE_SIZE,
+)
+cpu_pool = ExecutionPool(
+    "cpu",
+    workers=settings.EXPORT_WORKERS,
+    max_queue=settings.EXPORT_QUEUE_SIZE,
+    processes=True,
+)
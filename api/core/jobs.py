@@ -0,0 +1,226 @@
+""" Background job runner
+
+Jobs live in the ``jobs`` table, so they survive restarts. Each API process
+runs a small pool of worker threads (started from the app lifespan) that
+claim queued jobs, run the handler registered for the job's kind, and record
+progress, results and failures back on the job row.
+
+A claim is a lease: handlers renew it by reporting progress, or by running
+long steps under ``renewing_lease``. A job whose lease runs out is claimed
+again by another worker, and the old claim can then no longer report, save
+a checkpoint or finish the job. Handlers that can be interrupted part way
+save a checkpoint with each committed step and resume from it.
+"""
+import logging
+import os
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Optional
+
+from fastapi import HTTPException
+from sqlalchemy.orm import Session
+
+from api.db.database import SessionLocal
+from api.utils.settings import settings
+
+
+logger = logging.getLogger(__name__)
+
+
+class JobCancelled(Exception):
+    """Raised inside a handler once its job has been cancelled"""
+
+
+class JobLeaseLost(Exception):
+    """Raised inside a handler once another worker has taken its job over"""
+
+
+class JobContext:
+    """What a handler gets to talk back to its job"""
+
+    def __init__(
+        self,
+        job_id: str,
+        params: Dict[str, Any],
+        lease_seconds: int,
+        attempt: int = 0,
+        checkpoint: Optional[Dict[str, Any]] = None,
+    ):
+        self.job_id = job_id
+        self.params = params
+        self.attempt = attempt
+        # Saved by an earlier claim of the job; None on the first run
+        self.checkpoint = checkpoint
+        self._lease_seconds = lease_seconds
+
+    def report(self, progress: Optional[float] = None):
+        """Records progress (0..1) and renews the lease.
+
+        Raises ``JobCancelled`` if the job was cancelled and ``JobLeaseLost``
+        if another worker has taken it over.
+        """
+        from api.v1.services.job import job_service
+
+        db = SessionLocal()
+        try:
+            cancelled = job_service.heartbeat(
+                db, self.job_id, self.attempt, progress, self._lease_seconds
+            )
+        finally:
+            db.close()
+        if cancelled is None:
+            raise JobLeaseLost()
+        if cancelled:
+            raise JobCancelled()
+
+    def save_checkpoint(self, db: Session, checkpoint: Dict[str, Any]):
+        """Stores the resume point in ``db``'s transaction; commit it with the work.
+
+        Raises ``JobLeaseLost`` if another worker has taken the job over, in
+        which case the transaction must be rolled back.
+        """
+        from api.v1.services.job import job_service
+
+        if not job_service.save_checkpoint(db, self.job_id, self.attempt, checkpoint):
+            raise JobLeaseLost()
+        self.checkpoint = checkpoint
+
+    @contextmanager
+    def renewing_lease(self) -> Iterator[None]:
+        """Keeps the lease alive from a thread while a long step runs.
+
+        Cancellation and lost leases are not raised in the middle of the
+        step; call ``report`` after it to find out before publishing results.
+        """
+        stopping = threading.Event()
+
+        def renew():
+            while not stopping.wait(self._lease_seconds / 3):
+                try:
+                    self.report()
+                except (JobCancelled, JobLeaseLost):
+                    return
+                except Exception:
+                    logger.exception("Renewing the lease of job %s failed", self.job_id)
+
+        thread = threading.Thread(target=renew, name=f"job-lease-{self.job_id}", daemon=True)
+        thread.start()
+        try:
+            yield
+        finally:
+            stopping.set()
+            thread.join()
+
+
+class JobResult(Dict[str, Any]):
+    """Handler return value; ``location`` is an optional local file to store as the job's result"""
+
+    def __init__(self, location: Optional[str] = None, **result):
+        super().__init__(**result)
+        self.location = location
+
+
+JobHandler = Callable[[JobContext], Optional[JobResult]]
+_handlers: Dict[str, JobHandler] = {}
+
+
+def job_handler(kind: str):
+    """Registers the decorated function as the handler for ``kind``"""
+    def register(handler: JobHandler) -> JobHandler:
+        _handlers[kind] = handler
+        return handler
+    return register
+
+
+class JobRunner:
+    """Pool of worker threads polling the jobs table"""
+
+    def __init__(self, workers: int = 2, poll_interval: float = 1.0, lease_seconds: int = 300):
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.lease_seconds = lease_seconds
+        self._threads = []
+        self._stopping = threading.Event()
+        self._wakeup = threading.Event()
+
+    def start(self):
+        # Importing the handlers registers them
+        import api.v1.services.job_handlers  # noqa: F401
+
+        self._stopping.clear()
+        for index in range(self.workers):
+            thread = threading.Thread(target=self._work, name=f"job-worker-{index}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout: float = 10.0):
+        """Stops polling; jobs still running are picked up again once their lease expires"""
+        self._stopping.set()
+        self._wakeup.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def wake(self):
+        """Lets idle workers look for new jobs right away"""
+        self._wakeup.set()
+
+    def _work(self):
+        from api.v1.services.job import job_service
+
+        while not self._stopping.is_set():
+            db = SessionLocal()
+            try:
+                job = job_service.claim(db, self.lease_seconds)
+                if job is not None:
+                    self._run(db, job)
+            except Exception:
+                logger.exception("Job worker failed while claiming or finishing a job")
+                job = None
+            finally:
+                db.close()
+
+            if job is None:
+                self._wakeup.wait(self.poll_interval)
+                self._wakeup.clear()
+
+    def _run(self, db, job):
+        from api.v1.services.job import job_service
+
+        handler = _handlers.get(job.kind)
+        if handler is None:
+            job_service.finish(db, job.id, "failed", error=f"Unknown job kind {job.kind}")
+            return
+
+        context = JobContext(job.id, job.params, self.lease_seconds, job.attempts, job.checkpoint)
+        try:
+            context.report(0.0 if job.checkpoint is None else job.progress)
+            result = handler(context) or JobResult()
+        except JobLeaseLost:
+            finished = False
+        except JobCancelled:
+            finished = job_service.finish(db, job.id, "cancelled", attempt=job.attempts)
+        except Exception as e:
+            logger.exception("Job %s (%s) failed", job.id, job.kind)
+            error = e.detail if isinstance(e, HTTPException) else e
+            finished = job_service.finish(db, job.id, "failed", error=str(error), attempt=job.attempts)
+        else:
+            try:
+                finished = job_service.finish(
+                    db, job.id, "succeeded",
+                    result=dict(result), result_file=result.location, attempt=job.attempts,
+                )
+            finally:
+                # Stored in the database now, or dropped with a lost claim
+                if result.location and os.path.exists(result.location):
+                    os.remove(result.location)
+        if not finished:
+            # The new claim runs the job to its end; this one's outcome is dropped
+            logger.warning("Job %s (%s) was taken over by another worker", job.id, job.kind)
+
+
+job_runner = JobRunner(
+    workers=settings.JOB_WORKERS,
+    poll_interval=settings.JOB_POLL_INTERVAL,
+    lease_seconds=settings.JOB_LEASE_SECONDS,
+)
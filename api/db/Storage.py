@@ -1,6 +1,7 @@
 from fastapi import HTTPException, status
 from typing import Optional, List
 from api.db.database import SessionLocal as SessionMaker, engine, Base
+from api.db.filters import apply_filter
 from enum import Enum as Pyenum
 import sys
 from sqlalchemy import  text, desc, asc, or_, and_,  cast, Date, text
@@ -314,34 +315,10 @@ class DB:
 
     def _apply_filter(self, query, column_attr, operator, filter_value):
         """Applies the corresponding SQLAlchemy filter based on the operator."""
-        if operator == "$gte":  # Greater than or equal
-            return query.filter(column_attr >= filter_value)
-        elif operator == "$gt":  # Greater than
-            return query.filter(column_attr > filter_value)
-        elif operator == "$lte":  # Less than or equal
-            return query.filter(column_attr <= filter_value)
-        elif operator == "$lt":  # Less than
-            return query.filter(column_attr < filter_value)
-        elif operator == "$eq":  # Equal
-            return query.filter(column_attr == filter_value)
-        elif operator == "$ne":  # Not equal
-            return query.filter(column_attr != filter_value)
-        elif operator == "$in" and filter_value:  # In a list of values
-            return query.filter(column_attr.in_(filter_value))
-        elif operator == "$not_in" and filter_value:  # Not in a list of values
-            return query.filter(~column_attr.in_(filter_value))
-        elif operator == "$like":  # LIKE query
-            return query.filter(column_attr.like(f"%{filter_value}%"))
-        elif operator == "$not_like":  # NOT LIKE query
-            return query.filter(~column_attr.like(f"%{filter_value}%"))
-        elif operator == "$or":  # OR condition
-            conditions = [getattr(column_attr, k) == v for k, v in filter_value.items()]
-            return query.filter(or_(*conditions))
-        elif operator == "$and":  # AND condition
-            conditions = [getattr(column_attr, k) == v for k, v in filter_value.items()]
-            return query.filter(and_(*conditions))
-        else:
+        if operator in ("$in", "$not_in") and not filter_value:
+            # DB has always refused an empty list; the row query API matches nothing instead
             raise ValueError(f"Unsupported filter operator: {operator}")
+        return apply_filter(query, column_attr, operator, filter_value)
         
 
 def get_db():
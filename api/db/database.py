@@ -31,7 +31,11 @@ def get_db_engine(test_mode: bool = False):
             f"postgresql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
         )
 
-    return create_engine(DATABASE_URL)
+    return create_engine(
+        DATABASE_URL,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+    )
 
 
 engine = get_db_engine()
@@ -48,7 +52,9 @@ def create_database():
 
 
 def get_db():
-    db = db_session()
+    # A session per request: the thread-local ``db_session`` would hand requests
+    # whose dependency ran on the same thread one shared session
+    db = SessionLocal()
     try:
         yield db
     finally:
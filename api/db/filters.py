@@ -0,0 +1,48 @@
+""" Mongo-style filter operators compiled to SQLAlchemy conditions
+
+``{"$gte": 18}``-style operators, shared by ``DB._build_query`` (real table
+columns) and the row query API (keys inside ``rows.data``).
+"""
+from typing import Any
+
+from sqlalchemy import and_, or_
+
+
+COMPARISON_OPERATORS = (
+    "$gte", "$gt", "$lte", "$lt", "$eq", "$ne", "$in", "$not_in", "$like", "$not_like",
+)
+
+
+def filter_condition(column_attr, operator: str, filter_value: Any):
+    """The SQL condition for one operator applied to ``column_attr``"""
+    if operator == "$gte":  # Greater than or equal
+        return column_attr >= filter_value
+    elif operator == "$gt":  # Greater than
+        return column_attr > filter_value
+    elif operator == "$lte":  # Less than or equal
+        return column_attr <= filter_value
+    elif operator == "$lt":  # Less than
+        return column_attr < filter_value
+    elif operator == "$eq":  # Equal
+        return column_attr == filter_value
+    elif operator == "$ne":  # Not equal
+        return column_attr != filter_value
+    elif operator == "$in":  # In a list of values
+        return column_attr.in_(filter_value)
+    elif operator == "$not_in":  # Not in a list of values
+        return ~column_attr.in_(filter_value)
+    elif operator == "$like":  # LIKE query
+        return column_attr.like(f"%{filter_value}%")
+    elif operator == "$not_like":  # NOT LIKE query
+        return ~column_attr.like(f"%{filter_value}%")
+    elif operator == "$or":  # OR condition
+        return or_(*[getattr(column_attr, k) == v for k, v in filter_value.items()])
+    elif operator == "$and":  # AND condition
+        return and_(*[getattr(column_attr, k) == v for k, v in filter_value.items()])
+    else:
+        raise ValueError(f"Unsupported filter operator: {operator}")
+
+
+def apply_filter(query, column_attr, operator: str, filter_value: Any):
+    """Applies the corresponding SQLAlchemy filter based on the operator."""
+    return query.filter(filter_condition(column_attr, operator, filter_value))
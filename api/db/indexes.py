@@ -0,0 +1,113 @@
+""" Expression indexes on keys of ``rows.data``
+
+A column marked ``indexed`` gets an index on the same cell expression the
+query paths use (``api.utils.json_paths.cell``), so filters and sorts on that
+key become index lookups.
+
+On PostgreSQL the index is partial (only the sheet's rows) and is built and
+dropped ``CONCURRENTLY`` on an autocommit connection, so writes to ``rows``
+carry on during the build. SQLite cannot match a partial index against a
+query with bound parameters, so there it leads with ``(template_id,
+sheet_no)`` instead.
+
+Builds, drops and rebuilds of one column's index take a lock on the index
+name (an advisory lock on PostgreSQL), so jobs for the same column never
+interleave.
+"""
+import hashlib
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator
+
+from sqlalchemy import Index, and_, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.schema import CreateIndex, DropIndex
+
+from api.utils.json_paths import cell
+from api.v1.models.row import Row
+
+
+def column_index_name(template_id: str, sheet_no: int, column_name: str) -> str:
+    """Stable index name for a sheet column (within PostgreSQL's 63 characters)"""
+    digest = hashlib.sha1(f"{template_id}|{int(sheet_no)}|{column_name}".encode()).hexdigest()
+    return f"ix_rows_data_{digest[:24]}"
+
+
+def _column_index(engine: Engine, template_id: str, sheet_no: int, column_name: str, column_type: str) -> Index:
+    name = column_index_name(template_id, sheet_no, column_name)
+    expression = cell(column_name, column_type)
+    if engine.dialect.name == "postgresql":
+        index = Index(
+            name, expression,
+            postgresql_where=and_(Row.template_id == template_id, Row.sheet_no == int(sheet_no)),
+            postgresql_concurrently=True,
+        )
+    else:
+        index = Index(name, Row.template_id, Row.sheet_no, expression)
+    # Index() attaches itself to the table; these indexes are not part of the schema
+    Row.__table__.indexes.discard(index)
+    return index
+
+
+def create_column_index(engine: Engine, template_id: str, sheet_no: int, column_name: str, column_type: str) -> str:
+    """Builds the column's index if it does not exist yet and returns its name"""
+    index = _column_index(engine, template_id, sheet_no, column_name, column_type)
+    with _index_lock(engine, index.name):
+        _create(engine, index)
+    return index.name
+
+
+def drop_column_index(engine: Engine, template_id: str, sheet_no: int, column_name: str) -> str:
+    """Drops the column's index if it exists and returns its name"""
+    # The expression does not matter for DROP INDEX
+    index = _column_index(engine, template_id, sheet_no, column_name, None)
+    with _index_lock(engine, index.name):
+        _drop(engine, index)
+    return index.name
+
+
+def rebuild_column_index(engine: Engine, template_id: str, sheet_no: int, column_name: str, column_type: str) -> str:
+    """Replaces the column's index with one for ``column_type`` and returns its name"""
+    index = _column_index(engine, template_id, sheet_no, column_name, column_type)
+    with _index_lock(engine, index.name):
+        _drop(engine, index)
+        _create(engine, index)
+    return index.name
+
+
+def _create(engine: Engine, index: Index):
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        try:
+            connection.execute(CreateIndex(index, if_not_exists=True))
+        except Exception:
+            # A failed concurrent build leaves an INVALID index behind
+            connection.execute(DropIndex(index, if_exists=True))
+            raise
+
+
+def _drop(engine: Engine, index: Index):
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        connection.execute(DropIndex(index, if_exists=True))
+
+
+# In-process locks by index name, for databases without advisory locks
+_locks: Dict[str, threading.Lock] = {}
+_locks_guard = threading.Lock()
+
+
+@contextmanager
+def _index_lock(engine: Engine, name: str) -> Iterator[None]:
+    if engine.dialect.name == "postgresql":
+        # Session-level, on a connection of its own: the build itself runs in autocommit
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+            connection.execute(text("SELECT pg_advisory_lock(hashtext(:name))"), {"name": name})
+            try:
+                yield
+            finally:
+                connection.execute(text("SELECT pg_advisory_unlock(hashtext(:name))"), {"name": name})
+        return
+
+    with _locks_guard:
+        lock = _locks.setdefault(name, threading.Lock())
+    with lock:
+        yield
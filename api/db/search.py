@@ -0,0 +1,135 @@
+""" Full-text search over row cells
+
+The index itself (see ``api.db.search_ddl``) is created with the ``rows``
+table or by the migration that adds it. ``check_search`` runs at startup and
+only reports whether it is there; searching a database without it is a 503.
+"""
+import logging
+import re
+from typing import Any, Dict, List, NamedTuple, Optional
+
+from fastapi import HTTPException, status
+from sqlalchemy import cast, desc, func, literal_column, text
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from api.db.search_ddl import search_installed
+from api.v1.models.row import Row
+
+
+SEPARATOR = "\x1f"
+MARK_START, MARK_END = "<mark>", "</mark>"
+
+logger = logging.getLogger(__name__)
+
+# Engines known to have the index; a missing one is looked up again, since
+# migrations may add it while the app runs
+_installed = set()
+
+
+class SearchHit(NamedTuple):
+    row: Row
+    rank: float
+    highlights: Dict[str, Any]
+
+
+def check_search(engine: Engine) -> bool:
+    """Whether full-text search is available; logs a warning when it is not"""
+    try:
+        with engine.connect() as connection:
+            installed = search_installed(connection)
+    except SQLAlchemyError:
+        logger.exception("Could not check for the full-text search index")
+        return False
+    if installed:
+        _installed.add(engine)
+    else:
+        logger.warning("Full-text search index is missing; run the migrations to enable search")
+    return installed
+
+
+def search_rows(
+    db: Session,
+    template_id: str,
+    query: str,
+    sheet_no: Optional[int],
+    offset: int,
+    limit: int,
+) -> List[SearchHit]:
+    """Rows of a template matching ``query``, best first, with highlighted cells"""
+    engine = db.get_bind()
+    if engine not in _installed and not search_installed(db.connection()):
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Full-text search is not installed on this database"
+        )
+    _installed.add(engine)
+
+    if engine.dialect.name == "postgresql":
+        return _search_postgresql(db, template_id, query, sheet_no, offset, limit)
+    return _search_sqlite(db, template_id, query, sheet_no, offset, limit)
+
+
+def _search_postgresql(db, template_id, query, sheet_no, offset, limit) -> List[SearchHit]:
+    vector = literal_column("rows.search_vector")
+    tsquery = func.websearch_to_tsquery("simple", query)
+    rank = func.ts_rank(vector, tsquery).label("rank")
+    headline = func.ts_headline(
+        "simple", cast(Row.data, JSONB), tsquery, f"StartSel={MARK_START}, StopSel={MARK_END}"
+    )
+
+    results = db.query(Row, rank, headline).filter(
+        Row.template_id == template_id,
+        vector.op("@@")(tsquery)
+    )
+    if sheet_no is not None:
+        results = results.filter(Row.sheet_no == sheet_no)
+    results = results.order_by(desc(rank), Row.sheet_no, Row.row_number).offset(offset).limit(limit)
+
+    return [
+        SearchHit(row, float(score), {
+            key: value for key, value in (highlighted or {}).items()
+            if isinstance(value, str) and MARK_START in value
+        })
+        for row, score, highlighted in results
+    ]
+
+
+def _search_sqlite(db, template_id, query, sheet_no, offset, limit) -> List[SearchHit]:
+    # FTS5 has its own query syntax; match every word of the query instead
+    match = " ".join('"{}"'.format(word.replace('"', '""')) for word in re.findall(r"\w+", query))
+    if not match:
+        return []
+
+    sql = (
+        "SELECT rows_search.rowid, -bm25(rows_search) AS score, rows_search.keys, "
+        f"highlight(rows_search, 0, '{MARK_START}', '{MARK_END}') "
+        "FROM rows_search WHERE rows_search MATCH :match AND rows_search.template_id = :template_id"
+    )
+    params = {"match": match, "template_id": template_id, "offset": offset, "limit": limit}
+    if sheet_no is not None:
+        sql += " AND rows_search.sheet_no = :sheet_no"
+        params["sheet_no"] = sheet_no
+    sql += " ORDER BY score DESC, rows_search.rowid LIMIT :limit OFFSET :offset"
+    matches = db.execute(text(sql), params).all()
+    if not matches:
+        return []
+
+    search_key = literal_column("rows.search_key")
+    rows = {
+        key: row for key, row in db.query(search_key, Row).filter(
+            search_key.in_([key for key, *_ in matches])
+        )
+    }
+    hits = []
+    for key, score, keys, highlighted in matches:
+        row = rows.get(key)
+        if row is None:
+            continue
+        cells = zip((keys or "").split(SEPARATOR), (highlighted or "").split(SEPARATOR))
+        hits.append(SearchHit(row, float(score), {
+            key: value for key, value in cells if MARK_START in value
+        }))
+    return hits
@@ -0,0 +1,122 @@
+""" Schema of the full-text index over row cells
+
+PostgreSQL: a ``tsvector`` column on ``rows`` (string and numeric cell values,
+``simple`` configuration) filled by a trigger on every insert and update, COPY
+included, with a GIN index.
+
+SQLite: an FTS5 table ``rows_search`` kept in sync by triggers on ``rows``.
+Its rowid is ``rows.search_key``, an explicit integer handed out by the insert
+trigger; the implicit rowid of ``rows`` is no key, since VACUUM may renumber
+it. Cell values are stored joined by a unit separator next to their keys, so
+highlights map back to columns.
+
+The statements run after ``rows`` is created (``create_all``) and in the
+migration that adds search to existing databases; none of these objects is
+in the model metadata.
+"""
+from sqlalchemy import DDL, Table, event, text
+from sqlalchemy.engine import Connection
+
+
+# Kept out of alembic autogenerate, which would otherwise drop them
+SEARCH_TABLES = ("rows_search",)
+SEARCH_COLUMNS = ("search_vector", "search_key")
+SEARCH_INDEXES = ("ix_rows_search", "ix_rows_search_key")
+
+POSTGRESQL_COLUMN = "ALTER TABLE rows ADD COLUMN IF NOT EXISTS search_vector tsvector"
+
+POSTGRESQL_TRIGGER = (
+    """
+    CREATE OR REPLACE FUNCTION rows_search_vector() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector := jsonb_to_tsvector('simple', NEW.data::jsonb, '["string", "numeric"]');
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    "DROP TRIGGER IF EXISTS rows_search_vector ON rows",
+    """
+    CREATE TRIGGER rows_search_vector BEFORE INSERT OR UPDATE OF data ON rows
+    FOR EACH ROW EXECUTE FUNCTION rows_search_vector()
+    """,
+)
+
+POSTGRESQL_INDEX = "CREATE INDEX {concurrently} IF NOT EXISTS ix_rows_search ON rows USING GIN (search_vector)"
+
+_SQLITE_INDEX_ROW = """
+    INSERT INTO rows_search (rowid, content, keys, template_id, sheet_no)
+    SELECT {key}, group_concat(value, char(31)), group_concat(key, char(31)), new.template_id, new.sheet_no
+    FROM json_each(new.data) WHERE type IN ('text', 'integer', 'real');
+"""
+
+SQLITE_TABLES = (
+    "ALTER TABLE rows ADD COLUMN search_key INTEGER",
+    "CREATE UNIQUE INDEX ix_rows_search_key ON rows (search_key)",
+    "CREATE VIRTUAL TABLE rows_search USING fts5("
+    "content, keys UNINDEXED, template_id UNINDEXED, sheet_no UNINDEXED)",
+)
+
+SQLITE_TRIGGERS = (
+    """
+    CREATE TRIGGER rows_search_insert AFTER INSERT ON rows BEGIN
+        UPDATE rows SET search_key = (SELECT coalesce(max(search_key), 0) + 1 FROM rows)
+        WHERE row_id = new.row_id;
+        {index_row}
+    END
+    """.format(index_row=_SQLITE_INDEX_ROW.format(
+        key="(SELECT search_key FROM rows WHERE row_id = new.row_id)"
+    )),
+    """
+    CREATE TRIGGER rows_search_update AFTER UPDATE OF data ON rows BEGIN
+        DELETE FROM rows_search WHERE rowid = old.search_key;
+        {index_row}
+    END
+    """.format(index_row=_SQLITE_INDEX_ROW.format(key="new.search_key")),
+    """
+    CREATE TRIGGER rows_search_delete AFTER DELETE ON rows BEGIN
+        DELETE FROM rows_search WHERE rowid = old.search_key;
+    END
+    """,
+)
+
+# Numbers and indexes rows already in the table; used by the migration
+SQLITE_BACKFILL = (
+    "UPDATE rows SET search_key = rowid",
+    """
+    INSERT INTO rows_search (rowid, content, keys, template_id, sheet_no)
+    SELECT rows.search_key, group_concat(cells.value, char(31)), group_concat(cells.key, char(31)),
+           rows.template_id, rows.sheet_no
+    FROM rows LEFT JOIN json_each(rows.data) AS cells ON cells.type IN ('text', 'integer', 'real')
+    GROUP BY rows.search_key
+    """,
+)
+
+
+def attach_search_ddl(table: Table):
+    """Creates the search objects whenever ``table`` (``rows``) is created"""
+    for statement in (POSTGRESQL_COLUMN, *POSTGRESQL_TRIGGER, POSTGRESQL_INDEX.format(concurrently="")):
+        event.listen(table, "after_create", DDL(statement).execute_if(dialect="postgresql"))
+    for statement in (*SQLITE_TABLES, *SQLITE_TRIGGERS):
+        event.listen(table, "after_create", DDL(statement).execute_if(dialect="sqlite"))
+
+
+def search_installed(connection: Connection) -> bool:
+    """Whether the database has the full-text index"""
+    if connection.dialect.name == "postgresql":
+        return connection.execute(text(
+            "SELECT 1 FROM pg_indexes WHERE tablename = 'rows' AND indexname = 'ix_rows_search'"
+        )).first() is not None
+    return connection.execute(text(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'rows_search'"
+    )).first() is not None
+
+
+def include_object(object, name, type_, reflected, compare_to) -> bool:
+    """alembic ``include_object`` hook that leaves the search objects alone"""
+    if type_ == "table":
+        return not any(name == table or name.startswith(f"{table}_") for table in SEARCH_TABLES)
+    if type_ == "column":
+        return name not in SEARCH_COLUMNS
+    if type_ == "index":
+        return name not in SEARCH_INDEXES
+    return True
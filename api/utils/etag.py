@@ -0,0 +1,36 @@
+""" Strong ETags and If-None-Match handling """
+import hashlib
+from typing import Any, Optional
+
+from fastapi import Request, Response, status
+
+
+def make_etag(*parts: Any) -> str:
+    """Builds a quoted strong ETag from version parts"""
+    digest = hashlib.sha1("|".join(map(str, parts)).encode()).hexdigest()
+    return f'"{digest[:32]}"'
+
+
+def is_not_modified(request: Request, etag: Optional[str]) -> bool:
+    """True when the request's If-None-Match matches ``etag``"""
+    header = request.headers.get("if-none-match")
+    if not header or etag is None:
+        return False
+    if header.strip() == "*":
+        return True
+    # If-None-Match uses weak comparison, so W/ prefixes are ignored
+    candidates = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+    return etag in candidates
+
+
+def not_modified_response(etag: str) -> Response:
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+
+
+def tagged_json_response(body: bytes, etag: Optional[str]) -> Response:
+    """A 200 with an already serialized JSON body (e.g. from the response cache)"""
+    return Response(
+        content=body,
+        media_type="application/json",
+        headers={"ETag": etag} if etag else None
+    )
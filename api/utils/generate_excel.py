@@ -1,48 +1,91 @@
-import pandas as pd
-import numpy as np
-from datetime import datetime, timedelta
-from api.v1.services.row import row_service
-from api.db.database import get_db
+""" Excel export
+
+Rows are read one sheet at a time with ``yield_per`` (a server-side cursor
+on PostgreSQL) and handed to xlsxwriter in ``constant_memory`` mode, which
+writes each row out as soon as the next one starts. Memory use is bounded by
+one batch of rows, whatever the size of the template.
+
+Columns follow the sheet's Column definitions; cells stored under keys that
+have no definition are not exported.
+"""
+from typing import IO, Any, Union
+
+import orjson
+import xlsxwriter
 from sqlalchemy.orm import Session
-import tempfile
-import os
-
-def generate_db_excel(db: Session, template_id:str, filename:str = "result.xlsx"):
-    # Create a temporary file
-    temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.xlsx')
-    temp_file_path = temp_file.name
-    temp_file.close()
-    
-    # Create a Pandas Excel writer using XlsxWriter as the engine
-    writer = pd.ExcelWriter(temp_file_path, engine='xlsxwriter')
-    result_data_db = row_service.fetch(db, template_id)
-    print(result_data_db)
-    
-    # Get the xlsxwriter workbook object
-    workbook = writer.book
-    
-    # Add some formatting
-    header_format = workbook.add_format({
-        'bold': True,
-        'text_wrap': True,
-        'valign': 'top',
-        'bg_color': '#D9D9D9',
-        'border': 1
-    })
-    # Process each sheet
-    for sheet_name, data in result_data_db.items():
-        df_data = pd.DataFrame(data)
-        df_data.to_excel(writer, sheet_name=sheet_name, index=False)
-        
-        # Get the worksheet object
-        worksheet = writer.sheets[sheet_name]
-        
-        # Apply formatting to headers
-        for col_num, value in enumerate(df_data.columns):
-            worksheet.write(0, col_num, value, header_format)
-            worksheet.set_column(col_num, col_num, 15)  # Set column width
-    
-    # Save the Excel file
-    writer.close()
-    
-    return temp_file_path
+
+from api.core.executors import worker_session
+from api.v1.models import Row
+from api.v1.services.metadata import template_metadata
+
+
+EXPORT_BATCH_SIZE = 2000
+COLUMN_WIDTH = 15
+HEADER_FORMAT = {
+    'bold': True,
+    'text_wrap': True,
+    'valign': 'top',
+    'bg_color': '#D9D9D9',
+    'border': 1
+}
+WORKBOOK_OPTIONS = {
+    'constant_memory': True,
+    # Cell text is data: "=..." stays a string and URLs stay plain text
+    'strings_to_formulas': False,
+    'strings_to_urls': False,
+}
+
+
+def write_template_workbook(db: Session, template_id: str, output: Union[str, IO[bytes]]) -> int:
+    """Writes the template's rows as a workbook to ``output`` and returns the row count"""
+    metadata = template_metadata.template(db, template_id)
+
+    workbook = xlsxwriter.Workbook(output, WORKBOOK_OPTIONS)
+    header_format = workbook.add_format(HEADER_FORMAT)
+    count = 0
+    try:
+        for sheet in metadata.sheets.values():
+            worksheet = workbook.add_worksheet(sheet.sheet_name)
+            names = [column.name for column in sheet.columns]
+            if names:
+                worksheet.set_column(0, len(names) - 1, COLUMN_WIDTH)
+            worksheet.write_row(0, 0, names, header_format)
+
+            rows = db.query(Row.data).filter(
+                Row.template_id == template_id,
+                Row.sheet_no == sheet.sheet_no
+            ).order_by(Row.row_number).yield_per(EXPORT_BATCH_SIZE)
+
+            # Picking the typed writer here skips xlsxwriter's per-cell type sniffing
+            writers = {
+                str: worksheet.write_string,
+                int: worksheet.write_number,
+                float: worksheet.write_number,
+                bool: worksheet.write_boolean,
+            }
+            for row_index, (data,) in enumerate(rows, start=1):
+                for column_index, name in enumerate(names):
+                    value = data.get(name)
+                    if value is None:
+                        continue
+                    writer = writers.get(value.__class__)
+                    if writer is None:
+                        worksheet.write(row_index, column_index, _cell_value(value))
+                    else:
+                        writer(row_index, column_index, value)
+                count += 1
+    finally:
+        workbook.close()
+    return count
+
+
+def render_template_workbook(database_url: str, template_id: str, output: str) -> int:
+    """Runs in a CPU pool process: ``write_template_workbook`` on a session of its own"""
+    with worker_session(database_url) as db:
+        return write_template_workbook(db, template_id, output)
+
+
+def _cell_value(value: Any) -> Any:
+    if isinstance(value, (dict, list)):
+        return orjson.dumps(value).decode()
+    return value
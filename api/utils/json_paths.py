@@ -0,0 +1,94 @@
+""" SQL expressions over keys of ``rows.data``
+
+Every query that reads a cell inside the row JSON (filters, sorting,
+aggregates, expression indexes) builds it here, so they all produce the same
+SQL and an expression index on a key is usable by all of them. The JSON path
+compiles per dialect: ``data ->> 'key'`` (with a cast) on PostgreSQL and
+``json_extract(data, '$."key"')`` on SQLite.
+"""
+from typing import List, Optional, Sequence
+
+from sqlalchemy import JSON, bindparam, literal
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import ColumnElement
+
+from api.v1.models.row import Row
+
+
+NUMERIC_TYPES = {"number", "numeric", "integer", "float", "decimal"}
+BOOLEAN_TYPES = {"bool", "boolean", "checkbox"}
+
+
+def cell_kind(column_type: Optional[str]) -> str:
+    """``number``, ``bool`` or ``text``: how cells of a Column type compare in SQL"""
+    column_type = (column_type or "").strip().lower()
+    if column_type in NUMERIC_TYPES:
+        return "number"
+    if column_type in BOOLEAN_TYPES:
+        return "bool"
+    return "text"
+
+
+def _element(key: str):
+    # The path is rendered inline rather than bound: SQLite only matches an
+    # expression index when the query's expression is literally the same
+    path = bindparam(None, key, type_=JSON.JSONIndexType, literal_execute=True)
+    return Row.data[path]
+
+
+def cell(key: str, column_type: Optional[str] = None):
+    """The value of ``data[key]``, cast to match the column's type"""
+    element = _element(key)
+    kind = cell_kind(column_type)
+    if kind == "number":
+        return element.as_float()
+    if kind == "bool":
+        return element.as_boolean()
+    return element.as_string()
+
+
+def text_cell(key: str):
+    """The value of ``data[key]`` as text, whatever the column's type"""
+    return _element(key).as_string()
+
+
+class project_data(ColumnElement):
+    """``data`` reduced to ``keys`` in SQL: an object with only those of the
+    keys that the row has, so other cells are never sent or deserialized"""
+
+    type = JSON()
+    inherit_cache = False
+
+    def __init__(self, column, keys: Sequence[str]):
+        self.column = column
+        self.keys = tuple(keys)
+
+    @property
+    def _from_objects(self):
+        return self.column._from_objects
+
+
+def _project(element, compiler, aggregate: str, **kw) -> str:
+    keys = ", ".join(compiler.process(literal(key), **kw) for key in element.keys)
+    return (
+        f"(SELECT {aggregate}(key, value) FROM json_each({compiler.process(element.column, **kw)}) "
+        f"WHERE key IN ({keys}))"
+    )
+
+
+@compiles(project_data)
+def _project_sqlite(element, compiler, **kw):
+    return _project(element, compiler, "json_group_object", **kw)
+
+
+@compiles(project_data, "postgresql")
+def _project_postgresql(element, compiler, **kw):
+    # json_object_agg over no keys is NULL; json_group_object gives {}
+    return "coalesce({}, '{{}}')".format(_project(element, compiler, "json_object_agg", **kw))
+
+
+def parse_columns(value: Optional[str]) -> Optional[List[str]]:
+    """``"a, b,c"`` -> ``["a", "b", "c"]``; None when no projection was asked for"""
+    if value is None:
+        return None
+    return [name.strip() for name in value.split(",") if name.strip()] or None
@@ -3,12 +3,11 @@
 from enum import Enum
 from json import dumps
 from fastapi import status
-from fastapi.responses import JSONResponse
-from fastapi.encoders import jsonable_encoder
+from api.utils.serializers import FastJSONResponse
 from pydantic import BaseModel
 from typing import Any, Dict, Optional
 
-class JsonResponseDict(JSONResponse):
+class JsonResponseDict(FastJSONResponse):
 
     def __init__(
         self, message: str, data: Optional[Dict[str, Any]] = None, error: str = "", status_code: int = 200
@@ -19,7 +18,7 @@ class JsonResponseDict(JSONResponse):
         self.error = error
         self.status_code = status_code
         super().__init__(
-            content=jsonable_encoder(self.response()), status_code=status_code
+            content=self.response(), status_code=status_code
         )
 
     def __repr__(self):
@@ -1,4 +1,7 @@
+import base64
+import json
 from typing import Any, Dict, List, Optional
+from fastapi import HTTPException, status
 from fastapi.encoders import jsonable_encoder
 from sqlalchemy.orm import Session
 from api.db.database import Base
@@ -103,3 +106,37 @@ def paginated_response(
             )
         }
     )
+
+
+def encode_cursor(position: Dict[str, Any]) -> str:
+    """Encodes a keyset position as an opaque, URL-safe cursor"""
+    raw = json.dumps(position, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, fields: Dict[str, type]) -> Dict[str, Any]:
+    """Decodes a cursor made by ``encode_cursor``.
+
+    Every key of ``fields`` must be present with a value of that type; a
+    cursor that is malformed or does not match is a 400.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        position = json.loads(raw)
+    except ValueError:
+        position = None
+    if not isinstance(position, dict) or not all(
+        _is_instance(position.get(name), expected) for name, expected in fields.items()
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+    return position
+
+
+def _is_instance(value: Any, expected: type) -> bool:
+    # JSON true/false decode to bool, which Python counts as an int
+    if isinstance(value, bool) and expected is not bool:
+        return False
+    return isinstance(value, expected)
@@ -0,0 +1,267 @@
+""" Incremental parsers for streamed row uploads
+
+The text parsers consume an async iterator of raw body chunks (e.g.
+``request.stream()``) and yield one ``ParsedRow`` per record, holding no more
+than a chunk and a block of records at a time. Workbooks are read in
+openpyxl's read-only mode, one sheet row at a time.
+"""
+import asyncio
+import codecs
+import csv
+import datetime as dt
+import itertools
+import json
+from typing import IO, Any, AsyncIterator, Dict, Iterator, List, NamedTuple, Optional
+
+from openpyxl import load_workbook
+
+from api.core.executors import blocking_pool
+
+
+CSV_BLOCK_ROWS = 1000
+XLSX_BLOCK_ROWS = 1000
+
+
+class ParsedRow(NamedTuple):
+    """A single record from an upload: either ``data`` or an ``error``"""
+
+    line: int
+    data: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+
+
+async def iter_lines(chunks: AsyncIterator[bytes], encoding: str = "utf-8") -> AsyncIterator[str]:
+    """Re-chunks a byte stream into text lines (line endings kept)"""
+    decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+    pending = ""
+    async for chunk in chunks:
+        pending += decoder.decode(chunk)
+        if "\n" not in pending:
+            continue
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            yield line + "\n"
+
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending
+
+
+async def iter_ndjson_rows(chunks: AsyncIterator[bytes]) -> AsyncIterator[ParsedRow]:
+    """Parses newline-delimited JSON; every non-blank line is one row.
+
+    A line may be the row data itself or a ``{"data": {...}}`` object as
+    accepted by ``POST /rows/batch``.
+    """
+    line_no = 0
+    async for line in iter_lines(chunks):
+        line_no += 1
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            value = json.loads(line)
+        except ValueError as e:
+            yield ParsedRow(line_no, error=f"Invalid JSON: {e}")
+            continue
+
+        if isinstance(value, dict) and len(value) == 1 and isinstance(value.get("data"), dict):
+            value = value["data"]
+        if not isinstance(value, dict):
+            yield ParsedRow(line_no, error="Row must be a JSON object")
+            continue
+        yield ParsedRow(line_no, data=value)
+
+
+async def iter_csv_rows(chunks: AsyncIterator[bytes]) -> AsyncIterator[ParsedRow]:
+    """Parses CSV with a header row; empty cells are left out of the row.
+
+    The lines go to ``csv.reader``, so quoted fields may span lines and a
+    quote inside an unquoted field is just a character. The body is read on
+    the event loop; each block of CSV_BLOCK_ROWS complete lines is then
+    parsed in the blocking pool, so a pool thread never waits on a slow
+    client. Memory holds one block and a record still open at its end.
+    """
+    parser = _CsvParser()
+    block: List[str] = []
+    async for line in iter_lines(chunks):
+        block.append(line)
+        if len(block) >= CSV_BLOCK_ROWS:
+            for parsed in await blocking_pool.run(parser.feed, block, False):
+                yield parsed
+            block = []
+    for parsed in await blocking_pool.run(parser.feed, block, True):
+        yield parsed
+
+
+class _CsvParser:
+    """``csv.reader`` over lines handed over a block at a time.
+
+    A record whose quoted field is still open at the end of a block is kept
+    and parsed again once the next block arrives.
+    """
+
+    def __init__(self):
+        self._header: Optional[List[str]] = None
+        # Lines before the first one of the next block (or of the kept record)
+        self._line = 0
+        self._open: List[str] = []
+
+    def feed(self, lines: List[str], final: bool) -> List[ParsedRow]:
+        lines = self._open + lines
+        self._open = []
+        source = _Lines(lines)
+        # Strict, so a quoted field still open at the end is an error rather than a silently cut row
+        reader = csv.reader(source, strict=True)
+        parsed: List[ParsedRow] = []
+        while True:
+            start = source.consumed
+            try:
+                values = next(reader)
+            except StopIteration:
+                break
+            except csv.Error as e:
+                if source.exhausted and not final:
+                    self._open = lines[start:]
+                    self._line += start
+                    return parsed
+                parsed.append(ParsedRow(self._line + start + 1, error=f"Invalid CSV: {e}"))
+                continue
+
+            record = self._record(self._line + start + 1, values)
+            if record is not None:
+                parsed.append(record)
+        self._line += len(lines)
+        return parsed
+
+    def _record(self, line: int, values: List[str]) -> Optional[ParsedRow]:
+        if not values or (len(values) == 1 and not values[0].strip()):
+            return None
+        if self._header is None:
+            self._header = [name.strip() for name in values]
+            return None
+        if len(values) > len(self._header):
+            return ParsedRow(
+                line,
+                error=f"Expected at most {len(self._header)} cells, got {len(values)}",
+            )
+        return ParsedRow(
+            line,
+            data={name: value for name, value in zip(self._header, values) if value != ""},
+        )
+
+
+class _Lines:
+    """Iterates a list of lines, counting how many were taken"""
+
+    def __init__(self, lines: List[str]):
+        self._lines = lines
+        self.consumed = 0
+        self.exhausted = False
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> str:
+        if self.consumed >= len(self._lines):
+            self.exhausted = True
+            raise StopIteration
+        line = self._lines[self.consumed]
+        self.consumed += 1
+        return line
+
+
+async def iter_file_chunks(file, chunk_size: int = 1 << 16) -> AsyncIterator[bytes]:
+    """Reads an ``UploadFile`` in fixed-size chunks"""
+    while True:
+        chunk = await file.read(chunk_size)
+        if not chunk:
+            break
+        yield chunk
+
+
+async def iter_xlsx_rows(
+    file: IO[bytes],
+    sheet_name: Optional[str] = None,
+    column_types: Optional[Dict[str, str]] = None,
+) -> AsyncIterator[ParsedRow]:
+    """Parses a workbook sheet whose first row holds the headers.
+
+    Uses the sheet called ``sheet_name`` when the workbook has one, otherwise
+    the active sheet. Empty cells and blank rows are skipped. Dates become
+    ISO strings as CSV and NDJSON uploads carry them: Excel stores every date
+    as a datetime, so under a header matching a ``date`` column in
+    ``column_types`` (column name -> type; names compared ignoring case and
+    surrounding spaces) only the day is kept. Unzipping and parsing run in
+    the blocking pool, a block of rows at a time, so the event loop stays free.
+    """
+    types = {name.strip().lower(): column_type for name, column_type in (column_types or {}).items()}
+    async for parsed in _in_blocks(_xlsx_rows(file, sheet_name, types), XLSX_BLOCK_ROWS):
+        yield parsed
+
+
+def _xlsx_rows(file: IO[bytes], sheet_name: Optional[str], types: Dict[str, str]) -> Iterator[ParsedRow]:
+    workbook = load_workbook(file, read_only=True, data_only=True)
+    try:
+        if sheet_name in workbook.sheetnames:
+            worksheet = workbook[sheet_name]
+        else:
+            worksheet = workbook.active
+        rows = worksheet.iter_rows(values_only=True)
+        header = [
+            str(name).strip() if name is not None else None
+            for name in next(rows, ())
+        ]
+
+        dates = {name for name in header if name and _is_date(types.get(name.lower()))}
+
+        for line, values in enumerate(rows, start=2):
+            data = {
+                name: _cell_value(value, name in dates)
+                for name, value in zip(header, values)
+                if name and value is not None and value != ""
+            }
+            if data:
+                yield ParsedRow(line, data=data)
+    finally:
+        workbook.close()
+
+
+async def _in_blocks(rows: Iterator[ParsedRow], size: int) -> AsyncIterator[ParsedRow]:
+    """Drives a blocking parser in the blocking pool, ``size`` rows per call"""
+    future = None
+    try:
+        while True:
+            future = blocking_pool.submit(_take, rows, size)
+            try:
+                block = await asyncio.wrap_future(future)
+            except asyncio.CancelledError:
+                future.cancel()
+                raise
+            for parsed in block:
+                yield parsed
+            if len(block) < size:
+                break
+    finally:
+        # A block still being read when the await was cancelled owns the
+        # generator until it returns; close it once that is done
+        if future is None:
+            rows.close()
+        else:
+            future.add_done_callback(lambda _: rows.close())
+
+
+def _take(rows: Iterator[ParsedRow], count: int) -> List[ParsedRow]:
+    return list(itertools.islice(rows, count))
+
+
+def _is_date(column_type: Optional[str]) -> bool:
+    return (column_type or "").strip().lower() == "date"
+
+
+def _cell_value(value: Any, is_date: bool = False) -> Any:
+    if is_date and isinstance(value, dt.datetime):
+        return value.date().isoformat()
+    if isinstance(value, (dt.datetime, dt.date, dt.time)):
+        return value.isoformat()
+    return value
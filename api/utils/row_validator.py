@@ -0,0 +1,198 @@
+""" Row validation compiled from a sheet's Column definitions
+
+A ``RowValidator`` is built once per sheet: every column's type is resolved to
+a column coercer up front, and batches are then checked column by column. A
+coercer converts a whole column with builtins mapped over it (``int``,
+``date.fromisoformat``, a dict lookup), so a clean column costs no Python call
+per cell; only a column holding a bad value is re-checked cell by cell to
+find which ones fail.
+"""
+import datetime as dt
+import math
+import re
+from operator import methodcaller
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+
+class RowError(NamedTuple):
+    """Validation failure for the row at ``index`` in the validated batch"""
+
+    index: int
+    column: str
+    error: str
+
+
+def _to_text(value: Any) -> str:
+    if isinstance(value, str):
+        return value
+    if isinstance(value, (dict, list)):
+        raise ValueError("expected text")
+    return str(value)
+
+
+def _to_number(value: Any):
+    if value.__class__ is int or value.__class__ is float:
+        return value
+    if isinstance(value, str):
+        text = value.strip().replace(",", "")
+        try:
+            return int(text)
+        except ValueError:
+            number = float(text)
+            if math.isfinite(number):
+                return number
+    raise ValueError("expected a number")
+
+
+def _to_date(value: Any) -> str:
+    if isinstance(value, (dt.date, dt.datetime)):
+        return value.isoformat()
+    if isinstance(value, str):
+        text = value.strip()
+        try:
+            return dt.date.fromisoformat(text).isoformat()
+        except ValueError:
+            return dt.datetime.fromisoformat(text).isoformat()
+    raise ValueError("expected an ISO date")
+
+
+_TRUE = {"true", "yes", "y", "1"}
+_FALSE = {"false", "no", "n", "0"}
+
+
+def _to_bool(value: Any) -> bool:
+    if value is True or value is False:
+        return value
+    if isinstance(value, str):
+        text = value.strip().lower()
+        if text in _TRUE:
+            return True
+        if text in _FALSE:
+            return False
+    elif value == 1 or value == 0:
+        return bool(value)
+    raise ValueError("expected true or false")
+
+
+COERCERS: Dict[str, Callable[[Any], Any]] = {
+    "text": _to_text,
+    "string": _to_text,
+    "number": _to_number,
+    "numeric": _to_number,
+    "integer": _to_number,
+    "float": _to_number,
+    "decimal": _to_number,
+    "date": _to_date,
+    "datetime": _to_date,
+    "bool": _to_bool,
+    "boolean": _to_bool,
+    "checkbox": _to_bool,
+}
+
+_INTEGER = re.compile(r"\s*[+-]?\d[\d_]*\s*")
+_strip = methodcaller("strip")
+_lower = methodcaller("lower")
+_BOOLS = {**dict.fromkeys(_TRUE, True), **dict.fromkeys(_FALSE, False)}
+
+
+def _text_column(values: List[Any]) -> List[Any]:
+    if set(map(type, values)) <= {str}:
+        return values
+    return list(map(_to_text, values))
+
+
+def _number_column(values: List[Any]) -> List[Any]:
+    kinds = set(map(type, values))
+    if kinds <= {int, float}:
+        return values
+    if kinds == {str}:
+        try:
+            return list(map(int, values))
+        except ValueError:
+            # All decimals; a column mixing in integers keeps those as ints cell by cell
+            numbers = list(map(float, values))
+            if all(map(math.isfinite, numbers)) and not any(map(_INTEGER.fullmatch, values)):
+                return numbers
+    raise ValueError("expected a number")
+
+
+def _date_column(values: List[Any]) -> List[Any]:
+    if set(map(type, values)) == {str}:
+        return list(map(dt.date.isoformat, map(dt.date.fromisoformat, map(_strip, values))))
+    raise ValueError("expected an ISO date")
+
+
+def _bool_column(values: List[Any]) -> List[Any]:
+    kinds = set(map(type, values))
+    if kinds <= {bool}:
+        return values
+    if kinds == {str}:
+        return list(map(_BOOLS.__getitem__, map(_lower, map(_strip, values))))
+    raise ValueError("expected true or false")
+
+
+# Whole-column fast paths; any failure falls back to the cell coercer
+COLUMN_COERCERS: Dict[Callable[[Any], Any], Callable[[List[Any]], List[Any]]] = {
+    _to_text: _text_column,
+    _to_number: _number_column,
+    _to_date: _date_column,
+    _to_bool: _bool_column,
+}
+
+_COERCE_ERRORS = (TypeError, ValueError, OverflowError, KeyError)
+
+
+class RowValidator:
+    """Checks and coerces row data against one sheet's columns.
+
+    ``columns`` is a sequence of ``(name, type, required)``. Unknown column
+    types are accepted as-is; keys with no matching column are left alone.
+    """
+
+    def __init__(self, columns: Iterable[Tuple[str, str, Optional[bool]]]):
+        self.columns = tuple(
+            (name, COERCERS.get((col_type or "").strip().lower()), bool(required))
+            for name, col_type, required in columns
+        )
+
+    def validate(self, rows: Sequence[Dict[str, Any]]) -> List[RowError]:
+        """Coerces ``rows`` in place and returns the failures, ordered by row"""
+        errors: List[RowError] = []
+        for name, coerce, required in self.columns:
+            values = [row.get(name) for row in rows]
+            present = [
+                index for index, value in enumerate(values) if value is not None and value != ""
+            ]
+
+            if required and len(present) < len(values):
+                filled = set(present)
+                errors.extend(
+                    RowError(index, name, f"{name} is required")
+                    for index in range(len(values)) if index not in filled
+                )
+            if coerce is None or not present:
+                continue
+
+            given = [values[index] for index in present]
+            try:
+                results = COLUMN_COERCERS[coerce](given)
+            except _COERCE_ERRORS:
+                results = None
+            if results is given:
+                continue
+            if results is not None:
+                for index, result in zip(present, results):
+                    rows[index][name] = result
+                continue
+
+            for index, value in zip(present, given):
+                try:
+                    result = coerce(value)
+                except _COERCE_ERRORS:
+                    errors.append(RowError(index, name, f"{name}: invalid value {value!r}"))
+                    continue
+                if result is not value:
+                    rows[index][name] = result
+
+        errors.sort(key=lambda error: error.index)
+        return errors
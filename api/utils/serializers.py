@@ -0,0 +1,68 @@
+""" Fast JSON serialization for API responses
+
+``dumps`` hands the response content straight to orjson. Types orjson does
+not know natively reach ``_default`` only when they are actually met: ORM
+instances go through a serializer compiled once per model from its mapper
+columns, and Decimals become int/float the way ``jsonable_encoder`` did.
+Nothing walks the whole payload up front.
+"""
+from decimal import Decimal
+from typing import Any, Callable, Dict
+
+import orjson
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from sqlalchemy import inspect
+from sqlalchemy.exc import NoInspectionAvailable
+
+
+_serializers: Dict[type, Callable[[Any], Dict[str, Any]]] = {}
+
+
+def model_serializer(model_class: type) -> Callable[[Any], Dict[str, Any]]:
+    """Returns the compiled serializer of a mapped class.
+
+    Like ``jsonable_encoder`` on an ORM object, only loaded column attributes
+    are included, so serializing never triggers a lazy load.
+    """
+    serializer = _serializers.get(model_class)
+    if serializer is None:
+        keys = tuple(attr.key for attr in inspect(model_class).mapper.column_attrs)
+
+        def serializer(instance, _keys=keys):
+            state = instance.__dict__
+            return {key: state[key] for key in _keys if key in state}
+
+        _serializers[model_class] = serializer
+    return serializer
+
+
+def _decimal(value: Decimal):
+    # Same rule as fastapi.encoders.decimal_encoder
+    return int(value) if value.as_tuple().exponent >= 0 else float(value)
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, Decimal):
+        return _decimal(value)
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    try:
+        return model_serializer(type(value))(value)
+    except NoInspectionAvailable:
+        return jsonable_encoder(value)
+
+
+def dumps(content: Any) -> bytes:
+    """Serializes response content to JSON bytes"""
+    return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with ``dumps`` instead of the stdlib encoder"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
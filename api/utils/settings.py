@@ -23,5 +23,46 @@ class Settings(BaseSettings):
     DB_TYPE: str = config("DB_TYPE")
     DB_URL: str = config("DB_URL")
 
+    # Background jobs
+    JOB_WORKERS: int = config("JOB_WORKERS", default=2, cast=int)
+    JOB_POLL_INTERVAL: float = config("JOB_POLL_INTERVAL", default=1.0, cast=float)
+    JOB_LEASE_SECONDS: int = config("JOB_LEASE_SECONDS", default=300, cast=int)
+    # Scratch space for workbooks being rendered; finished results are kept in the database
+    EXPORT_DIR: str = config("EXPORT_DIR", default="exports")
+    # Processes for CPU-bound export work (workbooks, ZIP sheets); 0 means one per CPU
+    EXPORT_WORKERS: int = config("EXPORT_WORKERS", default=0, cast=int)
+    EXPORT_QUEUE_SIZE: int = config("EXPORT_QUEUE_SIZE", default=32, cast=int)
+    # Rendered exports kept per template version; evicted by total size and idle time
+    ARTIFACT_DIR: str = config("ARTIFACT_DIR", default="exports/artifacts")
+    ARTIFACT_MAX_BYTES: int = config("ARTIFACT_MAX_BYTES", default=1 << 30, cast=int)
+    ARTIFACT_MAX_AGE: float = config("ARTIFACT_MAX_AGE", default=86400.0, cast=float)
+
+    # Threads running routes' blocking database calls; each holds one pooled connection
+    BLOCKING_WORKERS: int = config("BLOCKING_WORKERS", default=15, cast=int)
+    BLOCKING_QUEUE_SIZE: int = config("BLOCKING_QUEUE_SIZE", default=256, cast=int)
+
+    # Connection pool: one per blocking worker, two per job worker (its session and
+    # lease renewals) and one for the row event listener; overflow absorbs the rest
+    DB_POOL_SIZE: int = config("DB_POOL_SIZE", default=BLOCKING_WORKERS + 2 * JOB_WORKERS + 1, cast=int)
+    DB_MAX_OVERFLOW: int = config("DB_MAX_OVERFLOW", default=10, cast=int)
+
+    # Template metadata cache
+    TEMPLATE_CACHE_SIZE: int = config("TEMPLATE_CACHE_SIZE", default=1024, cast=int)
+    TEMPLATE_CACHE_TTL: float = config("TEMPLATE_CACHE_TTL", default=300.0, cast=float)
+
+    # Shared response cache: "memory" (per process) or "redis" (any RESP server at CACHE_URL)
+    CACHE_BACKEND: str = config("CACHE_BACKEND", default="memory")
+    CACHE_URL: str = config("CACHE_URL", default="redis://localhost:6379/0")
+    CACHE_TTL: float = config("CACHE_TTL", default=300.0, cast=float)
+    CACHE_MAX_ENTRIES: int = config("CACHE_MAX_ENTRIES", default=256, cast=int)
+
+    # Row event feed: pending events per subscriber before it is told to resync
+    EVENTS_QUEUE_SIZE: int = config("EVENTS_QUEUE_SIZE", default=256, cast=int)
+    EVENTS_KEEPALIVE: float = config("EVENTS_KEEPALIVE", default=15.0, cast=float)
+
+    # Delta sync: deleted-row tombstones are kept this long; older cursors get a 410
+    TOMBSTONE_RETENTION_DAYS: float = config("TOMBSTONE_RETENTION_DAYS", default=30.0, cast=float)
+    TOMBSTONE_PRUNE_INTERVAL: float = config("TOMBSTONE_PRUNE_INTERVAL", default=3600.0, cast=float)
+
 
 settings = Settings()
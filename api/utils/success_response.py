@@ -1,6 +1,5 @@
 from typing import Optional, Dict, Any
-from fastapi.responses import JSONResponse
-from fastapi.encoders import jsonable_encoder
+from api.utils.serializers import FastJSONResponse
 
 
 def success_response(status_code: int, message: str, data: Optional[dict] = None):
@@ -13,7 +12,7 @@ def success_response(status_code: int, message: str, data: Optional[dict] = None
         "data": data or {}  # Ensure data is always a dictionary
     }
 
-    return JSONResponse(status_code=status_code, content=jsonable_encoder(response_data))
+    return FastJSONResponse(status_code=status_code, content=response_data)
 
 
 def auth_response(status_code: int, message: str, access_token: str, data: Optional[dict] = None):
@@ -29,7 +28,7 @@ def auth_response(status_code: int, message: str, access_token: str, data: Optio
         }
     }
 
-    return JSONResponse(status_code=status_code, content=jsonable_encoder(response_data))
+    return FastJSONResponse(status_code=status_code, content=response_data)
 
 
 def fail_response(status_code: int, message: str, data: Optional[dict] = None):
@@ -42,4 +41,4 @@ def fail_response(status_code: int, message: str, data: Optional[dict] = None):
         "data": data or {}  # Ensure data is always a dictionary
     }
 
-    return JSONResponse(status_code=status_code, content=jsonable_encoder(response_data))
+    return FastJSONResponse(status_code=status_code, content=response_data)
@@ -0,0 +1,129 @@
+""" Streamed ZIP archives from pre-deflated members
+
+``DeflateWriter`` compresses a member's bytes as they are written (in a
+worker process, say) and tracks the CRC and sizes the archive needs.
+``ZipStream`` then emits the archive as a byte stream: each member's
+compressed data is copied through as-is, so the process assembling the
+archive never compresses anything itself. Sizes are known before a member is
+written, so no data descriptors are needed; ZIP64 records are added only
+when a size or offset needs them.
+"""
+import struct
+import time
+import zlib
+from typing import IO, Iterable, Iterator, List, NamedTuple
+
+ZIP64_LIMIT = 0xFFFFFFFF
+# What a 32-bit field holds when the real value lives in a ZIP64 record
+ZIP64_MARKER = 0xFFFFFFFF
+ZIP_DEFLATED = 8
+UTF8_NAMES = 0x0800
+
+
+class DeflateWriter:
+    """Binary file-like object that deflates into ``target`` as it goes"""
+
+    def __init__(self, target: IO[bytes], level: int = 6):
+        self._target = target
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, -zlib.MAX_WBITS)
+        self.crc = 0
+        self.size = 0
+        self.compressed_size = 0
+
+    def write(self, data: bytes) -> int:
+        self.crc = zlib.crc32(data, self.crc)
+        self.size += len(data)
+        self._emit(self._compressor.compress(data))
+        return len(data)
+
+    def finish(self):
+        """Flushes the compressor; the member is complete afterwards"""
+        self._emit(self._compressor.flush())
+
+    def _emit(self, compressed: bytes):
+        if compressed:
+            self._target.write(compressed)
+            self.compressed_size += len(compressed)
+
+
+class _Entry(NamedTuple):
+    name: bytes
+    crc: int
+    compressed_size: int
+    size: int
+    offset: int
+
+
+class ZipStream:
+    """Writes a ZIP archive member by member as a sequence of byte chunks"""
+
+    def __init__(self):
+        self._entries: List[_Entry] = []
+        self._offset = 0
+        self._dos_time, self._dos_date = _dos_timestamp(time.localtime())
+
+    def member(
+        self, name: str, crc: int, compressed_size: int, size: int, data: Iterable[bytes]
+    ) -> Iterator[bytes]:
+        """Yields a member's header and then its deflated ``data`` unchanged"""
+        encoded = name.encode("utf-8")
+        zip64 = size >= ZIP64_LIMIT or compressed_size >= ZIP64_LIMIT
+        extra = struct.pack("<HHQQ", 1, 16, size, compressed_size) if zip64 else b""
+        header = struct.pack(
+            "<IHHHHHIIIHH",
+            0x04034B50, 45 if zip64 else 20, UTF8_NAMES, ZIP_DEFLATED,
+            self._dos_time, self._dos_date, crc,
+            ZIP64_MARKER if zip64 else compressed_size,
+            ZIP64_MARKER if zip64 else size,
+            len(encoded), len(extra),
+        ) + encoded + extra
+        self._entries.append(_Entry(encoded, crc, compressed_size, size, self._offset))
+        self._offset += len(header) + compressed_size
+
+        yield header
+        yield from data
+
+    def close(self) -> bytes:
+        """The central directory and end records that finish the archive"""
+        directory = b"".join(self._central_header(entry) for entry in self._entries)
+        start, count = self._offset, len(self._entries)
+        end = b""
+        if start >= ZIP64_LIMIT or start + len(directory) >= ZIP64_LIMIT or count >= 0xFFFF:
+            zip64_end = start + len(directory)
+            end += struct.pack(
+                "<IQHHIIQQQQ", 0x06064B50, 44, 45, 45, 0, 0, count, count, len(directory), start
+            )
+            end += struct.pack("<IIQI", 0x07064B50, 0, zip64_end, 1)
+        end += struct.pack(
+            "<IHHHHIIH", 0x06054B50, 0, 0,
+            min(count, 0xFFFF), min(count, 0xFFFF),
+            _field(len(directory)), _field(start), 0,
+        )
+        return directory + end
+
+    def _central_header(self, entry: _Entry) -> bytes:
+        extra_fields = [
+            value for value in (entry.size, entry.compressed_size, entry.offset)
+            if value >= ZIP64_LIMIT
+        ]
+        extra = b""
+        if extra_fields:
+            extra = struct.pack(f"<HH{len(extra_fields)}Q", 1, 8 * len(extra_fields), *extra_fields)
+        return struct.pack(
+            "<IHHHHHHIIIHHHHHII",
+            0x02014B50, 45, 45 if extra else 20, UTF8_NAMES, ZIP_DEFLATED,
+            self._dos_time, self._dos_date, entry.crc,
+            _field(entry.compressed_size), _field(entry.size),
+            len(entry.name), len(extra), 0, 0, 0, 0o644 << 16,
+            _field(entry.offset),
+        ) + entry.name + extra
+
+
+def _field(value: int) -> int:
+    return ZIP64_MARKER if value >= ZIP64_LIMIT else value
+
+
+def _dos_timestamp(now: time.struct_time):
+    dos_time = (now.tm_hour << 11) | (now.tm_min << 5) | (now.tm_sec // 2)
+    dos_date = ((now.tm_year - 1980) << 9) | (now.tm_mon << 5) | now.tm_mday
+    return dos_time, dos_date
@@ -2,4 +2,7 @@ from api.v1.models.user import User
 from api.v1.models.templates import Template
 from api.v1.models.sheet import Sheet
 from api.v1.models.column import Column
-from api.v1.models.row import Row
\ No newline at end of file
+from api.v1.models.row import Row
+from api.v1.models.row_tombstone import RowTombstone
+from api.v1.models.job import Job
+from api.v1.models.job_file import JobFile
\ No newline at end of file
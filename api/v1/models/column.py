@@ -1,7 +1,7 @@
 from api.v1.models.base_model import BaseTableModel
 from uuid_extensions import uuid7
 from sqlalchemy.orm import relationship
-from sqlalchemy import Column, String, text, Boolean, Index, ForeignKey, Numeric, ARRAY, ForeignKeyConstraint
+from sqlalchemy import Column, String, text, Boolean, Index, ForeignKey, Numeric, ARRAY, ForeignKeyConstraint, false
 from sqlalchemy.orm import foreign, remote
 
 class Column(BaseTableModel):
@@ -11,6 +11,8 @@ class Column(BaseTableModel):
     type = Column(String, nullable=False)  # e.g., 'text', 'date'
     required = Column(Boolean, default=False)
     sheet_no = Column(Numeric, nullable=False)
+    # Whether an expression index on data->>name exists for this sheet (see api/db/indexes.py)
+    indexed = Column(Boolean, nullable=False, default=False, server_default=false())
     
     # Add a composite foreign key constraint to link to Sheet
     __table_args__ = (
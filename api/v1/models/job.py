@@ -0,0 +1,26 @@
+from api.v1.models.base_model import BaseTableModel
+from sqlalchemy import Column, String, Boolean, DateTime, Float, Integer, JSON, Index
+
+
+class Job(BaseTableModel):
+    __tablename__ = "jobs"
+
+    kind = Column(String, nullable=False)  # e.g. 'ingest_rows', 'export_template'
+    status = Column(String, nullable=False, default="queued")  # queued, running, succeeded, failed, cancelled
+    params = Column(JSON, nullable=False)
+    progress = Column(Float, nullable=False, default=0)
+    result = Column(JSON, nullable=True)
+    result_location = Column(String, nullable=True)
+    error = Column(String, nullable=True)
+    cancel_requested = Column(Boolean, nullable=False, default=False)
+    attempts = Column(Integer, nullable=False, default=0)
+    # Handler-defined resume point, committed together with the work it covers
+    checkpoint = Column(JSON, nullable=True)
+    # A running job whose lease has expired belongs to a dead worker and is picked up again
+    locked_until = Column(DateTime(timezone=True), nullable=True)
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        Index('ix_jobs_status_created', 'status', 'created_at'),
+    )
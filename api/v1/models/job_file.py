@@ -0,0 +1,21 @@
+from api.v1.models.base_model import BaseTableModel
+from sqlalchemy import Column, String, ForeignKey, Integer, LargeBinary, UniqueConstraint
+
+
+class JobFile(BaseTableModel):
+    """One part of a file belonging to a job: an ingest job's rows or a job's result.
+
+    Files live in the database rather than on a worker's disk, so whichever
+    process claims or serves the job can read them.
+    """
+
+    __tablename__ = "job_files"
+
+    job_id = Column(String, ForeignKey("jobs.id"), nullable=False)
+    name = Column(String, nullable=False)  # 'upload' or 'result'
+    part = Column(Integer, nullable=False)
+    data = Column(LargeBinary, nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint('job_id', 'name', 'part', name='uq_job_files_job_name_part'),
+    )
@@ -1,9 +1,11 @@
 from api.v1.models.base_model import BaseTableModel
 from uuid_extensions import uuid7
 from sqlalchemy.orm import relationship
-from sqlalchemy import Column, String, text, Boolean, Index, ForeignKey, Numeric, ARRAY, ForeignKeyConstraint, JSON
+from sqlalchemy import Column, String, text, Boolean, Index, ForeignKey, Numeric, ARRAY, ForeignKeyConstraint, JSON, BigInteger
 from sqlalchemy.orm import foreign, remote
 
+from api.db.search_ddl import attach_search_ddl
+
 class Row(BaseTableModel):
     __tablename__ = "rows"
     
@@ -12,6 +14,8 @@ class Row(BaseTableModel):
     sheet_no = Column(Numeric, nullable=False)
     row_number = Column(Numeric, nullable=False)
     data = Column(JSON, nullable=False)  # Store row data as JSON
+    # Template change sequence of the last write to this row (see ChangeService)
+    change_seq = Column(BigInteger, nullable=False, default=0, server_default=text("0"))
     
     # Add a composite foreign key constraint to link to Sheet
     __table_args__ = (
@@ -20,7 +24,9 @@ class Row(BaseTableModel):
             ['sheets.template_id', 'sheets.sheet_no']
         ),
         # Ensure row numbers are unique within a sheet
-        Index('ix_rows_template_sheet_row', 'template_id', 'sheet_no', 'row_number', unique=True)
+        Index('ix_rows_template_sheet_row', 'template_id', 'sheet_no', 'row_number', unique=True),
+        # Delta sync reads rows changed after a cursor in (change_seq, row_id) order
+        Index('ix_rows_template_change_seq', 'template_id', 'change_seq', 'row_id'),
     )
 
     template = relationship("Template", back_populates="rows")
@@ -28,4 +34,8 @@ class Row(BaseTableModel):
         "Sheet",
         back_populates="rows",
         foreign_keys=[template_id, sheet_no]
-    ) 
\ No newline at end of file
+    ) 
+
+
+# Full-text index over the cells; kept outside the model columns
+attach_search_ddl(Row.__table__)
@@ -0,0 +1,20 @@
+from api.v1.models.base_model import BaseTableModel
+from sqlalchemy import Column, String, ForeignKey, Numeric, BigInteger, Index
+
+
+class RowTombstone(BaseTableModel):
+    """Marks a deleted row so delta sync clients learn about the delete"""
+
+    __tablename__ = "row_tombstones"
+
+    row_id = Column(String, nullable=False)
+    template_id = Column(String, ForeignKey("templates.template_id"), nullable=False)
+    sheet_no = Column(Numeric, nullable=False)
+    row_number = Column(Numeric, nullable=False)
+    change_seq = Column(BigInteger, nullable=False)
+
+    __table_args__ = (
+        Index('ix_row_tombstones_template_change_seq', 'template_id', 'change_seq', 'row_id'),
+        # Pruning finds expired tombstones by age
+        Index('ix_row_tombstones_created_at', 'created_at'),
+    )
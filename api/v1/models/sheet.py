@@ -1,7 +1,7 @@
 from api.v1.models.base_model import BaseTableModel
 from uuid_extensions import uuid7
 from sqlalchemy.orm import relationship
-from sqlalchemy import Column, String, text, Boolean, Index, ForeignKey, Numeric, ARRAY
+from sqlalchemy import Column, String, text, Boolean, Index, ForeignKey, Numeric, ARRAY, Integer, UniqueConstraint
 from sqlalchemy.orm import foreign, remote
 
 class Sheet(BaseTableModel):
@@ -10,6 +10,16 @@ class Sheet(BaseTableModel):
     template_id = Column(String, ForeignKey("templates.template_id"), nullable=False)
     sheet_no = Column(Numeric, nullable=False)
     sheet_name = Column(String, nullable=False)
+    # Highest row number handed out so far; NULL until first seeded from
+    # MAX(rows.row_number). See RowNumberAllocator.
+    last_row_number = Column(Integer, nullable=True)
+    # Bumped by every row write to the sheet; feeds the sheet's ETag
+    version = Column(Integer, nullable=False, default=0, server_default=text("0"))
+
+    # Columns and rows reference a sheet by (template_id, sheet_no)
+    __table_args__ = (
+        UniqueConstraint('template_id', 'sheet_no', name='uq_sheets_template_sheet_no'),
+    )
 
     template = relationship("Template", back_populates="sheets")
     # Define a one-to-many relationship with Column
@@ -1,12 +1,19 @@
 from api.v1.models.base_model import BaseTableModel
 from uuid_extensions import uuid7
 from sqlalchemy.orm import relationship
-from sqlalchemy import Column, String, text, Boolean, Index, ForeignKey, Numeric, ARRAY
+from sqlalchemy import Column, String, text, Boolean, Index, ForeignKey, Numeric, ARRAY, Integer, BigInteger
 
 class Template(BaseTableModel):
     __tablename__ = "templates"
     template_id = Column(String, nullable=False, unique=True)
+    # Bumped when sheets or columns change; row writes bump the sheet's version
+    version = Column(Integer, nullable=False, default=0, server_default=text("0"))
+    # Last change sequence handed out to a row write or delete in this template
+    change_seq = Column(BigInteger, nullable=False, default=0, server_default=text("0"))
+    # Highest change sequence whose tombstones were pruned; older sync cursors are stale
+    tombstones_pruned_seq = Column(BigInteger, nullable=False, default=0, server_default=text("0"))
     
     sheets = relationship("Sheet", back_populates="template", cascade="all, delete-orphan")
     columns = relationship("Column", back_populates="template", cascade="all, delete-orphan")
     rows = relationship("Row", back_populates="template", cascade="all, delete-orphan")
+    tombstones = relationship("RowTombstone", cascade="all, delete-orphan")
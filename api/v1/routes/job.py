@@ -0,0 +1,108 @@
+from typing import Annotated, AsyncIterator, Optional
+from fastapi import Depends, APIRouter, status, HTTPException
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+from api.core.executors import blocking_pool
+from api.core.jobs import job_runner
+from api.utils.success_response import success_response
+from api.v1.schemas import job
+from api.v1.services.job import RESULT, job_service
+from api.db.database import SessionLocal, get_db
+
+job_router = APIRouter(prefix="/jobs", tags=["Jobs"])
+
+
+@job_router.post("", status_code=status.HTTP_202_ACCEPTED)
+async def create_job(
+    job_data: job.JobCreate,
+    db: Annotated[Session, Depends(get_db)]
+):
+    """Queue a row ingest or template export to run in the background"""
+    new_job = await blocking_pool.run(job_service.create, db, job_data)
+    job_runner.wake()
+    return success_response(
+        status_code=status.HTTP_202_ACCEPTED,
+        data=await blocking_pool.run(job_service.to_dict, new_job),
+        message="Job queued successfully"
+    )
+
+
+@job_router.get("/{job_id}", status_code=status.HTTP_200_OK)
+async def get_job(
+    job_id: str,
+    db: Annotated[Session, Depends(get_db)]
+):
+    """Get a job's status and progress"""
+    found = await blocking_pool.run(job_service.fetch, db, job_id)
+    return success_response(
+        status_code=status.HTTP_200_OK,
+        data=await blocking_pool.run(job_service.to_dict, found),
+        message="Job fetched successfully"
+    )
+
+
+@job_router.post("/{job_id}/cancel", status_code=status.HTTP_200_OK)
+async def cancel_job(
+    job_id: str,
+    db: Annotated[Session, Depends(get_db)]
+):
+    """Cancel a queued or running job"""
+    found = await blocking_pool.run(job_service.cancel, db, job_id)
+    return success_response(
+        status_code=status.HTTP_200_OK,
+        data=await blocking_pool.run(job_service.to_dict, found),
+        message="Job cancellation requested"
+    )
+
+
+@job_router.get("/{job_id}/result", status_code=status.HTTP_200_OK)
+async def download_job_result(
+    job_id: str,
+    db: Annotated[Session, Depends(get_db)]
+):
+    """Download the file produced by a finished job"""
+    found = await blocking_pool.run(job_service.fetch, db, job_id)
+    if found.status != "succeeded" or not found.result_location:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Job has no result file"
+        )
+    filename = (found.result or {}).get("filename", f"{job_id}.xlsx")
+    return StreamingResponse(
+        _iter_result(job_id),
+        media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+
+async def _iter_result(job_id: str) -> AsyncIterator[bytes]:
+    """The job's result, a stored part at a time"""
+    part = 0
+    while True:
+        data = await blocking_pool.run(_read_result_part, job_id, part)
+        if data is None:
+            return
+        yield data
+        part += 1
+
+
+def _read_result_part(job_id: str, part: int) -> Optional[bytes]:
+    # A session per part: the response outlives the request's session
+    db = SessionLocal()
+    try:
+        return job_service.read_part(db, job_id, RESULT, part)
+    finally:
+        db.close()
+
+
+@job_router.delete("/{job_id}", status_code=status.HTTP_200_OK)
+async def delete_job(
+    job_id: str,
+    db: Annotated[Session, Depends(get_db)]
+):
+    """Delete a finished job and its result file"""
+    await blocking_pool.run(job_service.delete, db, job_id)
+    return success_response(
+        status_code=status.HTTP_200_OK,
+        message="Job deleted successfully"
+    )
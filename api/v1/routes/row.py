@@ -1,12 +1,26 @@
-from typing import Annotated, List
-from fastapi import Depends, APIRouter, status, HTTPException
+from typing import Annotated, List, Literal, Optional
+from fastapi import Depends, APIRouter, File, Query, Request, UploadFile, status, HTTPException
 from sqlalchemy.orm import Session
 from api.utils.success_response import success_response
 from api.v1.schemas import row
 from api.v1.services.row import row_service
-from api.db.database import get_db
-from api.utils.generate_excel import generate_db_excel
-from fastapi.responses import FileResponse
+from api.v1.services.row_query import row_query_service
+from api.v1.services.search import search_service
+from api.v1.services.changes import change_service
+from api.v1.services.export import export_service
+from api.v1.services.ingest import ingest_service, DEFAULT_CHUNK_SIZE
+from api.v1.services.version import version_service
+from api.utils.json_paths import parse_columns
+from api.utils.etag import is_not_modified, not_modified_response, tagged_json_response
+from api.core.cache import shared_cache
+from api.core.artifacts import export_artifacts
+from api.core.events import row_events
+from api.core.executors import blocking_pool, cpu_pool, task_database_url
+from api.v1.services.metadata import template_metadata
+from api.utils.row_streams import iter_csv_rows, iter_ndjson_rows
+from api.db.database import get_db, SessionLocal
+from api.utils.generate_excel import render_template_workbook
+from fastapi.responses import FileResponse, StreamingResponse
 from datetime import datetime
 
 row_router = APIRouter(prefix="/rows", tags=["Rows"])
@@ -18,12 +32,14 @@ async def create_row(
 ):
     """Create a new row"""
     try:
-        created_row = row_service.create(db, row_data)
+        created_row = await blocking_pool.run(row_service.create, db, row_data)
         return success_response(
             status_code=status.HTTP_201_CREATED,
             data=created_row,
             message="Row created successfully"
         )
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -44,12 +60,102 @@ async def create_rows_batch(
         #         row_item.template_id = row_data.template_id
         #     created_row = row_service.create(db, row_item)
         #     created_rows.append(created_row)
-        created_rows_response = row_service.create_rows_batch(db, row_data)
+        result = await blocking_pool.run(row_service.create_rows_batch, db, row_data)
         
         return success_response(
             status_code=status.HTTP_201_CREATED,
-            message= created_rows_response
+            data=result.to_dict(),
+            message=f"Rows Data of length {result.rows} successfully added"
         )
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=str(e)
+        )
+
+@row_router.post("/upload/{template_id}/{sheet_no}", status_code=status.HTTP_201_CREATED)
+async def upload_rows(
+    template_id: str,
+    sheet_no: int,
+    request: Request,
+    db: Annotated[Session, Depends(get_db)],
+    format: Optional[Literal["ndjson", "csv"]] = None,
+    chunk_size: int = Query(DEFAULT_CHUNK_SIZE, ge=1, le=50000),
+):
+    """Stream NDJSON or CSV rows into a sheet, committing in chunks"""
+    if format is None:
+        content_type = request.headers.get("content-type", "").split(";")[0].strip()
+        if content_type == "text/csv":
+            format = "csv"
+        elif content_type in ("application/x-ndjson", "application/ndjson", "application/jsonl"):
+            format = "ndjson"
+        else:
+            raise HTTPException(
+                status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+                detail="Send text/csv or application/x-ndjson, or pass ?format="
+            )
+
+    parser = iter_csv_rows if format == "csv" else iter_ndjson_rows
+    try:
+        result = await ingest_service.ingest(
+            db, template_id, sheet_no, parser(request.stream()), chunk_size
+        )
+        return success_response(
+            status_code=status.HTTP_201_CREATED,
+            data=result,
+            message=f"Rows Data of length {result['rows_inserted']} successfully added"
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=str(e)
+        )
+
+@row_router.post("/import/{template_id}/{sheet_no}", status_code=status.HTTP_201_CREATED)
+async def import_rows(
+    template_id: str,
+    sheet_no: int,
+    db: Annotated[Session, Depends(get_db)],
+    file: UploadFile = File(...),
+    chunk_size: int = Query(DEFAULT_CHUNK_SIZE, ge=1, le=50000),
+):
+    """Import an XLSX or CSV file into a sheet, mapping headers to its columns"""
+    try:
+        result = await ingest_service.import_file(db, template_id, sheet_no, file, chunk_size)
+        return success_response(
+            status_code=status.HTTP_201_CREATED,
+            data=result,
+            message=f"Rows Data of length {result['rows_inserted']} successfully added"
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=str(e)
+        )
+
+@row_router.get("/export/{template_id}", status_code=status.HTTP_200_OK)
+async def export_rows(
+    template_id: str,
+    db: Annotated[Session, Depends(get_db)],
+    format: Literal["csv", "ndjson", "zip"] = "csv",
+    sheet_no: Optional[int] = None,
+):
+    """Stream a template's rows as CSV (one sheet), NDJSON, or a ZIP with one CSV per sheet"""
+    try:
+        export = await blocking_pool.run(export_service.export, db, template_id, format, sheet_no)
+        return StreamingResponse(
+            export.chunks,
+            media_type=export.media_type,
+            headers={"Content-Disposition": f'attachment; filename="{export.filename}"'},
+        )
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -59,21 +165,43 @@ async def create_rows_batch(
 @row_router.get("/excel_download/{template_id}", status_code=status.HTTP_201_CREATED)
 async def download_excel_file(
     template_id: str,
+    request: Request,
     db: Annotated[Session, Depends(get_db)]):
+    """Download the template as a workbook.
+
+    The workbook is rendered once per template version and kept in the export
+    artifact store; later downloads of the same version are served from it,
+    including ``Range`` / ``If-Range`` requests for resuming. Rendering runs
+    in the CPU pool and is dropped if the client leaves while it is queued.
+    """
     try:
+        etag = await blocking_pool.run(version_service.template_etag, db, template_id)
+        if etag is None:
+            await blocking_pool.run(template_metadata.template, db, template_id)
+        if is_not_modified(request, etag):
+            return not_modified_response(etag)
+
         # Generate a unique filename with timestamp
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         filename = f"template_{template_id}_{timestamp}.xlsx"
-        
-        # Generate the Excel file
-        file_path = generate_db_excel(db, template_id, filename)
-        
+
+        database_url = task_database_url(db)
+        file_path = await export_artifacts.get_or_build(
+            template_id, etag, "xlsx",
+            lambda path: cpu_pool.run(
+                render_template_workbook, database_url, template_id, path, request=request
+            )
+        )
+
         # Return the file as a downloadable response
         return FileResponse(
             path=file_path,
             filename=filename,
-            media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+            media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+            headers={"ETag": etag}
         )
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -88,12 +216,14 @@ async def update_row(
 ):
     """Update a row"""
     try:
-        updated_row = row_service.update(db, row_id, row_data)
+        updated_row = await blocking_pool.run(row_service.update, db, row_id, row_data)
         return success_response(
             status_code=status.HTTP_200_OK,
             data=updated_row,
             message="Row updated successfully"
         )
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -107,12 +237,14 @@ async def delete_row(
 ):
     """Delete a row"""
     try:
-        deleted_row = row_service.delete(db, row_id)
+        deleted_row = await blocking_pool.run(row_service.delete, db, row_id)
         return success_response(
             status_code=status.HTTP_200_OK,
             data=deleted_row,
             message="Row deleted successfully"
         )
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -124,18 +256,180 @@ async def delete_row(
 async def get_rows_by_sheet(
     template_id: str,
     sheet_no: int,
-    db: Annotated[Session, Depends(get_db)]
+    request: Request,
+    db: Annotated[Session, Depends(get_db)],
+    from_row: Optional[int] = Query(None, ge=1),
+    after: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    columns: Optional[str] = None,
+):
+    """Get all rows for a sheet, or one window of them when paging arguments are given.
+
+    ``?columns=a,b`` limits each row's data to those columns. Responses carry
+    an ETag; send it back in ``If-None-Match`` to get a 304 while the sheet
+    is unchanged.
+    """
+    try:
+        columns = parse_columns(columns)
+        # Taken before the read: a write racing the read only makes the tag older
+        etag = await blocking_pool.run(
+            version_service.sheet_etag, db, template_id, sheet_no, from_row, after, limit, columns
+        )
+        if is_not_modified(request, etag):
+            return not_modified_response(etag)
+
+        def render() -> bytes:
+            rows = row_service.fetch_by_sheet(db, template_id, sheet_no, from_row, after, limit, columns)
+            return success_response(
+                status_code=status.HTTP_200_OK,
+                data=rows,
+                message="Rows fetched successfully"
+            ).body
+
+        if etag is None:
+            # Missing template or sheet: fetch_by_sheet raises the 404
+            return tagged_json_response(await blocking_pool.run(render), etag)
+        # The ETag covers the sheet version and the paging arguments
+        body = await blocking_pool.run(
+            shared_cache.get_or_set, f"sheet:{template_id}:{etag}", render, request=request
+        )
+        return tagged_json_response(body, etag)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=str(e)
+        ) 
+
+
+@row_router.post("/query/{template_id}/{sheet_no}", status_code=status.HTTP_200_OK)
+async def query_rows(
+    template_id: str,
+    sheet_no: int,
+    query: row.RowQuery,
+    request: Request,
+    db: Annotated[Session, Depends(get_db)],
 ):
-    """Get all rows for a sheet"""
+    """Get one page of a sheet's rows whose cells match a filter, e.g.
+    ``{"filter": {"age": {"$gte": 18}, "city": {"$in": ["Lagos", "Abuja"]}}}``
+    """
     try:
-        rows = row_service.fetch_by_sheet(db, template_id, sheet_no)
+        rows = await blocking_pool.run(
+            row_query_service.query, db, template_id, sheet_no, query, request=request
+        )
         return success_response(
             status_code=status.HTTP_200_OK,
             data=rows,
             message="Rows fetched successfully"
         )
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=str(e)
+        )
+
+
+@row_router.post("/aggregate/{template_id}/{sheet_no}", status_code=status.HTTP_200_OK)
+async def aggregate_rows(
+    template_id: str,
+    sheet_no: int,
+    query: row.RowAggregate,
+    request: Request,
+    db: Annotated[Session, Depends(get_db)],
+):
+    """Compute sum/avg/min/max/count/count_distinct of columns, optionally per group, e.g.
+    ``{"aggregates": [{"op": "avg", "column": "age"}], "group_by": "city"}``
+    """
+    try:
+        result = await blocking_pool.run(
+            row_query_service.aggregate, db, template_id, sheet_no, query, request=request
+        )
+        return success_response(
+            status_code=status.HTTP_200_OK,
+            data=result,
+            message="Rows aggregated successfully"
+        )
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=str(e)
-        ) 
\ No newline at end of file
+        )
+
+
+@row_router.get("/changes/{template_id}", status_code=status.HTTP_200_OK)
+async def get_row_changes(
+    template_id: str,
+    request: Request,
+    db: Annotated[Session, Depends(get_db)],
+    since: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=5000),
+):
+    """Rows written and deleted since a sync cursor, with the cursor to use next time"""
+    try:
+        result = await blocking_pool.run(
+            change_service.changes, db, template_id, since, limit, request=request
+        )
+        return success_response(
+            status_code=status.HTTP_200_OK,
+            data=result,
+            message="Changes fetched successfully"
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=str(e)
+        )
+
+
+def _check_template(template_id: str):
+    # The feed outlives the request, so the template is checked on a
+    # short-lived session rather than holding a pooled connection open
+    with SessionLocal() as db:
+        template_metadata.template(db, template_id)
+
+
+@row_router.get("/events/{template_id}", status_code=status.HTTP_200_OK)
+async def stream_row_events(template_id: str):
+    """Server-Sent Events feed of the template's row creates, updates and deletes"""
+    await blocking_pool.run(_check_template, template_id)
+    return StreamingResponse(
+        row_events.stream(template_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@row_router.get("/search/{template_id}", status_code=status.HTTP_200_OK)
+async def search_rows(
+    template_id: str,
+    request: Request,
+    db: Annotated[Session, Depends(get_db)],
+    q: str = Query(..., min_length=1),
+    sheet_no: Optional[int] = None,
+    after: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=100),
+):
+    """Full-text search over a template's cells (optionally one sheet), ranked and highlighted"""
+    try:
+        result = await blocking_pool.run(
+            search_service.search, db, template_id, q, sheet_no, after, limit, request=request
+        )
+        return success_response(
+            status_code=status.HTTP_200_OK,
+            data=result,
+            message="Search completed successfully"
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=str(e)
+        )
@@ -1,9 +1,19 @@
 from typing import Annotated, Optional, Literal
-from fastapi import Depends, APIRouter, status, HTTPException
+from fastapi import Depends, APIRouter, Request, status, HTTPException
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from api.utils.success_response import success_response
 from api.v1.schemas import template
 from api.v1.services.template import template_service
+from api.v1.services.metadata import template_metadata
+from api.v1.services.column_index import column_index_service
+from api.v1.services.job import job_service
+from api.v1.services.version import version_service
+from api.core.artifacts import export_artifacts
+from api.core.cache import shared_cache
+from api.core.executors import blocking_pool, pool_stats
+from api.utils.json_paths import parse_columns
+from api.utils.etag import is_not_modified, not_modified_response, tagged_json_response
 from api.db.database import get_db
 template_router = APIRouter(prefix="/templates", tags=["Templates"])
 
@@ -42,7 +52,7 @@ async def create_template(
             )
 
     try:
-        template_id = template_service.create(db, template_data)
+        template_id = await blocking_pool.run(template_service.create, db, template_data)
         return success_response(
             status_code=status.HTTP_201_CREATED,
             data =template_id, 
@@ -53,21 +63,118 @@ async def create_template(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=str(e)
         )
+@template_router.get("/cache/stats", status_code=status.HTTP_200_OK)
+async def get_template_cache_stats():
+    """Hit/miss counters of this process's caches, and the queue depth of its execution pools"""
+    return success_response(
+        status_code=status.HTTP_200_OK,
+        data={
+            "metadata": template_metadata.stats(),
+            "responses": shared_cache.stats(),
+            "exports": export_artifacts.stats(),
+            "executors": pool_stats(),
+        },
+        message="Cache stats fetched successfully"
+    )
+
 @template_router.get("/{template_id}", status_code=status.HTTP_200_OK)
 async def get_template(
     template_id: str,
-    db: Annotated[Session, Depends(get_db)]
+    request: Request,
+    db: Annotated[Session, Depends(get_db)],
+    stream: bool = False,
+    columns: Optional[str] = None,
 ):
-    """Get a row by id"""
+    """Get a template with its sheets, columns and rows.
+
+    With ``?stream=true`` the same body is streamed sheet by sheet, which keeps
+    memory flat for very large templates. ``?columns=a,b`` limits the
+    document to those columns. Responses carry an ETag; send it back in
+    ``If-None-Match`` to get a 304 while nothing changed.
+    """
     try:
-        row = template_service.fetch(db, template_id)
-        return success_response(
-            status_code=status.HTTP_200_OK,
-            data=row,
-            message="Row fetched successfully"
-        )
+        columns = parse_columns(columns)
+        # Taken before the read: a write racing the read only makes the tag older
+        etag = await blocking_pool.run(version_service.template_etag, db, template_id, columns)
+        if is_not_modified(request, etag):
+            return not_modified_response(etag)
+
+        # The ETag covers every version the document depends on, so it keys the cache
+        cache_key = f"template:{template_id}:{etag}"
+        if stream:
+            cached = await blocking_pool.run(shared_cache.lookup, cache_key) if etag else None
+            if cached is not None:
+                return tagged_json_response(cached, etag)
+            # Resolving the metadata queries the database; the rows are read by the generator
+            metadata = await blocking_pool.run(template_metadata.template, db, template_id)
+            return StreamingResponse(
+                template_service.stream(metadata, "Row fetched successfully", columns),
+                media_type="application/json",
+                headers={"ETag": etag} if etag else None
+            )
+
+        def render() -> bytes:
+            row = template_service.fetch(db, template_id, columns)
+            return success_response(
+                status_code=status.HTTP_200_OK,
+                data=row,
+                message="Row fetched successfully"
+            ).body
+
+        if etag is None:
+            # Missing template: fetch raises the 404
+            return tagged_json_response(await blocking_pool.run(render), etag)
+        body = await blocking_pool.run(shared_cache.get_or_set, cache_key, render, request=request)
+        return tagged_json_response(body, etag)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=str(e)
-        )
\ No newline at end of file
+        )
+
+
+@template_router.put(
+    "/{template_id}/sheets/{sheet_no}/columns/{column_name}/index",
+    status_code=status.HTTP_202_ACCEPTED
+)
+async def index_column(
+    template_id: str,
+    sheet_no: int,
+    column_name: str,
+    db: Annotated[Session, Depends(get_db)],
+):
+    """Queue building an index on a column's cell values; writes carry on meanwhile"""
+    new_job = await blocking_pool.run(
+        column_index_service.request, db, template_id, sheet_no, column_name, True
+    )
+    # Reading the committed job reloads it
+    job_data = await blocking_pool.run(job_service.to_dict, new_job)
+    return success_response(
+        status_code=status.HTTP_202_ACCEPTED,
+        data=job_data,
+        message="Column index build queued"
+    )
+
+
+@template_router.delete(
+    "/{template_id}/sheets/{sheet_no}/columns/{column_name}/index",
+    status_code=status.HTTP_202_ACCEPTED
+)
+async def unindex_column(
+    template_id: str,
+    sheet_no: int,
+    column_name: str,
+    db: Annotated[Session, Depends(get_db)],
+):
+    """Queue dropping a column's index"""
+    new_job = await blocking_pool.run(
+        column_index_service.request, db, template_id, sheet_no, column_name, False
+    )
+    job_data = await blocking_pool.run(job_service.to_dict, new_job)
+    return success_response(
+        status_code=status.HTTP_202_ACCEPTED,
+        data=job_data,
+        message="Column index drop queued"
+    )
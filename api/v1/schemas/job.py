@@ -0,0 +1,32 @@
+from pydantic import BaseModel
+from typing import Dict, Any, Literal
+
+
+class JobCreate(BaseModel):
+    """Schema to queue a background job"""
+    kind: Literal["ingest_rows", "export_template", "column_index"]
+    params: Dict[str, Any]
+
+
+class IngestRowsParams(BaseModel):
+    """Params of an ingest_rows job as stored: the rows are in the job's NDJSON upload file"""
+    template_id: str
+    sheet_no: int
+    rows: int
+
+
+class ExportTemplateParams(BaseModel):
+    """Params of an export_template job"""
+    template_id: str
+
+
+class ColumnIndexParams(BaseModel):
+    """Params of a column_index job: build (indexed) or drop a column's index.
+
+    ``rebuild`` replaces an index built for the column's previous type.
+    """
+    template_id: str
+    sheet_no: int
+    column: str
+    indexed: bool
+    rebuild: bool = False
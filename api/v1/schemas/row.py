@@ -1,5 +1,5 @@
-from pydantic import BaseModel
-from typing import Dict, Any, Optional, List
+from pydantic import BaseModel, Field
+from typing import Dict, Any, Literal, Optional, List
 
 class RowCreate(BaseModel):
     """Schema to create a row"""
@@ -22,6 +22,27 @@ class RowUpdate(BaseModel):
     """Schema to update a row"""
     data: Dict[str, Any]
 
+class RowQuery(BaseModel):
+    """Schema to filter a sheet's rows by cell values.
+
+    ``filter`` maps column names to a value (equality) or to operators such
+    as ``{"$gte": 18}``; ``$and`` / ``$or`` take a list of such filters.
+    """
+    filter: Dict[str, Any] = {}
+    limit: int = Field(100, ge=1, le=1000)
+    after: Optional[str] = None
+
+class Aggregate(BaseModel):
+    """One aggregate over a column; ``count`` without a column counts rows"""
+    op: Literal["sum", "avg", "min", "max", "count", "count_distinct"]
+    column: Optional[str] = None
+
+class RowAggregate(BaseModel):
+    """Schema to aggregate a sheet's rows, optionally grouped by a column"""
+    aggregates: List[Aggregate] = Field(min_length=1)
+    group_by: Optional[str] = None
+    filter: Dict[str, Any] = {}
+
 class RowResponse(BaseModel):
     """Schema for row response"""
     row_id: str
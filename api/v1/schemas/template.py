@@ -7,6 +7,7 @@ class Column(BaseModel):
     type: str
     required: bool
     sheet_no: int
+    indexed: bool = False
 
 class Sheet(BaseModel):
     """Schema to create a sheet"""
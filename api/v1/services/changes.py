@@ -0,0 +1,204 @@
+import asyncio
+import datetime as dt
+import heapq
+import logging
+from itertools import islice
+from typing import Optional
+
+from fastapi import HTTPException, status
+from sqlalchemy import case, delete, func, or_, update
+from sqlalchemy.orm import Session
+
+from api.core.executors import blocking_pool
+from api.db.database import SessionLocal
+from api.utils.pagination import decode_cursor, encode_cursor
+from api.utils.settings import settings
+from api.v1.models import Row, RowTombstone, Template
+from api.v1.services.metadata import template_metadata
+
+
+DEFAULT_PAGE_SIZE = 500
+
+logger = logging.getLogger(__name__)
+
+
+class ChangeService:
+    """Change sequence behind delta sync.
+
+    Every row write or delete takes the next number from its template's
+    ``change_seq`` counter and stamps it on the rows it writes, or on the
+    tombstone left for a deleted row. Taking the number is an ``UPDATE`` on
+    the template row inside the write's transaction, so the row lock is held
+    until commit: writes to one template commit in sequence order, and a
+    client that has seen number N never misses a change numbered below N.
+    Writers therefore take it only once the rest of the write is done, right
+    before committing. Bulk writes take it after validating and reserving row
+    numbers and pass it into the insert, so the lock is held through the
+    insert: concurrent ingests into one template, whatever their sheet,
+    commit one after the other. Ingests into different templates do not
+    wait for each other. Every writer locks the sheet row (reserving row
+    numbers or bumping the sheet's version) before the template row, so two
+    writes never wait on each other's lock.
+
+    Tombstones are kept ``TOMBSTONE_RETENTION_DAYS``. Pruning records the
+    highest sequence it removed on the template, and a cursor older than that
+    is answered with a 410: the client has to sync again from scratch. A
+    first sync carries the pruned sequence it started from in its cursors as
+    ``base``; deletes up to it predate the client's copy and are no loss.
+    """
+
+    def next_seq(self, db: Session, template_id: str) -> int:
+        """Takes the template's next change sequence number; call it after locking the sheet, last before committing"""
+        change_seq = db.execute(
+            update(Template)
+            .where(Template.template_id == template_id)
+            .values(change_seq=Template.change_seq + 1)
+            .returning(Template.change_seq)
+        ).scalar()
+        if change_seq is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Template with ID {template_id} not found"
+            )
+        return int(change_seq)
+
+    def tombstone(self, db: Session, row: Row, change_seq: int):
+        """Records the delete of ``row`` under ``change_seq``"""
+        db.add(RowTombstone(
+            row_id=row.row_id,
+            template_id=row.template_id,
+            sheet_no=row.sheet_no,
+            row_number=row.row_number,
+            change_seq=change_seq,
+        ))
+
+    def changes(
+        self,
+        db: Session,
+        template_id: str,
+        since: Optional[str] = None,
+        limit: Optional[int] = None,
+    ):
+        """Rows written and deleted after the ``since`` cursor, oldest change first.
+
+        Without ``since`` every row of the template is returned. Rows and
+        tombstones are both keyset reads on their ``(template_id, change_seq,
+        row_id)`` index, so a page costs the same however old the cursor is.
+        ``next_cursor`` is always set; ``has_more`` says whether to ask again
+        right away.
+        """
+        template_metadata.template(db, template_id)
+        pruned_seq = int(db.query(Template.tombstones_pruned_seq).filter(
+            Template.template_id == template_id
+        ).scalar() or 0)
+
+        if since:
+            position = decode_cursor(since, {"seq": int, "row_id": str, "base": int})
+        else:
+            position = {"seq": -1, "row_id": "", "base": pruned_seq}
+        change_seq, row_id, base = position["seq"], position["row_id"], position["base"]
+        if max(change_seq, base) < pruned_seq:
+            raise HTTPException(
+                status_code=status.HTTP_410_GONE,
+                detail="Cursor is older than the retained deletes; sync again without since"
+            )
+
+        limit = limit or DEFAULT_PAGE_SIZE
+        rows = self._after(
+            db.query(Row), Row, template_id, change_seq, row_id
+        ).limit(limit + 1).all()
+        deleted = self._after(
+            db.query(
+                RowTombstone.row_id,
+                RowTombstone.sheet_no,
+                RowTombstone.row_number,
+                RowTombstone.change_seq,
+            ),
+            RowTombstone, template_id, change_seq, row_id
+        ).limit(limit + 1).all()
+
+        # Both lists are in (change_seq, row_id) order; the page is the first
+        # ``limit`` changes of the two combined.
+        changes = list(islice(
+            heapq.merge(
+                ((int(row.change_seq), row.row_id, False, row) for row in rows),
+                ((int(row.change_seq), row.row_id, True, row) for row in deleted),
+                key=lambda change: change[:2],
+            ),
+            limit + 1,
+        ))
+        has_more = len(changes) > limit
+        changes = changes[:limit]
+        if changes:
+            change_seq, row_id = changes[-1][:2]
+
+        return {
+            "rows": [row for _, _, is_deleted, row in changes if not is_deleted],
+            "deleted": [
+                {
+                    "row_id": row.row_id,
+                    "sheet_no": row.sheet_no,
+                    "row_number": row.row_number,
+                }
+                for _, _, is_deleted, row in changes if is_deleted
+            ],
+            "next_cursor": encode_cursor({"seq": change_seq, "row_id": row_id, "base": base}),
+            "has_more": has_more,
+        }
+
+    def prune_tombstones(self, db: Session) -> int:
+        """Deletes tombstones past the retention period; returns how many"""
+        cutoff = dt.datetime.now(dt.timezone.utc) - dt.timedelta(days=settings.TOMBSTONE_RETENTION_DAYS)
+        expired = db.query(RowTombstone.template_id, func.max(RowTombstone.change_seq)).filter(
+            RowTombstone.created_at < cutoff
+        ).group_by(RowTombstone.template_id).all()
+
+        pruned = 0
+        for template_id, change_seq in expired:
+            # Everything up to the sequence goes, so a cursor at or above it misses no delete
+            db.execute(
+                update(Template)
+                .where(Template.template_id == template_id)
+                .values(tombstones_pruned_seq=case(
+                    (Template.tombstones_pruned_seq < change_seq, change_seq),
+                    else_=Template.tombstones_pruned_seq,
+                ))
+            )
+            pruned += db.execute(
+                delete(RowTombstone).where(
+                    RowTombstone.template_id == template_id,
+                    RowTombstone.change_seq <= change_seq,
+                )
+            ).rowcount
+            db.commit()
+        return pruned
+
+    def _after(self, query, model, template_id: str, change_seq: int, row_id: str):
+        """Restricts ``query`` to the template's entries after a cursor position"""
+        return query.filter(
+            model.template_id == template_id,
+            model.change_seq >= change_seq,
+            or_(model.change_seq > change_seq, model.row_id > row_id),
+        ).order_by(model.change_seq, model.row_id)
+
+
+change_service = ChangeService()
+
+
+async def prune_tombstones_periodically(interval: float):
+    """Runs ``prune_tombstones`` every ``interval`` seconds until cancelled"""
+    while True:
+        try:
+            await blocking_pool.run(_prune_tombstones)
+        except Exception:
+            logger.exception("Pruning row tombstones failed")
+        await asyncio.sleep(interval)
+
+
+def _prune_tombstones():
+    # The session lives in the pool thread, so a cancelled await cannot close it mid-prune
+    db = SessionLocal()
+    try:
+        change_service.prune_tombstones(db)
+    finally:
+        db.close()
@@ -0,0 +1,63 @@
+from fastapi import HTTPException, status
+from sqlalchemy.orm import Session
+
+from api.core.jobs import job_runner
+from api.db.indexes import create_column_index, drop_column_index, rebuild_column_index
+from api.v1.models import Column, Job
+from api.v1.schemas import job
+from api.v1.services.job import job_service
+from api.v1.services.metadata import template_metadata
+
+
+class ColumnIndexService:
+    """Builds and drops per-column expression indexes through background jobs"""
+
+    def request(self, db: Session, template_id: str, sheet_no: int, column_name: str, indexed: bool) -> Job:
+        """Queues building (``indexed``) or dropping the index of an existing column"""
+        sheet = template_metadata.sheet(db, template_id, sheet_no)
+        if column_name not in {column.name for column in sheet.columns}:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Column {column_name} not found in sheet {sheet_no} of template {template_id}"
+            )
+        return self.queue(db, template_id, sheet_no, column_name, indexed)
+
+    def queue(
+        self, db: Session, template_id: str, sheet_no: int, column_name: str, indexed: bool, rebuild: bool = False
+    ) -> Job:
+        params = {"template_id": template_id, "sheet_no": sheet_no, "column": column_name, "indexed": indexed}
+        if rebuild:
+            params["rebuild"] = True
+        new_job = job_service.create(db, job.JobCreate(kind="column_index", params=params))
+        job_runner.wake()
+        return new_job
+
+    def apply(self, db: Session, params: job.ColumnIndexParams) -> str:
+        """Builds, rebuilds or drops the index, then records the column's flag; returns the index name"""
+        column = db.query(Column).filter(
+            Column.template_id == params.template_id,
+            Column.sheet_no == params.sheet_no,
+            Column.name == params.column
+        ).first()
+
+        engine = db.get_bind()
+        if params.indexed:
+            if column is None:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail=f"Column {params.column} not found in sheet {params.sheet_no} of template {params.template_id}"
+                )
+            build = rebuild_column_index if params.rebuild else create_column_index
+            name = build(engine, params.template_id, params.sheet_no, column.name, column.type)
+        else:
+            # Dropping also works after the column (or its template) is gone
+            name = drop_column_index(engine, params.template_id, params.sheet_no, params.column)
+
+        if column is not None:
+            column.indexed = params.indexed
+            db.commit()
+            template_metadata.invalidate(params.template_id)
+        return name
+
+
+column_index_service = ColumnIndexService()
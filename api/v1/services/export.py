@@ -0,0 +1,217 @@
+import csv
+import io
+import os
+import tempfile
+from concurrent.futures import Future, as_completed
+from contextlib import suppress
+from typing import Callable, Dict, Iterator, List, NamedTuple, Optional, Sequence
+
+import orjson
+from fastapi import HTTPException, status
+from sqlalchemy import Text, cast
+from sqlalchemy.orm import Session
+
+from api.core.executors import cpu_pool, task_database_url, worker_session
+from api.db.database import SessionLocal
+from api.utils.zip_stream import DeflateWriter, ZipStream
+from api.v1.models import Row
+from api.v1.services.metadata import SheetMetadata, template_metadata
+
+
+EXPORT_BATCH_SIZE = 2000
+READ_BLOCK_SIZE = 1 << 20
+
+
+class Export(NamedTuple):
+    """A streamed export: the body chunks and how to label them"""
+
+    chunks: Iterator[bytes]
+    media_type: str
+    filename: str
+
+
+def iter_csv(db: Session, template_id: str, sheet_no: int, columns: Sequence[str]) -> Iterator[bytes]:
+    """One sheet as CSV: a header row of ``columns``, then a line per row in row order"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+
+    rows = db.query(Row.data).filter(
+        Row.template_id == template_id,
+        Row.sheet_no == sheet_no
+    ).order_by(Row.row_number).yield_per(EXPORT_BATCH_SIZE)
+    for count, (data,) in enumerate(rows, start=1):
+        writer.writerow([_csv_value(data.get(name)) for name in columns])
+        if count % EXPORT_BATCH_SIZE == 0:
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode()
+
+
+def iter_ndjson(db: Session, template_id: str, sheet_nos: Sequence[int]) -> Iterator[bytes]:
+    """Rows of the given sheets as JSON lines; the stored JSON text is passed through as-is"""
+    rows = db.query(Row.sheet_no, Row.row_number, cast(Row.data, Text)).filter(
+        Row.template_id == template_id,
+        Row.sheet_no.in_(sheet_nos)
+    ).order_by(Row.sheet_no, Row.row_number).yield_per(EXPORT_BATCH_SIZE)
+
+    chunk = []
+    for sheet_no, row_number, data in rows:
+        chunk.append(b'{"sheet_no":%d,"row_number":%d,"data":%s}\n' % (sheet_no, row_number, data.encode()))
+        if len(chunk) >= EXPORT_BATCH_SIZE:
+            yield b"".join(chunk)
+            chunk = []
+    if chunk:
+        yield b"".join(chunk)
+
+
+def _csv_value(value):
+    if value is None:
+        return ""
+    if value is True or value is False:
+        return "true" if value else "false"
+    if isinstance(value, (dict, list)):
+        return orjson.dumps(value).decode()
+    return value
+
+
+def _encode_sheet(database_url: str, template_id: str, sheet_no: int, columns: List[str]):
+    """Runs in a pool process: writes one sheet's deflated CSV to a temporary file.
+
+    Returns the file path with the CRC and sizes the ZIP member needs.
+    """
+    fd, path = tempfile.mkstemp(suffix=".csv.deflate")
+    try:
+        with os.fdopen(fd, "wb") as target, worker_session(database_url) as db:
+            member = DeflateWriter(target)
+            for chunk in iter_csv(db, template_id, sheet_no, columns):
+                member.write(chunk)
+            member.finish()
+    except BaseException:
+        os.remove(path)
+        raise
+    return path, member.crc, member.compressed_size, member.size
+
+
+def _read_blocks(path: str) -> Iterator[bytes]:
+    with open(path, "rb") as source:
+        while True:
+            block = source.read(READ_BLOCK_SIZE)
+            if not block:
+                break
+            yield block
+
+
+def _discard_output(future: Future):
+    """Removes the file of a sheet encoded for a download that went away"""
+    if not future.cancelled() and future.exception() is None:
+        with suppress(OSError):
+            os.remove(future.result()[0])
+
+
+def _abandon(futures):
+    """Cancels the sheets not started yet and discards what the others produce"""
+    for future in futures:
+        if not future.cancel():
+            future.add_done_callback(_discard_output)
+
+
+class ExportService:
+    """Streams a template's rows as CSV, NDJSON or a ZIP of per-sheet CSVs.
+
+    CSV and NDJSON are read from a server-side cursor straight into the
+    response. For ZIP every sheet is encoded and compressed by its own task
+    in the CPU pool, and each finished sheet is copied into the archive
+    while the others are still being encoded, so a multi-sheet export uses
+    as many cores as it has sheets (up to ``EXPORT_WORKERS``).
+    """
+
+    def export(
+        self, db: Session, template_id: str, export_format: str, sheet_no: Optional[int] = None
+    ) -> Export:
+        """Checks the request up front (404/400) and returns the lazily produced body"""
+        if sheet_no is None:
+            sheets = list(template_metadata.template(db, template_id).sheets.values())
+        else:
+            sheets = [template_metadata.sheet(db, template_id, sheet_no)]
+        basename = f"template_{template_id}" + (f"_sheet{sheet_no}" if sheet_no is not None else "")
+
+        if export_format == "csv":
+            if len(sheets) != 1:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="CSV export covers one sheet; pass sheet_no or use format=zip"
+                )
+            sheet = sheets[0]
+            columns = [column.name for column in sheet.columns]
+            return Export(
+                self._with_session(lambda session: iter_csv(session, template_id, sheet.sheet_no, columns)),
+                "text/csv; charset=utf-8",
+                f"{basename}.csv",
+            )
+
+        if export_format == "ndjson":
+            sheet_nos = [sheet.sheet_no for sheet in sheets]
+            return Export(
+                self._with_session(lambda session: iter_ndjson(session, template_id, sheet_nos)),
+                "application/x-ndjson",
+                f"{basename}.ndjson",
+            )
+
+        futures = self._encode_sheets(task_database_url(db), template_id, sheets)
+        return Export(
+            self._iter_zip(futures),
+            "application/zip",
+            f"{basename}.zip",
+        )
+
+    def _with_session(self, produce: Callable[[Session], Iterator[bytes]]) -> Iterator[bytes]:
+        # The body outlives the request, so it reads through its own session
+        db = SessionLocal()
+        try:
+            yield from produce(db)
+        finally:
+            db.close()
+
+    def _encode_sheets(
+        self, database_url: str, template_id: str, sheets: List[SheetMetadata]
+    ) -> Dict[Future, SheetMetadata]:
+        """Queues every sheet up front, so a full CPU pool is a 503 rather than a broken stream"""
+        futures = {}
+        try:
+            for sheet in sheets:
+                future = cpu_pool.submit(
+                    _encode_sheet, database_url, template_id, sheet.sheet_no,
+                    [column.name for column in sheet.columns]
+                )
+                futures[future] = sheet
+        except BaseException:
+            _abandon(futures)
+            raise
+        return futures
+
+    def _iter_zip(self, futures: Dict[Future, SheetMetadata]) -> Iterator[bytes]:
+        archive = ZipStream()
+        used_names = set()
+        try:
+            for future in as_completed(futures):
+                path, crc, compressed_size, size = future.result()
+                try:
+                    name = self._member_name(futures[future], used_names)
+                    yield from archive.member(name, crc, compressed_size, size, _read_blocks(path))
+                finally:
+                    os.remove(path)
+            yield archive.close()
+        finally:
+            _abandon(futures)
+
+    def _member_name(self, sheet: SheetMetadata, used_names: set) -> str:
+        name = sheet.sheet_name.replace("/", "_").replace("\\", "_") or f"sheet{sheet.sheet_no}"
+        if name in used_names:
+            name = f"{name} ({sheet.sheet_no})"
+        used_names.add(name)
+        return f"{name}.csv"
+
+
+export_service = ExportService()
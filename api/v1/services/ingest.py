@@ -0,0 +1,178 @@
+import time
+from typing import Any, AsyncIterator, Dict, List, Optional, Set
+
+from fastapi import HTTPException, UploadFile, status
+from sqlalchemy.orm import Session
+
+from api.core.events import row_event, row_events
+from api.core.executors import blocking_pool
+from api.db.bulk import bulk_insert_rows
+from api.utils.row_streams import ParsedRow, iter_csv_rows, iter_file_chunks, iter_xlsx_rows
+from api.v1.services.changes import change_service
+from api.v1.services.metadata import template_metadata
+from api.v1.services.row_allocator import row_number_allocator
+from api.v1.services.validation import validation_service
+from api.v1.services.version import version_service
+
+
+DEFAULT_CHUNK_SIZE = 5000
+MAX_REPORTED_ERRORS = 100
+
+
+class IngestService:
+    """Ingest service for row uploads that are too large to hold in memory"""
+
+    async def ingest(
+        self,
+        db: Session,
+        template_id: str,
+        sheet_no: int,
+        rows: AsyncIterator[ParsedRow],
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+    ) -> Dict[str, Any]:
+        """Writes parsed rows to a sheet, committing every ``chunk_size`` rows.
+
+        Rows that fail to parse or validate against the sheet's columns are
+        skipped and reported; everything committed before a failure stays
+        committed.
+        """
+        await blocking_pool.run(template_metadata.sheet, db, template_id, sheet_no)
+        return await self._write_chunks(db, template_id, sheet_no, rows, chunk_size)
+
+    async def import_file(
+        self,
+        db: Session,
+        template_id: str,
+        sheet_no: int,
+        file: UploadFile,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+    ) -> Dict[str, Any]:
+        """Imports an XLSX or CSV file into a sheet.
+
+        Header cells are matched to the sheet's columns by name (ignoring case
+        and surrounding spaces); unknown headers are reported and their cells
+        dropped. Workbooks are read from the sheet with the same name as the
+        template sheet when there is one, otherwise from the active sheet.
+        """
+        sheet = await blocking_pool.run(template_metadata.sheet, db, template_id, sheet_no)
+        columns = [column.name for column in sheet.columns]
+
+        filename = (file.filename or "").lower()
+        if filename.endswith(".csv") or file.content_type == "text/csv":
+            rows = iter_csv_rows(iter_file_chunks(file))
+        elif filename.endswith((".xlsx", ".xlsm")):
+            rows = iter_xlsx_rows(
+                file.file, sheet.sheet_name, {column.name: column.type for column in sheet.columns}
+            )
+        else:
+            raise HTTPException(
+                status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+                detail="Only .xlsx and .csv files can be imported"
+            )
+
+        unmapped = set()
+        result = await self._write_chunks(
+            db, template_id, sheet_no, _map_to_columns(rows, columns, unmapped), chunk_size
+        )
+        result["unmapped_headers"] = sorted(unmapped)
+        return result
+
+    async def _write_chunks(
+        self,
+        db: Session,
+        template_id: str,
+        sheet_no: int,
+        rows: AsyncIterator[ParsedRow],
+        chunk_size: int,
+    ) -> Dict[str, Any]:
+        started = time.perf_counter()
+        inserted = rejected = chunks = 0
+        errors: List[Dict[str, Any]] = []
+        pending: List[Dict[str, Any]] = []
+        lines: List[int] = []
+        validator = await blocking_pool.run(validation_service.get_validator, db, template_id, sheet_no)
+
+        def reject(line: int, error: str):
+            nonlocal rejected
+            rejected += 1
+            if len(errors) < MAX_REPORTED_ERRORS:
+                errors.append({"line": line, "error": error})
+
+        def flush():
+            nonlocal inserted, chunks
+            rows_to_write = pending
+            invalid = validator.validate(pending)
+            if invalid:
+                # One rejection per row, carrying every error the row has
+                by_row: Dict[int, List[str]] = {}
+                for error in invalid:
+                    by_row.setdefault(error.index, []).append(error.error)
+                for index, messages in by_row.items():
+                    reject(lines[index], "; ".join(messages))
+                rows_to_write = [data for index, data in enumerate(pending) if index not in by_row]
+
+            if rows_to_write:
+                row_number = row_number_allocator.reserve(db, template_id, sheet_no, len(rows_to_write))
+                change_seq = change_service.next_seq(db, template_id)
+                result = bulk_insert_rows(
+                    db, template_id, sheet_no, row_number, rows_to_write, change_seq=change_seq
+                )
+                version_service.bump_sheet(db, template_id, sheet_no)
+                row_events.publish(db, row_event(
+                    "created", template_id, sheet_no, change_seq,
+                    first_row_number=row_number, count=result.rows,
+                ))
+                db.commit()
+                inserted += result.rows
+                chunks += 1
+            pending.clear()
+            lines.clear()
+
+        async for parsed in rows:
+            if parsed.error:
+                reject(parsed.line, parsed.error)
+                continue
+            pending.append(parsed.data)
+            lines.append(parsed.line)
+            if len(pending) >= chunk_size:
+                # Validating and writing a chunk blocks; parsing resumes once it is committed
+                await blocking_pool.run(flush)
+        if pending:
+            await blocking_pool.run(flush)
+
+        elapsed = time.perf_counter() - started
+        return {
+            "rows_inserted": inserted,
+            "rows_rejected": rejected,
+            "chunks_committed": chunks,
+            "elapsed_seconds": round(elapsed, 4),
+            "rows_per_second": round(inserted / elapsed, 1) if elapsed > 0 else float(inserted),
+            "errors": errors,
+        }
+
+
+async def _map_to_columns(
+    rows: AsyncIterator[ParsedRow], columns, unmapped: Set[str]
+) -> AsyncIterator[ParsedRow]:
+    """Renames header keys to the matching column names"""
+    by_key = {name.strip().lower(): name for name in columns}
+    headers: Dict[str, Optional[str]] = {}
+
+    async for parsed in rows:
+        if parsed.error:
+            yield parsed
+            continue
+
+        data = {}
+        for key, value in parsed.data.items():
+            if key not in headers:
+                headers[key] = by_key.get(str(key).strip().lower())
+                if headers[key] is None:
+                    unmapped.add(key)
+            name = headers[key]
+            if name is not None:
+                data[name] = value
+        yield ParsedRow(parsed.line, data=data)
+
+
+ingest_service = IngestService()
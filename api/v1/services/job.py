@@ -0,0 +1,286 @@
+import datetime as dt
+import json
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from fastapi import HTTPException, status
+from fastapi.encoders import jsonable_encoder
+from pydantic import ValidationError
+from sqlalchemy import delete, desc, insert, or_, update
+from sqlalchemy.orm import Session
+from uuid_extensions import uuid7
+
+from api.core.base.services import Service
+from api.v1.models import Job, JobFile
+from api.v1.schemas import job, row
+
+
+FINISHED = ("succeeded", "failed", "cancelled")
+PARAM_SCHEMAS = {
+    "ingest_rows": row.RowData,
+    "export_template": job.ExportTemplateParams,
+    "column_index": job.ColumnIndexParams,
+}
+MAX_ATTEMPTS = 3
+# Job files are stored in parts of about this many bytes
+FILE_PART_SIZE = 1 << 20
+UPLOAD = "upload"
+RESULT = "result"
+
+
+def utcnow() -> dt.datetime:
+    return dt.datetime.now(dt.timezone.utc)
+
+
+class JobService(Service):
+    """Job service"""
+
+    def create(self, db: Session, schema: job.JobCreate) -> Job:
+        """Queue a new job.
+
+        The rows of an ``ingest_rows`` job are stored as the job's NDJSON
+        ``upload`` file, in the same transaction; the job only stores their
+        count, and the file is removed once the job finishes.
+        """
+        try:
+            params = PARAM_SCHEMAS[schema.kind](**schema.params)
+        except ValidationError as e:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail=jsonable_encoder(e.errors())
+            )
+
+        stored = schema.params
+        if schema.kind == "ingest_rows":
+            stored = job.IngestRowsParams(
+                template_id=params.template_id,
+                sheet_no=params.sheet_no,
+                rows=len(params.rows),
+            ).model_dump()
+
+        new_job = Job(id=str(uuid7()), kind=schema.kind, params=stored, status="queued", progress=0)
+        db.add(new_job)
+        if schema.kind == "ingest_rows":
+            db.flush()
+            self._store_upload(db, new_job.id, [batch.data for batch in params.rows])
+        db.commit()
+        db.refresh(new_job)
+        return new_job
+
+    def fetch(self, db: Session, job_id: str) -> Job:
+        """Fetch a job by id"""
+        found = db.query(Job).filter(Job.id == job_id).first()
+        if not found:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Job with ID {job_id} not found"
+            )
+        return found
+
+    def fetch_all(self, db: Session, limit: int = 50):
+        """Fetch the most recent jobs"""
+        return db.query(Job).order_by(desc(Job.created_at), desc(Job.id)).limit(limit).all()
+
+    def update(self, db: Session, job_id: str, **values) -> bool:
+        """Update a job's bookkeeping columns"""
+        updated = db.execute(update(Job).where(Job.id == job_id).values(**values)).rowcount
+        db.commit()
+        return updated == 1
+
+    def delete(self, db: Session, job_id: str):
+        """Delete a finished job together with its result file"""
+        found = self.fetch(db, job_id)
+        if found.status not in FINISHED:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Only finished jobs can be deleted"
+            )
+        self._remove_file(db, job_id)
+        db.delete(found)
+        db.commit()
+        return found
+
+    def cancel(self, db: Session, job_id: str) -> Job:
+        """Cancel a queued job, or ask a running one to stop"""
+        found = self.fetch(db, job_id)
+        cancelled = False
+        if found.status == "queued":
+            cancelled = db.execute(
+                update(Job)
+                .where(Job.id == job_id, Job.status == "queued")
+                .values(status="cancelled", finished_at=utcnow())
+            ).rowcount == 1
+            if cancelled:
+                self._remove_file(db, job_id, UPLOAD)
+        elif found.status == "running":
+            found.cancel_requested = True
+        db.commit()
+        db.refresh(found)
+        return found
+
+    # --------------------- WORKER SIDE ---------------------
+
+    def claim(self, db: Session, lease_seconds: int) -> Optional[Job]:
+        """Takes the oldest runnable job, or None.
+
+        Queued jobs and running jobs whose lease expired (their worker died)
+        are runnable. The claim is a conditional UPDATE, so when several
+        workers pick the same candidate only one of them gets it.
+        """
+        now = utcnow()
+        runnable = or_(
+            Job.status == "queued",
+            (Job.status == "running") & (Job.locked_until < now),
+        )
+        candidate = db.query(Job.id, Job.attempts).filter(runnable).order_by(
+            Job.created_at, Job.id
+        ).first()
+        if candidate is None:
+            db.rollback()
+            return None
+
+        if candidate.attempts >= MAX_ATTEMPTS:
+            self.finish(db, candidate.id, "failed", error="Worker lost the job too many times")
+            return None
+
+        claimed = db.execute(
+            update(Job)
+            .where(Job.id == candidate.id, runnable)
+            .values(
+                status="running",
+                attempts=Job.attempts + 1,
+                locked_until=now + dt.timedelta(seconds=lease_seconds),
+                started_at=now,
+            )
+        ).rowcount
+        db.commit()
+        return self.fetch(db, candidate.id) if claimed else None
+
+    def heartbeat(
+        self, db: Session, job_id: str, attempt: int, progress: Optional[float], lease_seconds: int
+    ) -> Optional[bool]:
+        """Extends the lease of claim ``attempt`` and records progress, if given.
+
+        Returns whether cancel was requested, or None when the claim has been
+        lost: the lease expired and another worker took the job over.
+        """
+        values: Dict[str, Any] = dict(locked_until=utcnow() + dt.timedelta(seconds=lease_seconds))
+        if progress is not None:
+            values["progress"] = max(0.0, min(progress, 1.0))
+        updated = db.execute(
+            update(Job).where(self._owned(job_id, attempt)).values(**values)
+        ).rowcount
+        db.commit()
+        if not updated:
+            return None
+        return bool(db.query(Job.cancel_requested).filter(Job.id == job_id).scalar())
+
+    def save_checkpoint(self, db: Session, job_id: str, attempt: int, checkpoint: Dict[str, Any]) -> bool:
+        """Stores the job's resume point in the caller's transaction.
+
+        Returns False, leaving the checkpoint alone, when claim ``attempt`` has
+        been lost; the caller should then roll back the work it describes.
+        """
+        return db.execute(
+            update(Job).where(self._owned(job_id, attempt)).values(checkpoint=checkpoint)
+        ).rowcount == 1
+
+    def finish(
+        self,
+        db: Session,
+        job_id: str,
+        final_status: str,
+        result: Optional[Dict[str, Any]] = None,
+        result_file: Optional[str] = None,
+        error: Optional[str] = None,
+        attempt: Optional[int] = None,
+    ) -> bool:
+        """Moves a job to a final status; with ``attempt``, only while that claim holds it.
+
+        ``result_file`` is a local file stored as the job's result in the same
+        transaction, so a claim that lost the job never publishes one.
+        """
+        values = dict(
+            status=final_status,
+            result=result,
+            result_location=RESULT if result_file else None,
+            error=error,
+            locked_until=None,
+            finished_at=utcnow(),
+        )
+        if final_status == "succeeded":
+            values["progress"] = 1.0
+        owned = Job.id == job_id if attempt is None else self._owned(job_id, attempt)
+        finished = db.execute(update(Job).where(owned).values(**values)).rowcount == 1
+        if finished:
+            self._remove_file(db, job_id, UPLOAD)
+            if result_file:
+                with open(result_file, "rb") as source:
+                    self._store_file(db, job_id, RESULT, iter(lambda: source.read(FILE_PART_SIZE), b""))
+        db.commit()
+        return finished
+
+    def read_file(self, db: Session, job_id: str, name: str) -> Iterator[bytes]:
+        """The parts of a job file in order, loading one part at a time"""
+        for part in range(self.count_parts(db, job_id, name)):
+            yield self.read_part(db, job_id, name, part)
+
+    def read_part(self, db: Session, job_id: str, name: str, part: int) -> Optional[bytes]:
+        return db.query(JobFile.data).filter(
+            JobFile.job_id == job_id, JobFile.name == name, JobFile.part == part
+        ).scalar()
+
+    def count_parts(self, db: Session, job_id: str, name: str) -> int:
+        return db.query(JobFile.id).filter(JobFile.job_id == job_id, JobFile.name == name).count()
+
+    def _store_upload(self, db: Session, job_id: str, rows: List[Dict[str, Any]]):
+        """Stores ``rows`` as the job's NDJSON upload; every part holds whole lines"""
+        def parts() -> Iterator[bytes]:
+            lines: List[bytes] = []
+            size = 0
+            for data in rows:
+                line = json.dumps(data, default=str).encode() + b"\n"
+                lines.append(line)
+                size += len(line)
+                if size >= FILE_PART_SIZE:
+                    yield b"".join(lines)
+                    lines, size = [], 0
+            if lines:
+                yield b"".join(lines)
+
+        self._store_file(db, job_id, UPLOAD, parts())
+
+    def _store_file(self, db: Session, job_id: str, name: str, parts: Iterable[bytes]):
+        # Core inserts, so the session does not keep every part in memory until commit
+        for part, data in enumerate(parts):
+            db.execute(insert(JobFile).values(job_id=job_id, name=name, part=part, data=data))
+
+    def _remove_file(self, db: Session, job_id: str, name: Optional[str] = None):
+        """Deletes one of the job's files, or all of them"""
+        condition = JobFile.job_id == job_id
+        if name is not None:
+            condition &= JobFile.name == name
+        db.execute(delete(JobFile).where(condition))
+
+    def _owned(self, job_id: str, attempt: int):
+        # Every claim bumps ``attempts``, so it identifies the claim holding the job
+        return (Job.id == job_id) & (Job.status == "running") & (Job.attempts == attempt)
+
+    def to_dict(self, found: Job) -> Dict[str, Any]:
+        """Job status without its (possibly large) params"""
+        return {
+            "id": found.id,
+            "kind": found.kind,
+            "status": found.status,
+            "progress": found.progress,
+            "result": found.result,
+            "result_location": f"/api/v1/jobs/{found.id}/result" if found.result_location else None,
+            "error": found.error,
+            "cancel_requested": found.cancel_requested,
+            "attempts": found.attempts,
+            "created_at": found.created_at,
+            "started_at": found.started_at,
+            "finished_at": found.finished_at,
+        }
+
+
+job_service = JobService()
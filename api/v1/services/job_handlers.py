@@ -0,0 +1,103 @@
+import json
+import os
+from itertools import islice
+from typing import Iterator
+
+from api.core.jobs import JobContext, JobResult, job_handler
+from api.db.database import SessionLocal
+from api.utils.generate_excel import write_template_workbook
+from api.utils.settings import settings
+from api.v1.schemas import job, row
+from api.v1.services.column_index import column_index_service
+from api.v1.services.job import UPLOAD, job_service
+from api.v1.services.row import row_service
+
+
+INGEST_CHUNK_SIZE = 5000
+
+
+@job_handler("ingest_rows")
+def ingest_rows(context: JobContext) -> JobResult:
+    """Inserts the uploaded rows in committed chunks, reporting progress per chunk.
+
+    The rows are read from the job's NDJSON upload a part at a time.
+    Cancelling stops after the current chunk; chunks already committed stay.
+    Each chunk commits together with the job's checkpoint, so a job claimed
+    again after its worker died resumes after the last committed chunk.
+    """
+    params = job.IngestRowsParams(**context.params)
+    checkpoint = context.checkpoint or {}
+    done = checkpoint.get("rows_done", 0)
+    inserted = checkpoint.get("rows_inserted", 0)
+
+    db = SessionLocal()
+    try:
+        lines = islice(_upload_lines(db, context.job_id), done, None)
+        while True:
+            chunk = row.RowData(
+                template_id=params.template_id,
+                sheet_no=params.sheet_no,
+                rows=[{"data": json.loads(line)} for line in islice(lines, INGEST_CHUNK_SIZE)],
+            )
+            if not chunk.rows:
+                break
+            try:
+                inserted += row_service.write_rows_batch(db, chunk).rows
+                done += len(chunk.rows)
+                context.save_checkpoint(db, {"rows_done": done, "rows_inserted": inserted})
+                db.commit()
+            except BaseException:
+                db.rollback()
+                raise
+            context.report(done / params.rows)
+    finally:
+        db.close()
+
+    return JobResult(rows_inserted=inserted)
+
+
+def _upload_lines(db, job_id: str) -> Iterator[bytes]:
+    # Parts hold whole lines
+    for part in job_service.read_file(db, job_id, UPLOAD):
+        yield from part.splitlines()
+
+
+@job_handler("export_template")
+def export_template(context: JobContext) -> JobResult:
+    """Renders the template workbook into a scratch file under EXPORT_DIR.
+
+    The lease is renewed while the workbook renders. The runner then stores
+    the file as the job's result, only while this claim still holds the job.
+    """
+    params = job.ExportTemplateParams(**context.params)
+
+    os.makedirs(settings.EXPORT_DIR, exist_ok=True)
+    # Per claim, so a worker that lost the job never writes into the new owner's file
+    location = os.path.join(settings.EXPORT_DIR, f"{context.job_id}.{context.attempt}.xlsx.tmp")
+
+    db = SessionLocal()
+    try:
+        with context.renewing_lease():
+            write_template_workbook(db, params.template_id, location)
+        context.report()
+    except BaseException:
+        if os.path.exists(location):
+            os.remove(location)
+        raise
+    finally:
+        db.close()
+
+    return JobResult(location=location, filename=f"template_{params.template_id}.xlsx")
+
+
+@job_handler("column_index")
+def column_index(context: JobContext) -> JobResult:
+    """Builds or drops a column's expression index without blocking row writes"""
+    params = job.ColumnIndexParams(**context.params)
+
+    db = SessionLocal()
+    try:
+        name = column_index_service.apply(db, params)
+    finally:
+        db.close()
+    return JobResult(index=name, indexed=params.indexed)
@@ -0,0 +1,139 @@
+import datetime as dt
+import threading
+from typing import Any, Dict, NamedTuple, Optional, Tuple
+
+from fastapi import HTTPException, status
+from sqlalchemy import and_
+from sqlalchemy.orm import Session
+
+from api.utils.cache import LRUCache
+from api.utils.row_validator import RowValidator
+from api.utils.settings import settings
+from api.v1.models import Column, Sheet, Template
+
+
+class ColumnMetadata(NamedTuple):
+    name: str
+    type: str
+    required: Optional[bool]
+
+
+class SheetMetadata(NamedTuple):
+    sheet_no: int
+    sheet_name: str
+    columns: Tuple[ColumnMetadata, ...]
+    validator: RowValidator
+
+
+class TemplateMetadata(NamedTuple):
+    template_id: str
+    version: int
+    created_at: Optional[dt.datetime]
+    updated_at: Optional[dt.datetime]
+    sheets: Dict[int, SheetMetadata]
+
+
+class TemplateMetadataService:
+    """Cached template -> sheets -> columns structure.
+
+    Loaded with one query and kept in a bounded LRU cache together with the
+    compiled row validator of every sheet. An entry is only served while its
+    version is still ``Template.version``, so writes that change sheets or
+    columns must bump it (``VersionService.bump_template``); checking costs a
+    primary-key lookup, and holds for writes made by other processes too.
+    ``invalidate`` drops an entry straight away.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self._cache = LRUCache(maxsize, ttl)
+        self._lock = threading.Lock()
+        # Bumped by every invalidation, so a load that raced one is not cached
+        self._generation = 0
+
+    def get(self, db: Session, template_id: str) -> Optional[TemplateMetadata]:
+        """The template's metadata, or None if it does not exist"""
+        metadata = self._cache.get(template_id)
+        if metadata is not None and metadata.version != self._version(db, template_id):
+            self._cache.pop(template_id)
+            metadata = None
+        if metadata is None:
+            generation = self._generation
+            metadata = self._load(db, template_id)
+            if metadata is not None:
+                with self._lock:
+                    if generation == self._generation:
+                        self._cache.set(template_id, metadata)
+        return metadata
+
+    def template(self, db: Session, template_id: str) -> TemplateMetadata:
+        """Like ``get`` but raises a 404 for a missing template"""
+        metadata = self.get(db, template_id)
+        if metadata is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Template with ID {template_id} not found"
+            )
+        return metadata
+
+    def sheet(self, db: Session, template_id: str, sheet_no: int) -> SheetMetadata:
+        """One sheet's metadata; 404 if the template or the sheet is missing"""
+        sheet = self.template(db, template_id).sheets.get(int(sheet_no))
+        if sheet is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Sheet with number {sheet_no} not found in template {template_id}"
+            )
+        return sheet
+
+    def invalidate(self, template_id: str):
+        """Drops a template whose sheets or columns changed"""
+        with self._lock:
+            self._generation += 1
+            self._cache.pop(template_id)
+
+    def stats(self) -> Dict[str, Any]:
+        return self._cache.stats()
+
+    def _version(self, db: Session, template_id: str) -> Optional[int]:
+        return db.query(Template.version).filter(Template.template_id == template_id).scalar()
+
+    def _load(self, db: Session, template_id: str) -> Optional[TemplateMetadata]:
+        records = db.query(
+            Template.version, Template.created_at, Template.updated_at,
+            Sheet.sheet_no, Sheet.sheet_name,
+            Column.name, Column.type, Column.required
+        ).outerjoin(
+            Sheet, Sheet.template_id == Template.template_id
+        ).outerjoin(
+            Column, and_(Column.template_id == Sheet.template_id, Column.sheet_no == Sheet.sheet_no)
+        ).filter(
+            Template.template_id == template_id
+        ).order_by(Sheet.sheet_no, Column.id).all()
+        if not records:
+            return None
+
+        names: Dict[int, str] = {}
+        columns: Dict[int, list] = {}
+        for _, _, _, sheet_no, sheet_name, name, column_type, required in records:
+            if sheet_no is None:
+                continue
+            sheet_no = int(sheet_no)
+            names[sheet_no] = sheet_name
+            sheet_columns = columns.setdefault(sheet_no, [])
+            if name is not None:
+                sheet_columns.append(ColumnMetadata(name, column_type, required))
+
+        sheets = {
+            sheet_no: SheetMetadata(
+                sheet_no, names[sheet_no], tuple(sheet_columns), RowValidator(sheet_columns)
+            )
+            for sheet_no, sheet_columns in columns.items()
+        }
+        version, created_at, updated_at = records[0][:3]
+        return TemplateMetadata(template_id, version, created_at, updated_at, sheets)
+
+
+template_metadata = TemplateMetadataService(
+    maxsize=settings.TEMPLATE_CACHE_SIZE,
+    ttl=settings.TEMPLATE_CACHE_TTL,
+)
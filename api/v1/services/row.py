@@ -1,111 +1,103 @@
 from typing import Any, Optional, List, Dict
 from fastapi import HTTPException, status
+from sqlalchemy import inspect
 from sqlalchemy.orm import Session
-from sqlalchemy import desc
 
 from api.core.base.services import Service
+from api.core.events import row_event, row_events
+from api.db.bulk import bulk_insert_rows
+from api.v1.services.changes import change_service
+from api.v1.services.row_allocator import row_number_allocator
+from api.v1.services.metadata import template_metadata
+from api.v1.services.validation import validation_service
+from api.v1.services.version import version_service
 from api.utils.db_validators import check_model_existence
-from api.v1.models import Row, Sheet, Template, Column
+from api.utils.json_paths import project_data
+from api.utils.pagination import decode_cursor, encode_cursor
+from api.v1.models import Row
 from api.v1.schemas import row
-from collections import defaultdict
+
+DEFAULT_PAGE_SIZE = 100
+
 
 class RowService(Service):
     """Row service"""
     
     def create(self, db: Session, schema: row.RowCreate):
         """Create a new row"""
-        # Check if template exists
-        template = db.query(Template).filter(Template.template_id == schema.template_id).first()
-        if not template:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"Template with ID {schema.template_id} not found"
-            )
-        
-        # Check if sheet exists
-        sheet = db.query(Sheet).filter(
-            Sheet.template_id == schema.template_id,
-            Sheet.sheet_no == schema.sheet_no
-        ).first()
-        
-        if not sheet:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"Sheet with number {schema.sheet_no} not found in template {schema.template_id}"
-            )
-        
-        # Get the last row number for this sheet
-        last_row = db.query(Row).filter(
-            Row.template_id == schema.template_id,
-            Row.sheet_no == schema.sheet_no
-        ).order_by(desc(Row.row_number)).first()
-        
-        # Set row number to last + 1, or 1 if no existing rows
-        row_number = 1 if not last_row else last_row.row_number + 1
+        validation_service.validate_or_raise(db, schema.template_id, schema.sheet_no, [schema.data])
+
+        # Validation already 404'd a missing template or sheet via the metadata cache
+        row_number = row_number_allocator.reserve(db, schema.template_id, schema.sheet_no)
         
         # Create new row
         new_row = Row(
             template_id=schema.template_id,
             sheet_no=schema.sheet_no,
             row_number=row_number,
-            data=schema.data
+            data=schema.data,
         )
         
         db.add(new_row)
+        db.flush()
+        new_row.change_seq = change_service.next_seq(db, schema.template_id)
+        db.flush()
+        version_service.bump_sheet(db, schema.template_id, schema.sheet_no)
+        row_events.publish(db, row_event(
+            "created", new_row.template_id, new_row.sheet_no, new_row.change_seq,
+            row_id=new_row.row_id, row_number=int(row_number),
+        ))
         db.commit()
         db.refresh(new_row)
         
         return new_row
 
     def create_rows_batch(self, db: Session, schema: row.RowData):
-        template = db.query(Template).filter(Template.template_id == schema.template_id).first()
-        if not template:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"Template with ID {schema.template_id} not found"
-            )
-        sheet = db.query(Sheet).filter(
-            Sheet.template_id == schema.template_id,
-            Sheet.sheet_no == schema.sheet_no
-        ).first()
-        
-        if not sheet:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"Sheet with number {schema.sheet_no} not found in template {schema.template_id}"
-            )
-        last_row = db.query(Row).filter(
-            Row.template_id == schema.template_id,
-            Row.sheet_no == schema.sheet_no
-        ).order_by(desc(Row.row_number)).first()
-        row_number = 1 if not last_row else last_row.row_number + 1
-        successful_rows_added = 0
-        for row in schema.rows:
-            if row:
-                new_row = Row(
-                    template_id=schema.template_id,
-                    sheet_no=schema.sheet_no,
-                    row_number=row_number,
-                    data= row.data
-                )
-                row_number += 1
-                successful_rows_added += 1
-                db.add(new_row)
+        """Create multiple rows in one bulk insert"""
+        result = self.write_rows_batch(db, schema)
         db.commit()
-        db.refresh(new_row)
-        return f"Rows Data of length {successful_rows_added} successfully added"
+        return result
+
+    def write_rows_batch(self, db: Session, schema: row.RowData):
+        """Like ``create_rows_batch``, but leaves the commit to the caller"""
+        rows = [row.data for row in schema.rows if row]
+        validation_service.validate_or_raise(db, schema.template_id, schema.sheet_no, rows)
+
+        # One round trip reserves the whole range
+        row_number = row_number_allocator.reserve(
+            db, schema.template_id, schema.sheet_no, len(rows)
+        )
+
+        # Taken last before the insert: the template's sequence lock is held from here to commit
+        change_seq = change_service.next_seq(db, schema.template_id)
+        # Rows go straight to the table (COPY on PostgreSQL, multi-VALUES
+        # inserts elsewhere); building ORM objects dominates at this size.
+        result = bulk_insert_rows(
+            db, schema.template_id, schema.sheet_no, row_number, rows, change_seq=change_seq
+        )
+        version_service.bump_sheet(db, schema.template_id, schema.sheet_no)
+        # One event for the whole batch; clients read the rows through the change feed
+        row_events.publish(db, row_event(
+            "created", schema.template_id, schema.sheet_no, change_seq,
+            first_row_number=row_number, count=result.rows,
+        ))
+        return result
 
     def update(self, db: Session, row_id: str, schema: row.RowUpdate):
         """Update a row"""
-        row = db.query(Row).filter(Row.row_id == row_id).first()
-        if not row:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"Row with ID {row_id} not found"
-            )
+        row = self.fetch(db, row_id)
         
-        # Update row data
+        validation_service.validate_or_raise(db, row.template_id, row.sheet_no, [schema.data])
+
+        # Update row data; the sheet is locked before the template, as writes that reserve row numbers do
         row.data = schema.data
+        version_service.bump_sheet(db, row.template_id, row.sheet_no)
+        row.change_seq = change_service.next_seq(db, row.template_id)
+        db.flush()
+        row_events.publish(db, row_event(
+            "updated", row.template_id, row.sheet_no, row.change_seq,
+            row_id=row.row_id, row_number=int(row.row_number),
+        ))
         
         db.commit()
         db.refresh(row)
@@ -114,77 +106,96 @@ class RowService(Service):
     
     def delete(self, db: Session, row_id: str):
         """Delete a row"""
-        row = db.query(Row).filter(Row.row_id == row_id).first()
-        if not row:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"Row with ID {row_id} not found"
-            )
+        row = self.fetch(db, row_id)
         
+        # Hard delete; the tombstone tells delta sync clients about it
+        version_service.bump_sheet(db, row.template_id, row.sheet_no)
+        change_seq = change_service.next_seq(db, row.template_id)
+        change_service.tombstone(db, row, change_seq)
         db.delete(row)
+        db.flush()
+        row_events.publish(db, row_event(
+            "deleted", row.template_id, row.sheet_no, change_seq,
+            row_id=row.row_id, row_number=int(row.row_number),
+        ))
         db.commit()
         
         return row
 
-
-    def fetch(self, db: Session, template_id: str):
-        """Fetch all rows for a template, structured by sheet name"""
-        sheets = db.query(Sheet).filter(Sheet.template_id == template_id).all()
-
-        # Map sheet_no to sheet_name
-        sheet_map = {sheet.sheet_no: sheet.sheet_name for sheet in sheets}
-
-        # Final result dictionary
-        result = {}
-
-        for sheet_no, sheet_name in sheet_map.items():
-            rows_by_sheet = db.query(Row).filter(
-                Row.template_id == template_id,
-                Row.sheet_no == sheet_no
-            ).all()
-
-            rows_data = [row.data for row in rows_by_sheet]
-
-            structured_data = defaultdict(list)
-
-            for entry in rows_data:
-                for key, value in entry.items():
-                    structured_data[key].append(value)
-
-            # Store under the sheet name
-            result[sheet_name] = dict(structured_data)
-
-        return result
-
-    def fetch_by_sheet(self, db: Session, template_id: str, sheet_no: int):
-        """Fetch all rows for a sheet"""
-        # Check if template exists
-        template = db.query(Template).filter(Template.template_id == template_id).first()
-        if not template:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"Template with ID {template_id} not found"
-            )
-        
-        # Check if sheet exists
-        sheet = db.query(Sheet).filter(
-            Sheet.template_id == template_id,
-            Sheet.sheet_no == sheet_no
-        ).first()
-        
-        if not sheet:
+    def fetch(self, db: Session, row_id: str) -> Row:
+        """Fetch a row by id"""
+        found = db.query(Row).filter(Row.row_id == row_id).first()
+        if not found:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"Sheet with number {sheet_no} not found in template {template_id}"
+                detail=f"Row with ID {row_id} not found"
             )
-        
-        # Fetch all rows for the sheet
-        rows = db.query(Row).filter(
+        return found
+
+    def fetch_by_sheet(
+        self,
+        db: Session,
+        template_id: str,
+        sheet_no: int,
+        from_row: Optional[int] = None,
+        after: Optional[str] = None,
+        limit: Optional[int] = None,
+        columns: Optional[List[str]] = None,
+    ):
+        """Fetch rows for a sheet.
+
+        Without paging arguments every row is returned. With ``from_row``,
+        ``after`` (a cursor from a previous page) or ``limit`` a single page is
+        returned as ``{"rows": [...], "next_cursor": ...}``; pages are keyset
+        reads on ``ix_rows_template_sheet_row``, so any window costs the same.
+        With ``columns`` each row's ``data`` only holds those keys, cut down in SQL.
+        """
+        # Check that the template and sheet exist (cached metadata, a version check when warm)
+        template_metadata.sheet(db, template_id, sheet_no)
+        
+        query = db.query(*self._projected(columns)) if columns else db.query(Row)
+        query = query.filter(
             Row.template_id == template_id,
             Row.sheet_no == sheet_no
-        ).order_by(Row.row_number).all()
-        
-        return rows
+        )
+
+        if from_row is None and after is None and limit is None:
+            # Fetch all rows for the sheet
+            rows = query.order_by(Row.row_number).all()
+            return [row._asdict() for row in rows] if columns else rows
+
+        result = self.page(query, from_row, after, limit)
+        if columns:
+            result["rows"] = [row._asdict() for row in result["rows"]]
+        return result
+
+    def _projected(self, columns: List[str]):
+        """Row's columns, in serialization order, with ``data`` projected to ``columns``"""
+        return [
+            project_data(Row.data, columns).label("data") if attr.key == "data" else getattr(Row, attr.key)
+            for attr in inspect(Row).mapper.column_attrs
+        ]
+
+    def page(
+        self,
+        query,
+        from_row: Optional[int] = None,
+        after: Optional[str] = None,
+        limit: Optional[int] = None,
+    ):
+        """One keyset page of a row query, ordered by row number"""
+        if after is not None:
+            query = query.filter(Row.row_number > decode_cursor(after, {"row_number": int})["row_number"])
+        elif from_row is not None:
+            query = query.filter(Row.row_number >= from_row)
+
+        limit = limit or DEFAULT_PAGE_SIZE
+        rows = query.order_by(Row.row_number).limit(limit + 1).all()
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor({"row_number": int(rows[-1].row_number)})
+        return {"rows": rows, "next_cursor": next_cursor}
     
     def fetch_all(self):
         return super().fetch_all()
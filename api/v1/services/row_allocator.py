@@ -0,0 +1,51 @@
+from fastapi import HTTPException, status
+from sqlalchemy import func, select, update
+from sqlalchemy.orm import Session
+
+from api.v1.models import Row, Sheet, Template
+
+
+class RowNumberAllocator:
+    """Hands out row numbers from a per-sheet counter on the sheet row"""
+
+    def reserve(self, db: Session, template_id: str, sheet_no: int, count: int = 1) -> int:
+        """Reserves ``count`` consecutive row numbers and returns the first.
+
+        A single ``UPDATE ... RETURNING`` on the sheet row, run in the
+        caller's transaction: the row lock it takes is held until the caller
+        commits, so concurrent writers always get disjoint ranges and a write
+        that rolls back hands its range back. Writers to one sheet therefore
+        commit one at a time; the template's change sequence
+        (``ChangeService.next_seq``) already orders them the same way.
+        """
+        current = func.coalesce(
+            Sheet.last_row_number,
+            select(func.coalesce(func.max(Row.row_number), 0)).where(
+                Row.template_id == template_id,
+                Row.sheet_no == sheet_no
+            ).scalar_subquery()
+        )
+        last_row_number = db.execute(
+            update(Sheet)
+            .where(Sheet.template_id == template_id, Sheet.sheet_no == sheet_no)
+            .values(last_row_number=current + count)
+            .returning(Sheet.last_row_number)
+        ).scalar()
+
+        if last_row_number is None:
+            self._raise_not_found(db, template_id, sheet_no)
+        return int(last_row_number) - count + 1
+
+    def _raise_not_found(self, db: Session, template_id: str, sheet_no: int):
+        if not db.query(Template.id).filter(Template.template_id == template_id).first():
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Template with ID {template_id} not found"
+            )
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Sheet with number {sheet_no} not found in template {template_id}"
+        )
+
+
+row_number_allocator = RowNumberAllocator()
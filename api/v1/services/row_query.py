@@ -0,0 +1,155 @@
+from typing import Any, Dict, List, Optional
+
+from fastapi import HTTPException, status
+from sqlalchemy import and_, distinct, func, or_
+from sqlalchemy.orm import Session
+
+from api.db.filters import COMPARISON_OPERATORS, filter_condition
+from api.utils.json_paths import cell, cell_kind, text_cell
+from api.utils.row_validator import COERCERS
+from api.v1.models import Row
+from api.v1.schemas import row
+from api.v1.services.metadata import template_metadata
+from api.v1.services.row import row_service
+
+
+TEXT_OPERATORS = ("$like", "$not_like")
+NUMERIC_AGGREGATES = ("sum", "avg")
+LIST_OPERATORS = ("$in", "$not_in")
+
+
+class RowQueryService:
+    """Filters a sheet's rows in SQL on values inside ``Row.data``"""
+
+    def query(self, db: Session, template_id: str, sheet_no: int, schema: row.RowQuery):
+        """One page of the sheet's rows matching ``schema.filter``.
+
+        Filters compile to JSON path expressions on the cell values (cast by
+        the column's type), so only matching rows are read and returned.
+        """
+        sheet = template_metadata.sheet(db, template_id, sheet_no)
+        column_types = {column.name: column.type for column in sheet.columns}
+
+        query = db.query(Row).filter(
+            Row.template_id == template_id,
+            Row.sheet_no == sheet_no,
+            *self.compile_filter(schema.filter, column_types)
+        )
+        return row_service.page(query, after=schema.after, limit=schema.limit)
+
+    def aggregate(self, db: Session, template_id: str, sheet_no: int, schema: row.RowAggregate):
+        """Aggregates of the sheet's cells computed in one SQL ``GROUP BY``.
+
+        Cells are cast by their column's type, so ``sum``/``avg`` need a
+        number column while ``min``/``max`` compare numbers numerically and
+        text (including ISO dates) lexically. Returns one entry per group, or
+        a single entry without ``group_by``.
+        """
+        sheet = template_metadata.sheet(db, template_id, sheet_no)
+        column_types = {column.name: column.type for column in sheet.columns}
+
+        labels = []
+        selected = []
+        for aggregate in schema.aggregates:
+            labels.append(f"{aggregate.op}_{aggregate.column}" if aggregate.column else aggregate.op)
+            selected.append(self._aggregate_expression(aggregate, column_types))
+
+        group = None
+        if schema.group_by is not None:
+            self._require_column(schema.group_by, column_types)
+            group = cell(schema.group_by, column_types[schema.group_by])
+            selected.insert(0, group)
+
+        query = db.query(*selected).filter(
+            Row.template_id == template_id,
+            Row.sheet_no == sheet_no,
+            *self.compile_filter(schema.filter, column_types)
+        )
+        if group is None:
+            return {"groups": [{"key": None, "values": dict(zip(labels, query.one()))}]}
+
+        query = query.group_by(group).order_by(group)
+        return {
+            "group_by": schema.group_by,
+            "groups": [
+                {"key": key, "values": dict(zip(labels, values))}
+                for key, *values in query
+            ]
+        }
+
+    def _aggregate_expression(self, aggregate: row.Aggregate, column_types: Dict[str, str]):
+        if aggregate.column is None:
+            if aggregate.op != "count":
+                self._invalid(f"{aggregate.op} needs a column")
+            return func.count()
+
+        self._require_column(aggregate.column, column_types)
+        column_type = column_types[aggregate.column]
+        if aggregate.op in NUMERIC_AGGREGATES and cell_kind(column_type) != "number":
+            self._invalid(f"{aggregate.op} needs a number column, {aggregate.column} is {column_type}")
+
+        value = cell(aggregate.column, column_type)
+        if aggregate.op == "count_distinct":
+            return func.count(distinct(value))
+        return getattr(func, aggregate.op)(value)
+
+    def _require_column(self, name: str, column_types: Dict[str, str]):
+        if name not in column_types:
+            self._invalid(f"Unknown column {name}")
+
+    def compile_filter(self, filters: Dict[str, Any], column_types: Dict[str, str]) -> List:
+        """SQL conditions (to be AND-ed) for a filter document; 400 if it is malformed"""
+        conditions = []
+        for key, value in filters.items():
+            if key in ("$and", "$or"):
+                if not isinstance(value, list) or not all(isinstance(part, dict) for part in value):
+                    self._invalid(f"{key} takes a list of filters")
+                parts = [and_(*self.compile_filter(part, column_types)) for part in value]
+                conditions.append(and_(*parts) if key == "$and" else or_(*parts))
+                continue
+            if key.startswith("$"):
+                self._invalid(f"Unsupported filter operator: {key}")
+
+            for operator, operand in self._operators(value):
+                if operator not in COMPARISON_OPERATORS:
+                    self._invalid(f"Unsupported filter operator: {operator}")
+                column_type = column_types.get(key)
+                if operator in TEXT_OPERATORS:
+                    expression, operand = text_cell(key), str(operand)
+                else:
+                    expression = cell(key, column_type)
+                    operand = self._coerce(key, column_type, operator, operand)
+                conditions.append(filter_condition(expression, operator, operand))
+        return conditions
+
+    def _operators(self, value: Any):
+        """``(operator, operand)`` pairs of one key's filter"""
+        if isinstance(value, dict):
+            return list(value.items())
+        if isinstance(value, list) and all(isinstance(condition, dict) for condition in value):
+            return [item for condition in value for item in condition.items()]
+        return [("$eq", value)]
+
+    def _coerce(self, key: str, column_type: Optional[str], operator: str, operand: Any):
+        """Converts filter values to the column's type, as validation does for cells"""
+        coerce = COERCERS.get((column_type or "").strip().lower(), str)
+
+        def convert(value):
+            if value is None:
+                return None
+            try:
+                return coerce(value)
+            except (TypeError, ValueError, OverflowError):
+                self._invalid(f"{key}: invalid filter value {value!r}")
+
+        if operator in LIST_OPERATORS:
+            if not isinstance(operand, list):
+                self._invalid(f"{key}: {operator} takes a list")
+            return [convert(value) for value in operand]
+        return convert(operand)
+
+    def _invalid(self, detail: str):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=detail)
+
+
+row_query_service = RowQueryService()
@@ -0,0 +1,58 @@
+from typing import Optional
+
+from fastapi import HTTPException, status
+from sqlalchemy.orm import Session
+
+from api.db.search import search_rows
+from api.utils.pagination import decode_cursor, encode_cursor
+from api.v1.services.metadata import template_metadata
+
+
+DEFAULT_PAGE_SIZE = 20
+
+
+class SearchService:
+    """Full-text search over the cells of a template's rows"""
+
+    def search(
+        self,
+        db: Session,
+        template_id: str,
+        query: str,
+        sheet_no: Optional[int] = None,
+        after: Optional[str] = None,
+        limit: Optional[int] = None,
+    ):
+        """One page of rows matching ``query``, best match first.
+
+        Each hit carries its rank and the matching cells with the matched
+        words wrapped in ``<mark>``. ``next_cursor`` continues the ranking.
+        """
+        if sheet_no is None:
+            template_metadata.template(db, template_id)
+        else:
+            template_metadata.sheet(db, template_id, sheet_no)
+        if not query.strip():
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Search query is empty"
+            )
+
+        offset = decode_cursor(after, {"offset": int})["offset"] if after else 0
+        limit = limit or DEFAULT_PAGE_SIZE
+        hits = search_rows(db, template_id, query, sheet_no, offset, limit + 1)
+
+        next_cursor = None
+        if len(hits) > limit:
+            hits = hits[:limit]
+            next_cursor = encode_cursor({"offset": offset + limit})
+        return {
+            "hits": [
+                {"row": hit.row, "rank": round(hit.rank, 6), "highlights": hit.highlights}
+                for hit in hits
+            ],
+            "next_cursor": next_cursor,
+        }
+
+
+search_service = SearchService()
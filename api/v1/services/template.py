@@ -1,7 +1,8 @@
 import random
 import string
-from typing import Any, Optional, Annotated
+from typing import Any, Iterator, List, Optional, Annotated
 import datetime as dt
+from collections import defaultdict
 from fastapi import status
 from fastapi import Depends, HTTPException
 from sqlalchemy.orm import Session
@@ -9,12 +10,21 @@ from sqlalchemy import desc
 
 
 from api.core.base.services import Service
-from api.db.database import get_db
+from api.db.database import get_db, SessionLocal
 
 from api.utils.db_validators import check_model_existence
+from api.utils.json_paths import project_data
+from api.utils.serializers import dumps
 from api.v1.models import Template, Sheet, Column, Row  
 from api.v1.schemas import template
+from api.v1.services.column_index import column_index_service
+from api.v1.services.metadata import SheetMetadata, TemplateMetadata, template_metadata
+from api.v1.services.version import version_service
 from uuid_extensions import uuid7
+
+STREAM_BATCH_SIZE = 1000
+
+
 class TemplateService(Service):
     """Template service"""
     def generate_template_id(self):
@@ -37,6 +47,7 @@ class TemplateService(Service):
                 sheet_no=single_sheet.sheet_no,
                 sheet_name=single_sheet.sheet_name,
                 template_id=template.template_id,
+                last_row_number=0,
             )
             db.add(sheet)
             for column in single_sheet.columns:
@@ -50,85 +61,209 @@ class TemplateService(Service):
                 db.add(column)
         db.commit()
         db.refresh(template)
+        template_metadata.invalidate(template_id)
+
+        # Indexes are built in the background; each column's flag is set once its index exists
+        for single_sheet in schema.sheets:
+            for column in single_sheet.columns:
+                if column.indexed:
+                    column_index_service.queue(db, template_id, single_sheet.sheet_no, column.name, True)
         return template_id
     def delete(self, db: Session, template_id: str):
         """Delete a template"""
         template = check_model_existence(db, Template, Template.template_id, template_id)
+        indexed = [(column.sheet_no, column.name) for column in template.columns if column.indexed]
         db.delete(template)
         db.commit()
+        template_metadata.invalidate(template_id)
+        for sheet_no, name in indexed:
+            column_index_service.queue(db, template_id, int(sheet_no), name, False)
         return template
 
-    def fetch(self, db: Session, template_id: str):
-        """Fetch template data with sheets, columns, and rows in the format expected by the frontend"""
-        # Check if template exists
-        template = db.query(Template).filter(Template.template_id == template_id).first()
-        if not template:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"Template with ID {template_id} not found"
-            )
-        
-        # Get all sheets for this template
-        sheets = db.query(Sheet).filter(Sheet.template_id == template_id).order_by(Sheet.sheet_no).all()
-        
-        # Format the response
-        formatted_sheets = []
-        
-        for sheet in sheets:
-            # Get columns for this sheet
-            columns = db.query(Column).filter(
-                Column.template_id == template_id,
-                Column.sheet_no == sheet.sheet_no
-            ).all()
-            
-            # Format columns
-            formatted_columns = []
-            for column in columns:
-                formatted_columns.append({
-                    "id": column.name.lower().replace(" ", "_"),  # Create an ID from the column name
-                    "name": column.name,
-                    "type": column.type,
-                    "required": column.required
-                })
-            
-            # Get rows for this sheet
-            rows = db.query(Row).filter(
-                Row.template_id == template_id,
-                Row.sheet_no == sheet.sheet_no
-            ).order_by(Row.row_number).all()
-            
-            # Format rows
-            formatted_rows = []
-            for row in rows:
-                formatted_rows.append(row.data)
-            
-            # Add sheet with its columns and rows
-            formatted_sheets.append({
+    def fetch(self, db: Session, template_id: str, columns: Optional[List[str]] = None):
+        """Fetch template data with sheets, columns, and rows in the format expected by the frontend.
+
+        The template, its sheets and columns come from the metadata cache, so
+        a warm fetch is a version check and one query over the template's
+        rows, grouped by sheet in memory from plain tuples rather than ORM
+        entities. With
+        ``columns`` only those columns are listed and row data is cut down to
+        them in SQL.
+        """
+        metadata = template_metadata.template(db, template_id)
+
+        rows_by_sheet = defaultdict(list)
+        for sheet_no, data in db.query(Row.sheet_no, self._data(columns)).filter(
+            Row.template_id == template_id
+        ).order_by(Row.sheet_no, Row.row_number):
+            rows_by_sheet[sheet_no].append(data)
+
+        formatted_sheets = [
+            {
                 "id": f"sheet{sheet.sheet_no}",
                 "name": sheet.sheet_name,
-                "columns": formatted_columns,
-                "rows": formatted_rows
-            })
+                "columns": self._format_columns(sheet, columns),
+                "rows": rows_by_sheet[sheet.sheet_no]
+            }
+            for sheet in metadata.sheets.values()
+        ]
         
         # Return the formatted data
         return {
-            "id": template.template_id,
-            "name": f"Template {template.template_id}",  # You might want to add a name field to your Template model
+            "id": template_id,
+            "name": f"Template {template_id}",  # You might want to add a name field to your Template model
             "sheets": formatted_sheets,
-            "createdAt": template.created_at.isoformat() if template.created_at else None,
-            "lastModified": template.updated_at.isoformat() if template.updated_at else None
+            "createdAt": metadata.created_at.isoformat() if metadata.created_at else None,
+            "lastModified": metadata.updated_at.isoformat() if metadata.updated_at else None
         }
+
+    def stream(
+        self, metadata: TemplateMetadata, message: str, columns: Optional[List[str]] = None
+    ) -> Iterator[bytes]:
+        """Produce ``fetch``'s document, wrapped in the success_response envelope, incrementally.
+
+        Takes the template's metadata (``template_metadata.template``), which
+        the caller resolves up front so a missing template is still a 404.
+        Rows come from a server-side cursor and are written in chunks of
+        STREAM_BATCH_SIZE, so memory stays flat however large the template is.
+        The generator uses its own session because it outlives the request's.
+        """
+        template_id = metadata.template_id
+        yield (
+            b'{"status":"success","status_code":200,"message":' + dumps(message)
+            + b',"data":{"id":' + dumps(template_id)
+            + b',"name":' + dumps(f"Template {template_id}")
+            + b',"sheets":['
+        )
+
+        db = SessionLocal()
+        try:
+            rows = iter(
+                db.query(Row.sheet_no, self._data(columns)).filter(
+                    Row.template_id == template_id
+                ).order_by(Row.sheet_no, Row.row_number).yield_per(STREAM_BATCH_SIZE)
+            )
+            pending = next(rows, None)
+
+            for index, sheet in enumerate(metadata.sheets.values()):
+                sheet_no = sheet.sheet_no
+                yield (
+                    (b"," if index else b"")
+                    + b'{"id":' + dumps(f"sheet{sheet_no}")
+                    + b',"name":' + dumps(sheet.sheet_name)
+                    + b',"columns":' + dumps(self._format_columns(sheet, columns))
+                    + b',"rows":['
+                )
+
+                chunk = []
+                separator = b""
+                while pending is not None and pending[0] == sheet_no:
+                    chunk.append(dumps(pending[1]))
+                    pending = next(rows, None)
+                    if len(chunk) >= STREAM_BATCH_SIZE:
+                        yield separator + b",".join(chunk)
+                        chunk = []
+                        separator = b","
+                if chunk:
+                    yield separator + b",".join(chunk)
+                yield b"]}"
+        finally:
+            db.close()
+
+        yield (
+            b'],"createdAt":' + dumps(metadata.created_at.isoformat() if metadata.created_at else None)
+            + b',"lastModified":' + dumps(metadata.updated_at.isoformat() if metadata.updated_at else None)
+            + b"}}"
+        )
+
+    def _data(self, columns: Optional[List[str]]):
+        """Row data, projected in SQL when only some columns are wanted"""
+        return project_data(Row.data, columns).label("data") if columns else Row.data
+
+    def _format_columns(self, sheet: SheetMetadata, columns: Optional[List[str]] = None):
+        """A sheet's columns in the frontend's format, limited to ``columns`` if given"""
+        return [
+            {
+                "id": column.name.lower().replace(" ", "_"),  # Create an ID from the column name
+                "name": column.name,
+                "type": column.type,
+                "required": column.required
+            }
+            for column in sheet.columns
+            if not columns or column.name in columns
+        ]
+
     def fetch_all(self, db: Session):
         """Fetch all templates"""
         return db.query(Template).order_by(desc(Template.created_at)).all()
 
     def update(self, db: Session, template_id: str, schema: template.TemplateUpdate):
-        """Update a template"""
-        template = check_model_existence(db, Template, Template.template_id, template_id)
-        for key, value in schema.dict(exclude_unset=True).items():
-            setattr(template, key, value)
+        """Update a template's sheets and columns.
+
+        Each sheet in ``schema`` is renamed, or added if the template does
+        not have it yet, and its columns are replaced by the given ones;
+        sheets left out are kept as they are. A column that stays indexed
+        and changes type gets its index rebuilt by a single job; one whose
+        ``indexed`` turns false only has its index dropped.
+        """
+        template = db.query(Template).filter(Template.template_id == template_id).first()
+        if not template:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Template with ID {template_id} not found"
+            )
+        sheets = {int(sheet.sheet_no): sheet for sheet in template.sheets}
+        existing = defaultdict(dict)
+        for column in template.columns:
+            existing[int(column.sheet_no)][column.name] = column
+
+        index_changes = []
+        for single_sheet in schema.sheets:
+            sheet = sheets.get(single_sheet.sheet_no)
+            if sheet is None:
+                db.add(Sheet(
+                    sheet_no=single_sheet.sheet_no,
+                    sheet_name=single_sheet.sheet_name,
+                    template_id=template_id,
+                    last_row_number=0,
+                ))
+            else:
+                sheet.sheet_name = single_sheet.sheet_name
+
+            old_columns = existing[single_sheet.sheet_no]
+            for new_column in single_sheet.columns:
+                column = old_columns.pop(new_column.name, None)
+                if column is None:
+                    db.add(Column(
+                        template_id=template_id,
+                        name=new_column.name,
+                        type=new_column.type,
+                        required=new_column.required,
+                        sheet_no=single_sheet.sheet_no,
+                    ))
+                    if new_column.indexed:
+                        index_changes.append((single_sheet.sheet_no, new_column.name, True, False))
+                    continue
+                if column.indexed and new_column.indexed and column.type != new_column.type:
+                    # One job, so the drop and the new build cannot interleave with each other
+                    index_changes.append((single_sheet.sheet_no, column.name, True, True))
+                elif column.indexed != new_column.indexed:
+                    index_changes.append((single_sheet.sheet_no, column.name, new_column.indexed, False))
+                column.type = new_column.type
+                column.required = new_column.required
+            for column in old_columns.values():
+                if column.indexed:
+                    index_changes.append((single_sheet.sheet_no, column.name, False, False))
+                db.delete(column)
+
+        db.flush()
+        version_service.bump_template(db, template_id)
         db.commit()
         db.refresh(template)
+        template_metadata.invalidate(template_id)
+
+        for sheet_no, name, indexed, rebuild in index_changes:
+            column_index_service.queue(db, template_id, sheet_no, name, indexed, rebuild)
         return template
 
 template_service = TemplateService()
\ No newline at end of file
@@ -0,0 +1,41 @@
+from typing import Any, Dict, List, Sequence
+
+from fastapi import HTTPException, status
+from sqlalchemy.orm import Session
+
+from api.utils.row_validator import RowError, RowValidator
+from api.v1.services.metadata import template_metadata
+
+
+MAX_REPORTED_ERRORS = 100
+
+
+class ValidationService:
+    """Validates rows against the RowValidator cached with each sheet's metadata"""
+
+    def get_validator(self, db: Session, template_id: str, sheet_no: int) -> RowValidator:
+        """Returns the sheet's validator; 404 if the template or sheet is missing"""
+        return template_metadata.sheet(db, template_id, sheet_no).validator
+
+    def validate(
+        self, db: Session, template_id: str, sheet_no: int, rows: Sequence[Dict[str, Any]]
+    ) -> List[RowError]:
+        """Coerces ``rows`` in place and returns the validation failures"""
+        return self.get_validator(db, template_id, sheet_no).validate(rows)
+
+    def validate_or_raise(
+        self, db: Session, template_id: str, sheet_no: int, rows: Sequence[Dict[str, Any]]
+    ):
+        """Like ``validate`` but rejects the whole batch with a 422"""
+        errors = self.validate(db, template_id, sheet_no, rows)
+        if errors:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail=[
+                    {"row": error.index, "column": error.column, "error": error.error}
+                    for error in errors[:MAX_REPORTED_ERRORS]
+                ]
+            )
+
+
+validation_service = ValidationService()
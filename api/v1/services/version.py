@@ -0,0 +1,58 @@
+from typing import Optional
+
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from api.utils.etag import make_etag
+from api.v1.models import Sheet, Template
+
+
+class VersionService:
+    """Version counters behind template and sheet ETags.
+
+    Bumps run inside the caller's transaction, so a new version becomes
+    visible together with the data it describes. Callers issue them as the
+    last statement before committing to keep the row lock short.
+    """
+
+    def bump_sheet(self, db: Session, template_id: str, sheet_no: int):
+        """Marks a sheet's rows as changed"""
+        db.execute(
+            update(Sheet)
+            .where(Sheet.template_id == template_id, Sheet.sheet_no == sheet_no)
+            .values(version=Sheet.version + 1)
+        )
+
+    def bump_template(self, db: Session, template_id: str):
+        """Marks a template's sheets or columns as changed"""
+        db.execute(
+            update(Template)
+            .where(Template.template_id == template_id)
+            .values(version=Template.version + 1)
+        )
+
+    def template_etag(self, db: Session, template_id: str, *variant) -> Optional[str]:
+        """ETag over the template version and all its sheet versions; None if missing"""
+        versions = db.query(Template.version, Sheet.sheet_no, Sheet.version).outerjoin(
+            Sheet, Sheet.template_id == Template.template_id
+        ).filter(Template.template_id == template_id).order_by(Sheet.sheet_no).all()
+        if not versions:
+            return None
+        return make_etag(
+            "template", template_id, versions[0][0],
+            *(f"{sheet_no}:{version}" for _, sheet_no, version in versions),
+            *variant
+        )
+
+    def sheet_etag(self, db: Session, template_id: str, sheet_no: int, *variant) -> Optional[str]:
+        """ETag over one sheet's version; None if missing"""
+        version = db.query(Sheet.version).filter(
+            Sheet.template_id == template_id,
+            Sheet.sheet_no == sheet_no
+        ).scalar()
+        if version is None:
+            return None
+        return make_etag("sheet", template_id, sheet_no, version, *variant)
+
+
+version_service = VersionService()
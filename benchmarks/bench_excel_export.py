@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+""" Peak memory and throughput of the Excel export
+
+Builds a SQLite database per row count, then exports each one in a fresh
+process and reports wall time and peak RSS. With the streaming export the
+peak stays flat while the row count grows.
+
+    python benchmarks/bench_excel_export.py --rows 10000 100000 500000 --columns 20
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Settings without defaults; the benchmark never touches the configured database
+for name, value in {
+    "SECRET_KEY": "bench", "ALGORITHM": "HS256", "ACCESS_TOKEN_EXPIRE_MINUTES": "30",
+    "JWT_REFRESH_EXPIRY": "7", "DB_HOST": "localhost", "DB_PORT": "5432", "DB_USER": "bench",
+    "DB_PASSWORD": "bench", "DB_NAME": "bench", "DB_TYPE": "sqlite", "DB_URL": "sqlite://",
+}.items():
+    os.environ.setdefault(name, value)
+
+from sqlalchemy import create_engine  # noqa: E402
+from sqlalchemy.orm import Session  # noqa: E402
+
+TEMPLATE_ID = "bench-template"
+
+
+def _peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return peak / (1 << 20) if sys.platform == "darwin" else peak / 1024
+
+
+def build(path: str, rows: int, columns: int):
+    from api.db.bulk import bulk_insert_rows
+    from api.v1.models import Column, Sheet, Template
+    from api.v1.models.associations import Base
+
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    names = [f"column_{index}" for index in range(columns)]
+    with Session(engine) as db:
+        db.add(Template(template_id=TEMPLATE_ID))
+        db.add(Sheet(template_id=TEMPLATE_ID, sheet_no=1, sheet_name="Data", last_row_number=rows))
+        for index, name in enumerate(names):
+            db.add(Column(
+                template_id=TEMPLATE_ID, sheet_no=1, name=name,
+                type="number" if index % 2 else "text", required=False,
+            ))
+        db.flush()
+        bulk_insert_rows(db, TEMPLATE_ID, 1, 1, (
+            {name: (number * index if index % 2 else f"value {number}-{index}")
+             for index, name in enumerate(names)}
+            for number in range(rows)
+        ))
+        db.commit()
+    engine.dispose()
+
+
+def export(path: str):
+    from api.utils.generate_excel import write_template_workbook
+
+    engine = create_engine(f"sqlite:///{path}")
+    baseline = _peak_rss_mb()
+    output = path + ".xlsx"
+    with Session(engine) as db:
+        started = time.perf_counter()
+        count = write_template_workbook(db, TEMPLATE_ID, output)
+        elapsed = time.perf_counter() - started
+    print(json.dumps({
+        "rows": count,
+        "seconds": round(elapsed, 2),
+        "peak_rss_mb": round(_peak_rss_mb(), 1),
+        "export_rss_mb": round(_peak_rss_mb() - baseline, 1),
+        "file_mb": round(os.path.getsize(output) / (1 << 20), 1),
+    }))
+    os.remove(output)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, nargs="+", default=[10000, 100000, 300000])
+    parser.add_argument("--columns", type=int, default=20)
+    parser.add_argument("--export", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.export:
+        export(args.export)
+        return
+
+    print(f"{'rows':>10} {'seconds':>9} {'rows/s':>10} {'peak RSS MB':>12} {'export RSS MB':>14} {'file MB':>8}")
+    with tempfile.TemporaryDirectory() as directory:
+        for rows in args.rows:
+            path = os.path.join(directory, f"bench_{rows}.db")
+            build(path, rows, args.columns)
+            # A fresh process per size, so every peak is the export's own
+            output = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--export", path],
+                check=True, capture_output=True, text=True,
+            ).stdout
+            result = json.loads(output.strip().splitlines()[-1])
+            rate = result["rows"] / result["seconds"] if result["seconds"] else 0
+            print(
+                f"{result['rows']:>10} {result['seconds']:>9} {rate:>10.0f} "
+                f"{result['peak_rss_mb']:>12} {result['export_rss_mb']:>14} {result['file_mb']:>8}"
+            )
+            os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+""" Latency of light requests while Excel exports run
+
+Serves the app with uvicorn on a SQLite database holding one large and one
+small template, then times a light request (the small template's change
+feed) on its own and again while clients keep downloading fresh versions of
+the large template's workbook. With the work on the event loop, the light
+request waits for whole exports; with it in the execution pools its p99
+stays close to the idle one.
+
+    python benchmarks/bench_export_latency.py --rows 50000 --exporters 2 --seconds 20
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Settings without defaults; the benchmark never touches the configured database
+for name, value in {
+    "SECRET_KEY": "bench", "ALGORITHM": "HS256", "ACCESS_TOKEN_EXPIRE_MINUTES": "30",
+    "JWT_REFRESH_EXPIRY": "7", "DB_HOST": "localhost", "DB_PORT": "5432", "DB_USER": "bench",
+    "DB_PASSWORD": "bench", "DB_NAME": "bench", "DB_TYPE": "sqlite", "DB_URL": "sqlite://",
+}.items():
+    os.environ.setdefault(name, value)
+
+import httpx  # noqa: E402
+from sqlalchemy import create_engine  # noqa: E402
+
+PORT = 8799
+BASE_URL = f"http://127.0.0.1:{PORT}/api/v1"
+
+
+def serve(path: str):
+    """Points the app at the benchmark database and starts it in a thread"""
+    import uvicorn
+
+    import api.db.database as database
+
+    engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+    with engine.connect() as connection:
+        # Otherwise a writer waiting behind an export's long read holds off
+        # every new reader, and the lock wait drowns what is being measured
+        connection.exec_driver_sql("PRAGMA journal_mode=WAL")
+    database.engine = engine
+    database.SessionLocal.configure(bind=engine)
+    database.db_session.remove()
+    import api.v1.models  # noqa: F401
+    database.Base.metadata.create_all(engine)
+
+    import main
+
+    server = uvicorn.Server(uvicorn.Config(main.app, port=PORT, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+
+def create_template(client: httpx.Client, columns: int) -> str:
+    response = client.post("/templates/create", json={"sheets": [{
+        "sheet_no": 1, "sheet_name": "Data",
+        "columns": [
+            {"name": f"column_{index}", "type": "text", "required": False, "sheet_no": 1}
+            for index in range(columns)
+        ],
+    }]})
+    response.raise_for_status()
+    return response.json()["data"]
+
+
+def seed(client: httpx.Client, template_id: str, rows: int, columns: int):
+    row = {f"column_{index}": f"value {index}" for index in range(columns)}
+    for start in range(0, rows, 5000):
+        client.post("/rows/batch", json={
+            "template_id": template_id, "sheet_no": 1,
+            "rows": [{"data": row}] * min(5000, rows - start),
+        }, timeout=120).raise_for_status()
+
+
+def sample(client: httpx.Client, url: str, seconds: float):
+    latencies = []
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        started = time.perf_counter()
+        client.get(url).raise_for_status()
+        latencies.append(time.perf_counter() - started)
+        time.sleep(0.02)
+    return latencies
+
+
+def export_loop(template_id: str, stopping: threading.Event, done: list):
+    with httpx.Client(base_url=BASE_URL, timeout=600) as client:
+        while not stopping.is_set():
+            # A write first, so every download renders a new version
+            client.post("/rows/create", json={
+                "template_id": template_id, "sheet_no": 1, "row_number": 0, "data": {},
+            }).raise_for_status()
+            client.get(f"/rows/excel_download/{template_id}").raise_for_status()
+            done.append(1)
+
+
+def report(label: str, latencies):
+    latencies = sorted(latencies)
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    print(
+        f"{label:<16} {len(latencies):>8} {statistics.median(latencies) * 1000:>9.1f} "
+        f"{p99 * 1000:>9.1f} {latencies[-1] * 1000:>9.1f}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=50000)
+    parser.add_argument("--columns", type=int, default=10)
+    parser.add_argument("--exporters", type=int, default=2)
+    parser.add_argument("--seconds", type=float, default=20.0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        os.environ["ARTIFACT_DIR"] = os.path.join(directory, "artifacts")
+        server = serve(os.path.join(directory, "bench.db"))
+        client = httpx.Client(base_url=BASE_URL, timeout=600)
+        large = create_template(client, args.columns)
+        seed(client, large, args.rows, args.columns)
+        small = create_template(client, 2)
+        url = f"/rows/changes/{small}"
+
+        print(f"{'':<16} {'requests':>8} {'p50 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+        report("idle", sample(client, url, args.seconds / 2))
+
+        stopping = threading.Event()
+        exports = []
+        exporters = [
+            threading.Thread(target=export_loop, args=(large, stopping, exports))
+            for _ in range(args.exporters)
+        ]
+        for exporter in exporters:
+            exporter.start()
+        time.sleep(1)
+        report("during exports", sample(client, url, args.seconds))
+        stopping.set()
+        for exporter in exporters:
+            exporter.join()
+        print(f"{len(exports)} workbooks of {args.rows} rows exported meanwhile")
+
+        client.close()
+        server.should_exit = True
+
+
+if __name__ == "__main__":
+    main()
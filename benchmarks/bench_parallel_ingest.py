@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+""" Throughput of parallel bulk ingests
+
+Runs ``--writers`` threads that each commit ``--batches`` batches of
+``--batch`` rows through ``RowService.create_rows_batch``, three times: all
+into one sheet, each into its own sheet of one template, and each into its
+own template. A batch holds its sheet's row-number counter and its
+template's change sequence from the insert to the commit, so the first two
+runs commit one batch at a time and only the last one can use more than one
+connection. On SQLite every run is serialized by the database's write lock;
+run it with ``--database-url`` against PostgreSQL to see the difference.
+
+    python benchmarks/bench_parallel_ingest.py --writers 4 --batches 10 --batch 5000
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Settings without defaults; the benchmark never touches the configured database
+for name, value in {
+    "SECRET_KEY": "bench", "ALGORITHM": "HS256", "ACCESS_TOKEN_EXPIRE_MINUTES": "30",
+    "JWT_REFRESH_EXPIRY": "7", "DB_HOST": "localhost", "DB_PORT": "5432", "DB_USER": "bench",
+    "DB_PASSWORD": "bench", "DB_NAME": "bench", "DB_TYPE": "sqlite", "DB_URL": "sqlite://",
+}.items():
+    os.environ.setdefault(name, value)
+
+from sqlalchemy import create_engine  # noqa: E402
+
+COLUMNS = 10
+
+
+def connect(database_url: str):
+    """Points the app's sessions at the benchmark database"""
+    import api.db.database as database
+
+    if database_url.startswith("sqlite"):
+        engine = create_engine(database_url, connect_args={"check_same_thread": False, "timeout": 600})
+        with engine.connect() as connection:
+            connection.exec_driver_sql("PRAGMA journal_mode=WAL")
+    else:
+        engine = create_engine(database_url, pool_size=32)
+    database.engine = engine
+    database.SessionLocal.configure(bind=engine)
+    import api.v1.models  # noqa: F401
+    database.Base.metadata.create_all(engine)
+    return database.SessionLocal
+
+
+def create_template(session_factory, sheets: int) -> str:
+    from api.v1.schemas.template import TemplateCreate
+    from api.v1.services.template import template_service
+
+    with session_factory() as db:
+        return template_service.create(db, TemplateCreate(sheets=[
+            {
+                "sheet_no": sheet_no, "sheet_name": f"Sheet {sheet_no}",
+                "columns": [
+                    {"name": f"column_{index}", "type": "text", "required": False, "sheet_no": sheet_no}
+                    for index in range(COLUMNS)
+                ],
+            }
+            for sheet_no in range(1, sheets + 1)
+        ]))
+
+
+def write(session_factory, template_id: str, sheet_no: int, batches: int, batch: int):
+    from api.v1.schemas.row import RowData
+    from api.v1.services.row import row_service
+
+    row = {f"column_{index}": f"value {index}" for index in range(COLUMNS)}
+    schema = RowData(template_id=template_id, sheet_no=sheet_no, rows=[{"data": row}] * batch)
+    with session_factory() as db:
+        for _ in range(batches):
+            row_service.create_rows_batch(db, schema)
+
+
+def run(label: str, session_factory, targets, batches: int, batch: int):
+    threads = [
+        threading.Thread(target=write, args=(session_factory, template_id, sheet_no, batches, batch))
+        for template_id, sheet_no in targets
+    ]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    rows = len(targets) * batches * batch
+    print(f"{label:<22} {rows:>9} {elapsed:>9.2f} {rows / elapsed:>11.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--batches", type=int, default=10)
+    parser.add_argument("--batch", type=int, default=5000)
+    parser.add_argument("--database-url", help="defaults to a temporary SQLite file")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        session_factory = connect(args.database_url or f"sqlite:///{os.path.join(directory, 'bench.db')}")
+
+        print(f"{'':<22} {'rows':>9} {'seconds':>9} {'rows/sec':>11}")
+        shared = create_template(session_factory, 1)
+        run("one sheet", session_factory, [(shared, 1)] * args.writers, args.batches, args.batch)
+        sheets = create_template(session_factory, args.writers)
+        run(
+            "one template", session_factory,
+            [(sheets, sheet_no) for sheet_no in range(1, args.writers + 1)], args.batches, args.batch
+        )
+        run(
+            "separate templates", session_factory,
+            [(create_template(session_factory, 1), 1) for _ in range(args.writers)], args.batches, args.batch
+        )
+
+
+if __name__ == "__main__":
+    main()
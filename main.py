@@ -2,6 +2,7 @@ import uvicorn
 from fastapi.staticfiles import StaticFiles
 import uvicorn, os
 from fastapi import  Request
+import asyncio
 from contextlib import asynccontextmanager
 from fastapi import FastAPI, status
 from fastapi.staticfiles import StaticFiles
@@ -9,17 +10,34 @@ from fastapi.middleware.cors import CORSMiddleware
 from starlette.requests import Request
 from starlette.middleware.sessions import SessionMiddleware  # required by google oauth
 
+from api.core.artifacts import export_artifacts
+from api.core.events import row_events
+from api.core.executors import shutdown_pools
+from api.core.jobs import job_runner
+from api.db.database import engine
+from api.db.search import check_search
 from api.utils.json_response import JsonResponseDict
 from api.v1.routes import api_version_one
+from api.v1.services.changes import prune_tombstones_periodically
 from api.utils.settings import settings
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Lifespan function"""
+    check_search(engine)
+    export_artifacts.collect_garbage()
+    row_events.start(engine)
+    job_runner.start()
+    pruning = asyncio.create_task(prune_tombstones_periodically(settings.TOMBSTONE_PRUNE_INTERVAL))
 
     yield
 
+    pruning.cancel()
+    job_runner.stop()
+    row_events.stop()
+    shutdown_pools()
+
 
 app = FastAPI(
     lifespan=lifespan,
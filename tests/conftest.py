@@ -0,0 +1,118 @@
+""" Test setup
+
+The app runs against a throwaway SQLite database created from the models, so
+the suite needs no database server. Settings without defaults get dummy
+values when the environment (or .env) does not provide them.
+"""
+import os
+import shutil
+import tempfile
+
+TEST_DIR = tempfile.mkdtemp(prefix="sheetflow-tests-")
+
+for name, value in {
+    "SECRET_KEY": "test", "ALGORITHM": "HS256", "ACCESS_TOKEN_EXPIRE_MINUTES": "30",
+    "JWT_REFRESH_EXPIRY": "7", "DB_HOST": "localhost", "DB_PORT": "5432", "DB_USER": "test",
+    "DB_PASSWORD": "test", "DB_NAME": "test", "DB_TYPE": "sqlite", "DB_URL": "sqlite://",
+}.items():
+    os.environ.setdefault(name, value)
+os.environ["EXPORT_DIR"] = os.path.join(TEST_DIR, "exports")
+os.environ["ARTIFACT_DIR"] = os.path.join(TEST_DIR, "artifacts")
+os.environ["EXPORT_WORKERS"] = "1"
+
+import pytest  # noqa: E402
+from sqlalchemy import create_engine  # noqa: E402
+
+import api.db.database as database  # noqa: E402
+
+engine = create_engine(
+    f"sqlite:///{os.path.join(TEST_DIR, 'test.db')}", connect_args={"check_same_thread": False}
+)
+with engine.connect() as connection:
+    # Request threads, job workers and export processes share the file
+    connection.exec_driver_sql("PRAGMA journal_mode=WAL")
+database.engine = engine
+database.SessionLocal.configure(bind=engine)
+database.db_session.remove()
+
+import api.v1.models  # noqa: E402,F401
+
+database.Base.metadata.create_all(engine)
+
+
+@pytest.fixture(scope="session")
+def client():
+    from fastapi.testclient import TestClient
+
+    import main
+
+    with TestClient(main.app) as test_client:
+        yield test_client
+
+
+@pytest.fixture(scope="session", autouse=True)
+def _remove_test_dir():
+    yield
+    engine.dispose()
+    shutil.rmtree(TEST_DIR, ignore_errors=True)
+
+
+@pytest.fixture
+def db():
+    session = database.SessionLocal()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def template_id(client):
+    """A new template: sheet 1 "People" (name text required, age number), sheet 2 "Other" (x text)"""
+    response = client.post("/api/v1/templates/create", json={"sheets": [
+        {"sheet_no": 1, "sheet_name": "People", "columns": [
+            {"name": "name", "type": "text", "required": True, "sheet_no": 1},
+            {"name": "age", "type": "number", "required": False, "sheet_no": 1},
+        ]},
+        {"sheet_no": 2, "sheet_name": "Other", "columns": [
+            {"name": "x", "type": "text", "required": False, "sheet_no": 2},
+        ]},
+    ]})
+    assert response.status_code == 201, response.text
+    return response.json()["data"]
+
+
+def add_rows(client, template_id, rows, sheet_no=1):
+    """Bulk inserts ``rows`` (cell data dicts) and returns the response data"""
+    response = client.post("/api/v1/rows/batch", json={
+        "template_id": template_id, "sheet_no": sheet_no, "rows": [{"data": data} for data in rows],
+    })
+    assert response.status_code == 201, response.text
+    return response.json()["data"]
+
+
+def running_job(db, kind, params, attempts=1, checkpoint=None):
+    """Adds a job already claimed (``attempts`` times) by a worker, out of the runner's reach"""
+    import datetime as dt
+
+    from api.v1.models import Job
+
+    claimed = Job(
+        kind=kind, params=params, status="running", progress=0, attempts=attempts,
+        cancel_requested=False, checkpoint=checkpoint,
+        locked_until=dt.datetime.now(dt.timezone.utc) + dt.timedelta(hours=1),
+    )
+    db.add(claimed)
+    db.commit()
+    return claimed.id
+
+
+def wait_for_job(client, job_id, timeout=30):
+    """Polls a job until it finishes and returns its status document"""
+    import time
+
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        found = client.get(f"/api/v1/jobs/{job_id}").json()["data"]
+        if found["status"] in ("succeeded", "failed", "cancelled"):
+            return found
+        time.sleep(0.05)
+    raise AssertionError(f"Job {job_id} did not finish")
@@ -0,0 +1,147 @@
+import asyncio
+import os
+import time
+
+import pytest
+from fastapi import HTTPException
+
+from api.core import artifacts
+from api.core.artifacts import ArtifactStore
+from api.v1.services.version import version_service
+from conftest import add_rows
+
+
+@pytest.fixture
+def store(tmp_path):
+    return ArtifactStore(str(tmp_path), max_bytes=1000, max_age=3600)
+
+
+def artifact(store, template_id, version, size=10, used_ago=0.0, file_format="xlsx"):
+    path = store.path(template_id, version, file_format)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as file:
+        file.write(b"x" * size)
+    used_at = time.time() - used_ago
+    os.utime(path, (used_at, used_at))
+    return path
+
+
+def build(store, template_id, version, content=b"built"):
+    async def write(path):
+        with open(path, "wb") as file:
+            file.write(content)
+
+    return asyncio.run(store.get_or_build(template_id, version, "xlsx", write))
+
+
+def current_version(db, template_id):
+    return version_service.template_etag(db, template_id).strip('"')
+
+
+def test_idle_and_least_recently_used_artifacts_are_evicted(store):
+    idle = artifact(store, "t", "idle", used_ago=7200)
+    oldest = artifact(store, "t", "a", size=600, used_ago=600)
+    newer = artifact(store, "u", "b", size=300, used_ago=300)
+    in_use = artifact(store, "v", "c", size=300, used_ago=1)
+
+    store.evict()
+
+    assert not os.path.exists(idle)
+    assert not os.path.exists(oldest)
+    assert os.path.exists(newer) and os.path.exists(in_use)
+    assert store.stats()["evictions"] == 2
+
+
+def test_artifacts_in_use_outlive_the_size_limit(store):
+    recent = [artifact(store, "t", f"v{number}", size=600, used_ago=1) for number in range(2)]
+
+    store.evict()
+
+    assert all(os.path.exists(path) for path in recent)
+
+
+def test_building_the_current_version_drops_older_ones(store, db, template_id):
+    old = artifact(store, template_id, "old", used_ago=600)
+    opening = artifact(store, template_id, "opening", used_ago=1)
+    other_format = artifact(store, template_id, "old", used_ago=600, file_format="csv")
+
+    path = build(store, template_id, current_version(db, template_id))
+
+    assert open(path, "rb").read() == b"built"
+    assert not os.path.exists(old)
+    # A response may be opening it
+    assert os.path.exists(opening)
+    assert os.path.exists(other_format)
+
+
+def test_stale_build_leaves_the_current_version(client, store, db, template_id):
+    stale = current_version(db, template_id)
+    add_rows(client, template_id, [{"name": "a"}])
+    current = artifact(store, template_id, current_version(db, template_id), used_ago=600)
+
+    build(store, template_id, stale)
+
+    assert os.path.exists(current)
+
+
+def test_second_request_is_a_hit(store, db, template_id):
+    version = current_version(db, template_id)
+    build(store, template_id, version, b"first")
+
+    assert open(build(store, template_id, version, b"second"), "rb").read() == b"first"
+    assert (store.hits, store.misses) == (1, 1)
+
+
+def test_settling_runs_in_the_blocking_pool_and_a_full_pool_skips_it(store, db, template_id, monkeypatch):
+    calls = []
+
+    async def full(fn, *args, request=None):
+        calls.append(fn)
+        raise HTTPException(status_code=503, detail="Server busy")
+
+    monkeypatch.setattr(artifacts.blocking_pool, "run", full)
+    older = artifact(store, template_id, "older", used_ago=600)
+
+    path = build(store, template_id, current_version(db, template_id))
+
+    assert calls == [store._settle]
+    assert open(path, "rb").read() == b"built"
+    assert os.path.exists(older)
+
+
+def test_collect_garbage_keeps_only_current_versions(store, db, template_id):
+    current = artifact(store, template_id, current_version(db, template_id))
+    old = artifact(store, template_id, "old")
+    deleted = artifact(store, "deleted-template", "v")
+    abandoned = f"{current}.1{artifacts.TEMP_SUFFIX}"
+    fresh_build = f"{current}.2{artifacts.TEMP_SUFFIX}"
+    for path, used_ago in ((abandoned, 7200), (fresh_build, 1)):
+        open(path, "wb").close()
+        os.utime(path, (time.time() - used_ago,) * 2)
+
+    store.collect_garbage()
+
+    assert os.path.exists(current) and os.path.exists(fresh_build)
+    assert not any(os.path.exists(path) for path in (old, deleted, abandoned))
+    assert not os.path.exists(os.path.dirname(deleted))
+
+
+def test_download_supports_ranges(client, template_id):
+    add_rows(client, template_id, [{"name": "a", "age": 1}])
+    url = f"/api/v1/rows/excel_download/{template_id}"
+
+    whole = client.get(url)
+    assert whole.status_code == 200
+    assert whole.headers["accept-ranges"] == "bytes"
+    etag = whole.headers["ETag"]
+
+    part = client.get(url, headers={"Range": "bytes=10-19", "If-Range": etag})
+    assert part.status_code == 206
+    assert part.content == whole.content[10:20]
+    assert part.headers["content-range"] == f"bytes 10-19/{len(whole.content)}"
+
+    # A changed template no longer matches If-Range: the whole new file comes back
+    add_rows(client, template_id, [{"name": "b"}])
+    changed = client.get(url, headers={"Range": "bytes=10-19", "If-Range": etag})
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != etag
@@ -0,0 +1,125 @@
+import asyncio
+import threading
+
+import pytest
+from fastapi import HTTPException
+
+from api.core import executors
+from api.core.executors import ClientDisconnected, ExecutionPool
+
+
+class FakeRequest:
+    """Just ``is_disconnected``, for ``ExecutionPool.run``"""
+
+    def __init__(self, disconnected: threading.Event):
+        self.disconnected = disconnected
+
+    async def is_disconnected(self):
+        return self.disconnected.is_set()
+
+
+@pytest.fixture
+def pool():
+    pool = ExecutionPool("test", workers=1, max_queue=1)
+    yield pool
+    pool.shutdown()
+
+
+@pytest.fixture(autouse=True)
+def fast_polling(monkeypatch):
+    monkeypatch.setattr(executors, "DISCONNECT_POLL_INTERVAL", 0.01)
+
+
+def test_full_queue_is_a_503(pool):
+    release = threading.Event()
+    running = pool.submit(release.wait)
+    queued = pool.submit(lambda: "queued")
+
+    with pytest.raises(HTTPException) as refused:
+        pool.submit(lambda: "refused")
+
+    assert refused.value.status_code == 503
+    assert refused.value.headers == {"Retry-After": str(executors.RETRY_AFTER_SECONDS)}
+    release.set()
+    assert running.result(5) is True and queued.result(5) == "queued"
+    stats = pool.stats()
+    assert (stats["rejected"], stats["completed"], stats["peak_queued"]) == (1, 2, 1)
+
+
+def test_queued_task_of_a_departed_client_is_cancelled(pool):
+    release, disconnected = threading.Event(), threading.Event()
+    ran = []
+
+    async def scenario():
+        pool.submit(release.wait)
+        waiting = asyncio.ensure_future(pool.run(ran.append, "ran", request=FakeRequest(disconnected)))
+        await asyncio.sleep(0.05)
+        disconnected.set()
+        try:
+            await waiting
+        finally:
+            release.set()
+
+    with pytest.raises(ClientDisconnected):
+        asyncio.run(scenario())
+    assert ran == []
+    assert pool.stats()["cancelled"] == 1
+
+
+def test_running_task_is_awaited_to_the_end(pool):
+    started, release, disconnected = threading.Event(), threading.Event(), threading.Event()
+
+    def task():
+        started.set()
+        release.wait(5)
+        return "finished"
+
+    async def scenario():
+        waiting = asyncio.ensure_future(pool.run(task, request=FakeRequest(disconnected)))
+        await asyncio.get_running_loop().run_in_executor(None, started.wait, 5)
+        disconnected.set()
+        await asyncio.sleep(0.05)
+        release.set()
+        return await waiting
+
+    assert asyncio.run(scenario()) == "finished"
+    assert pool.stats()["cancelled"] == 0
+
+
+def test_cancelled_await_drops_the_queued_task(pool):
+    release = threading.Event()
+    ran = []
+
+    async def scenario():
+        pool.submit(release.wait)
+        waiting = asyncio.ensure_future(pool.run(ran.append, "ran"))
+        await asyncio.sleep(0.01)
+        waiting.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiting
+        release.set()
+
+    asyncio.run(scenario())
+    assert ran == []
+    assert pool.stats()["cancelled"] == 1
+
+
+def test_job_routes_run_in_the_blocking_pool(client, monkeypatch):
+    pool = executors.blocking_pool
+    # No room for even one task: every submission is refused
+    monkeypatch.setattr(pool, "max_queue", -pool.workers)
+    refused = pool.stats()["rejected"]
+
+    for method, url in (
+        ("post", "/api/v1/jobs/missing/cancel"),
+        ("get", "/api/v1/jobs/missing"),
+        ("get", "/api/v1/jobs/missing/result"),
+        ("delete", "/api/v1/jobs/missing"),
+    ):
+        response = getattr(client, method)(url)
+        assert response.status_code == 503, url
+        assert response.headers["Retry-After"] == str(executors.RETRY_AFTER_SECONDS)
+    assert pool.stats()["rejected"] == refused + 4
+
+    monkeypatch.undo()
+    assert client.get("/api/v1/jobs/missing").status_code == 404
@@ -0,0 +1,200 @@
+import socket
+import socketserver
+import threading
+import time
+
+import pytest
+
+from api.core import cache
+from api.core.cache import CacheError, RedisCacheBackend
+
+
+class FakeRedis(socketserver.ThreadingTCPServer):
+    """Just enough of a Redis server for the backend: GET, SET [PX] [NX], DEL, AUTH, SELECT
+    and EVAL of the compare-and-delete script"""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, password=None):
+        super().__init__(("127.0.0.1", 0), FakeRedisHandler)
+        self.password = password
+        self.entries = {}
+        self.commands = []
+        self.lock = threading.Lock()
+
+    def execute(self, args):
+        command = args[0].upper()
+        self.commands.append([command, *args[1:]])
+        now = time.monotonic()
+        for key in [key for key, (_, expires) in self.entries.items() if expires is not None and expires <= now]:
+            del self.entries[key]
+
+        if command == b"GET":
+            entry = self.entries.get(args[1])
+            return b"$-1\r\n" if entry is None else b"$%d\r\n%s\r\n" % (len(entry[0]), entry[0])
+        if command == b"SET":
+            options = [arg.upper() for arg in args[3:]]
+            expires = None
+            if b"PX" in options:
+                expires = now + int(args[3 + options.index(b"PX") + 1]) / 1000
+            if b"NX" in options and args[1] in self.entries:
+                return b"$-1\r\n"
+            self.entries[args[1]] = (args[2], expires)
+            return b"+OK\r\n"
+        if command == b"DEL":
+            return b":%d\r\n" % (self.entries.pop(args[1], None) is not None)
+        if command == b"EVAL" and args[1] == cache._COMPARE_AND_DELETE:
+            entry = self.entries.get(args[3])
+            if entry is None or entry[0] != args[4]:
+                return b":0\r\n"
+            del self.entries[args[3]]
+            return b":1\r\n"
+        if command == b"AUTH":
+            return b"+OK\r\n" if args[1].decode() == self.password else b"-ERR invalid password\r\n"
+        if command == b"SELECT":
+            return b"+OK\r\n"
+        return b"-ERR unknown command\r\n"
+
+
+class FakeRedisHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            args = []
+            for _ in range(int(line[1:-2])):
+                length = int(self.rfile.readline()[1:-2])
+                args.append(self.rfile.read(length + 2)[:-2])
+            with self.server.lock:
+                reply = self.server.execute(args)
+            self.wfile.write(reply)
+
+
+@pytest.fixture
+def server():
+    fake = FakeRedis(password="secret")
+    threading.Thread(target=fake.serve_forever, daemon=True).start()
+    yield fake
+    fake.shutdown()
+    fake.server_close()
+
+
+@pytest.fixture
+def backend(server):
+    return RedisCacheBackend(60, f"redis://:secret@127.0.0.1:{server.server_address[1]}/2")
+
+
+def test_get_set_and_delete(backend, server):
+    assert backend.get("missing") is None
+
+    backend.set("key", b"value\r\nwith a line break")
+    assert backend.get("key") == b"value\r\nwith a line break"
+
+    backend.delete("key")
+    assert backend.get("key") is None
+    # One connection, authenticated and on the configured database
+    assert server.commands[:2] == [[b"AUTH", b"secret"], [b"SELECT", b"2"]]
+
+
+def test_set_expires_after_ttl(backend, server):
+    backend.set("short", b"value", ttl=0.05)
+    backend.set("default", b"value")
+
+    assert backend.get("short") == b"value"
+    time.sleep(0.1)
+    assert backend.get("short") is None
+    assert backend.get("default") == b"value"
+    assert [command[3:] for command in server.commands if command[0] == b"SET"] == [
+        [b"PX", b"50"], [b"PX", b"60000"],
+    ]
+
+
+def test_add_only_sets_missing_keys(backend):
+    assert backend.add("lock", b"1", ttl=0.05) is True
+    assert backend.add("lock", b"2") is False
+    assert backend.get("lock") == b"1"
+
+    time.sleep(0.1)
+    assert backend.add("lock", b"3") is True
+
+
+def test_concurrent_misses_build_once(backend, server, monkeypatch):
+    monkeypatch.setattr(cache, "LOCK_POLL_INTERVAL", 0.01)
+    monkeypatch.setattr(cache, "LOCK_MAX_WAITERS", 8)
+    builds = []
+
+    def build():
+        builds.append(threading.get_ident())
+        time.sleep(0.2)
+        return b"built"
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(backend.get_or_set("page", build)))
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == [b"built"] * 8
+    assert len(builds) == 1
+    assert len([command for command in server.commands if command[-1:] == [b"NX"]]) == 8
+    assert b"page:lock" not in server.entries
+
+
+def test_waiters_build_when_the_lock_owner_stalls(backend, monkeypatch):
+    monkeypatch.setattr(cache, "LOCK_WAIT", 0.1)
+    monkeypatch.setattr(cache, "LOCK_POLL_INTERVAL", 0.01)
+    backend.add("page:lock", b"1")
+
+    assert backend.get_or_set("page", lambda: b"built") == b"built"
+    assert backend.get("page") == b"built"
+    assert backend.get("page:lock") == b"1"
+
+
+def test_stalled_owner_leaves_a_newer_lock_alone(backend, server):
+    def build():
+        # The lock expired while building and another caller took it
+        backend.set("page:lock", b"newer")
+        return b"built"
+
+    assert backend.get_or_set("page", build) == b"built"
+    assert backend.get("page:lock") == b"newer"
+    assert [command[0] for command in server.commands if command[0] in (b"DEL", b"EVAL")] == [b"EVAL"]
+
+
+def test_waiters_beyond_the_limit_build_at_once(backend, monkeypatch):
+    monkeypatch.setattr(cache, "LOCK_MAX_WAITERS", 1)
+    monkeypatch.setattr(cache, "LOCK_WAIT", 1.0)
+    monkeypatch.setattr(cache, "LOCK_POLL_INTERVAL", 0.01)
+    backend.add("page:lock", b"owner")
+    waiter = threading.Thread(target=lambda: backend.get_or_set("page", lambda: b"waited"))
+    waiter.start()
+    time.sleep(0.1)
+
+    started = time.monotonic()
+    assert backend.get_or_set("page", lambda: b"built") == b"built"
+    assert time.monotonic() - started < 0.5
+    waiter.join()
+
+
+def test_wrong_password_is_a_cache_error(server):
+    backend = RedisCacheBackend(60, f"redis://:wrong@127.0.0.1:{server.server_address[1]}")
+
+    with pytest.raises(CacheError, match="invalid password"):
+        backend.get("key")
+
+
+def test_unreachable_server_falls_back_to_building():
+    with socket.socket() as unused:
+        unused.bind(("127.0.0.1", 0))
+        port = unused.getsockname()[1]
+    backend = RedisCacheBackend(60, f"redis://127.0.0.1:{port}")
+
+    assert backend.lookup("key") is None
+    assert backend.get_or_set("key", lambda: b"built") == b"built"
+    assert backend.stats()["errors"] == 3
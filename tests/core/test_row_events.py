@@ -0,0 +1,117 @@
+import asyncio
+
+import orjson
+
+from api.core.events import EventBus, row_event
+from api.v1.models import Template
+
+
+def event(kind, row_id, change_seq, template_id="t"):
+    return row_event(kind, template_id, 1, change_seq, row_id=row_id, row_number=1)
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def test_pending_events_for_one_row_are_merged():
+    async def scenario():
+        bus = EventBus(max_pending=10)
+        subscription = bus.subscribe("t")
+        bus.dispatch(event("created", "a", 1))
+        bus.dispatch(event("updated", "a", 2))
+        bus.dispatch(event("updated", "b", 3))
+        bus.dispatch(event("updated", "b", 4))
+        bus.dispatch(event("created", "c", 5))
+        bus.dispatch(event("deleted", "c", 6))
+        bus.dispatch(event("created", "a", 7, template_id="other"))
+        return await subscription.next_batch(1)
+
+    batch = run(scenario())
+
+    # Still new to the consumer, so "created", at the latest sequence
+    assert [(message["type"], message["row_id"], message["change_seq"]) for message in batch] == [
+        ("created", "a", 2), ("updated", "b", 4), ("deleted", "c", 6),
+    ]
+
+
+def test_bulk_events_are_kept_apart_by_sequence():
+    async def scenario():
+        bus = EventBus(max_pending=10)
+        subscription = bus.subscribe("t")
+        for change_seq in (1, 2):
+            bus.dispatch(row_event("created", "t", 1, change_seq, first_row_number=1, count=5))
+        return await subscription.next_batch(1)
+
+    assert [message["change_seq"] for message in run(scenario())] == [1, 2]
+
+
+def test_falling_behind_gets_one_resync():
+    async def scenario():
+        bus = EventBus(max_pending=3)
+        subscription = bus.subscribe("t")
+        for change_seq in range(5):
+            bus.dispatch(event("created", f"r{change_seq}", change_seq))
+        behind = await subscription.next_batch(1)
+        bus.dispatch(event("updated", "r9", 9))
+        caught_up = await subscription.next_batch(1)
+        return behind, caught_up
+
+    behind, caught_up = run(scenario())
+
+    assert behind == [{"type": "resync", "template_id": "t"}]
+    assert [message["row_id"] for message in caught_up] == ["r9"]
+
+
+def test_resync_all_reaches_every_subscriber():
+    async def scenario():
+        bus = EventBus()
+        subscriptions = [bus.subscribe("t"), bus.subscribe("u")]
+        bus.dispatch(event("created", "a", 1))
+        bus.resync_all()
+        return [await subscription.next_batch(1) for subscription in subscriptions]
+
+    assert [[message["type"] for message in batch] for batch in run(scenario())] == [["resync"], ["resync"]]
+
+
+def test_events_leave_the_session_on_commit_only(db, template_id, monkeypatch):
+    from api.core import events
+
+    bus = EventBus()
+    monkeypatch.setattr(events, "row_events", bus)
+
+    async def scenario():
+        subscription = bus.subscribe(template_id)
+        # Publishing follows the write, inside its transaction
+        for row_id, end in (("rolled back", db.rollback), ("committed", db.commit)):
+            db.query(Template).first()
+            bus.publish(db, row_event("created", template_id, 1, 1, row_id=row_id))
+            end()
+        return await subscription.next_batch(1)
+
+    assert [message["row_id"] for message in run(scenario())] == ["committed"]
+
+
+def test_stream_frames_and_keepalive():
+    async def scenario():
+        bus = EventBus(keepalive=0.01)
+        stream = bus.stream("t")
+        frames = [await stream.__anext__()]
+        bus.dispatch(event("updated", "a", 7))
+        frames.append(await stream.__anext__())
+        frames.append(await stream.__anext__())
+        await stream.aclose()
+        return frames, bus._subscriptions
+
+    frames, subscriptions = run(scenario())
+
+    assert frames[0] == b"retry: 3000\n\n"
+    header, data = frames[1].split(b"data: ")
+    assert header == b"event: updated\nid: 7\n"
+    assert orjson.loads(data)["row_id"] == "a"
+    assert frames[2] == b": keepalive\n\n"
+    assert not subscriptions
+
+
+def test_feed_of_a_missing_template_is_404(client):
+    assert client.get("/api/v1/rows/events/missing").status_code == 404
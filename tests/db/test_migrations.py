@@ -0,0 +1,61 @@
+import os
+
+import pytest
+from alembic import command
+from alembic.autogenerate import compare_metadata
+from alembic.config import Config
+from alembic.runtime.migration import MigrationContext
+from sqlalchemy import create_engine, inspect
+
+import api.v1.models  # noqa: F401
+from api.db.database import Base
+from api.db.search_ddl import include_object
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def migrated(tmp_path, monkeypatch):
+    """An alembic config for an empty SQLite database, and the database's engine"""
+    url = f"sqlite:///{tmp_path / 'migrated.db'}"
+    # alembic/env.py reads the URL from the environment on every command
+    monkeypatch.setenv("DB_URL", url)
+    config = Config()
+    config.set_main_option("script_location", os.path.join(ROOT, "alembic"))
+    engine = create_engine(url)
+    yield config, engine
+    engine.dispose()
+
+
+def test_upgrade_head_matches_the_models(migrated):
+    config, engine = migrated
+
+    command.upgrade(config, "head")
+
+    with engine.connect() as connection:
+        context = MigrationContext.configure(connection, opts={"include_object": include_object})
+        assert compare_metadata(context, Base.metadata) == []
+
+
+def test_downgrade_base_removes_everything(migrated):
+    config, engine = migrated
+    command.upgrade(config, "head")
+
+    command.downgrade(config, "base")
+
+    assert inspect(engine).get_table_names() == ["alembic_version"]
+    command.upgrade(config, "head")
+
+
+def test_stamped_baseline_gets_the_sheet_key(migrated):
+    config, engine = migrated
+    command.upgrade(config, "ace7bedfa0e0")
+    assert inspect(engine).get_unique_constraints("sheets") == []
+
+    command.upgrade(config, "head")
+
+    unique = inspect(engine).get_unique_constraints("sheets")
+    assert [constraint["column_names"] for constraint in unique] == [["template_id", "sheet_no"]]
+    assert {
+        key["referred_table"] for key in inspect(engine).get_foreign_keys("rows")
+    } == {"sheets", "templates"}
@@ -0,0 +1,34 @@
+import pytest
+
+from api.db.Storage import DB
+from api.v1.models import Template
+from conftest import add_rows
+
+
+@pytest.fixture
+def storage(db):
+    storage = DB()
+    storage.session = db
+    return storage
+
+
+def test_operators_filter_real_columns(storage, template_id):
+    query = storage._build_query(Template, template_id={"$in": [template_id, "other"]})
+    assert [found.template_id for found in query] == [template_id]
+
+    query = storage._build_query(Template, template_id=[{"$ne": template_id}, {"$like": template_id[:8]}])
+    assert template_id not in [found.template_id for found in query]
+
+
+@pytest.mark.parametrize("operator", ["$in", "$not_in"])
+def test_empty_list_is_still_refused(storage, operator):
+    with pytest.raises(ValueError, match=f"Unsupported filter operator: \\{operator}"):
+        storage._build_query(Template, template_id={operator: []})
+
+
+def test_row_query_empty_in_matches_nothing(client, template_id):
+    add_rows(client, template_id, [{"name": "a"}, {"name": "b"}])
+    url = f"/api/v1/rows/query/{template_id}/1"
+
+    assert client.post(url, json={"filter": {"name": {"$in": []}}}).json()["data"]["rows"] == []
+    assert len(client.post(url, json={"filter": {"name": {"$not_in": []}}}).json()["data"]["rows"]) == 2
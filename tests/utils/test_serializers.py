@@ -0,0 +1,63 @@
+import datetime as dt
+import json
+from decimal import Decimal
+
+from fastapi.encoders import jsonable_encoder
+from pydantic import BaseModel
+
+from api.utils.serializers import dumps, model_serializer
+from api.utils.success_response import success_response
+from api.v1.models import Column, Row
+
+
+class Point(BaseModel):
+    x: int
+    when: dt.date
+
+
+def test_decimals_follow_jsonable_encoder():
+    values = [Decimal("3"), Decimal("3.50"), Decimal("1E+2")]
+
+    assert json.loads(dumps(values)) == jsonable_encoder(values) == [3, 3.5, 100]
+
+
+def test_known_types():
+    content = {
+        "model": Point(x=1, when=dt.date(2024, 1, 2)),
+        "set": {1},
+        "at": dt.datetime(2024, 1, 2, 3, 4, 5),
+        1: "non-string key",
+    }
+
+    assert json.loads(dumps(content)) == {
+        "model": {"x": 1, "when": "2024-01-02"},
+        "set": [1],
+        "at": "2024-01-02T03:04:05",
+        "1": "non-string key",
+    }
+
+
+def test_orm_instances_serialize_their_loaded_columns():
+    column = Column(name="age", type="number", required=False, sheet_no=Decimal("1"))
+
+    assert json.loads(dumps(column)) == jsonable_encoder(column) == {
+        "name": "age", "type": "number", "required": False, "sheet_no": 1,
+    }
+    assert model_serializer(Column) is model_serializer(Column)
+
+
+def test_serializing_skips_unloaded_attributes():
+    row = Row(row_id="r", data={"a": 1})
+    del row.__dict__["data"]
+
+    # Neither a lazy load nor an error: the attribute is just left out
+    assert json.loads(dumps(row)) == {"row_id": "r"}
+
+
+def test_success_response_envelope():
+    response = success_response(200, "ok", data={"amount": Decimal("2.5")})
+
+    assert response.headers["content-type"] == "application/json"
+    assert json.loads(response.body) == {
+        "status": "success", "status_code": 200, "message": "ok", "data": {"amount": 2.5},
+    }
@@ -0,0 +1,83 @@
+import pytest
+
+from api.core.jobs import JobContext, JobLeaseLost
+from api.v1.models import Job, JobFile
+from api.v1.services import job_handlers
+from api.v1.services import job as job_module
+from api.v1.services.job import job_service
+
+from conftest import running_job, wait_for_job
+
+
+def sheet_names(client, template_id):
+    return [row["data"]["name"] for row in client.get(f"/api/v1/rows/sheet/{template_id}/1").json()["data"]]
+
+
+def test_ingest_job_keeps_the_rows_out_of_the_jobs_table(client, db, template_id):
+    response = client.post("/api/v1/jobs", json={"kind": "ingest_rows", "params": {
+        "template_id": template_id, "sheet_no": 1,
+        "rows": [{"data": {"name": f"n{i}", "age": str(i)}} for i in range(12)],
+    }})
+    assert response.status_code == 202, response.text
+    job_id = response.json()["data"]["id"]
+
+    params = db.query(Job.params).filter(Job.id == job_id).scalar()
+    assert set(params) == {"template_id", "sheet_no", "rows"}
+    assert params["rows"] == 12
+
+    found = wait_for_job(client, job_id)
+    assert found["status"] == "succeeded", found
+    assert found["result"] == {"rows_inserted": 12}
+    assert sheet_names(client, template_id) == [f"n{i}" for i in range(12)]
+    # The upload is gone once the job is done
+    db.expire_all()
+    assert not db.query(JobFile).filter(JobFile.job_id == job_id).count()
+
+
+class DiesAfter(JobContext):
+    """A claim whose worker dies after ``chunks`` committed chunks"""
+
+    def __init__(self, *args, chunks, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.chunks = chunks
+
+    def report(self, progress=None):
+        self.chunks -= 1
+        if self.chunks < 0:
+            raise SystemExit("worker died")
+
+
+def test_ingest_resumes_after_the_last_committed_chunk(client, db, template_id, monkeypatch):
+    monkeypatch.setattr(job_handlers, "INGEST_CHUNK_SIZE", 4)
+    monkeypatch.setattr(job_module, "FILE_PART_SIZE", 30)
+    params = {"template_id": template_id, "sheet_no": 1, "rows": 10}
+    job_id = running_job(db, "ingest_rows", params)
+    job_service._store_upload(db, job_id, [{"name": f"n{i}"} for i in range(10)])
+    db.commit()
+    # Several parts, so resuming skips lines across them
+    assert job_service.count_parts(db, job_id, "upload") > 2
+
+    with pytest.raises(SystemExit):
+        job_handlers.ingest_rows(DiesAfter(job_id, params, 300, attempt=1, chunks=1))
+    db.expire_all()
+    checkpoint = db.query(Job.checkpoint).filter(Job.id == job_id).scalar()
+    assert checkpoint == {"rows_done": 8, "rows_inserted": 8}
+
+    # Another worker claims the job once the lease runs out
+    job_service.update(db, job_id, attempts=2)
+    result = job_handlers.ingest_rows(JobContext(job_id, params, 300, attempt=2, checkpoint=checkpoint))
+
+    assert result == {"rows_inserted": 10}
+    assert sheet_names(client, template_id) == [f"n{i}" for i in range(10)]
+
+
+def test_stale_claim_rolls_its_chunk_back(client, db, template_id):
+    params = {"template_id": template_id, "sheet_no": 1, "rows": 2}
+    job_id = running_job(db, "ingest_rows", params, attempts=2)
+    job_service._store_upload(db, job_id, [{"name": "a"}, {"name": "b"}])
+    db.commit()
+
+    with pytest.raises(JobLeaseLost):
+        job_handlers.ingest_rows(JobContext(job_id, params, 300, attempt=1))
+
+    assert sheet_names(client, template_id) == []
@@ -0,0 +1,71 @@
+import os
+
+import pytest
+
+from api.core.jobs import JobCancelled, JobContext, JobLeaseLost
+from api.v1.models import Job, JobFile
+from api.v1.services import job_handlers
+from api.v1.services.job import job_service
+
+from conftest import running_job, wait_for_job
+
+
+def test_claim_fences_out_the_previous_one(db):
+    job_id = running_job(db, "export_template", {"template_id": "x"}, attempts=1)
+    stale = JobContext(job_id, {}, 300, attempt=1)
+    stale.report(0.5)
+
+    # The lease ran out and another worker claimed the job
+    job_service.update(db, job_id, attempts=2)
+
+    with pytest.raises(JobLeaseLost):
+        stale.report(0.6)
+    with pytest.raises(JobLeaseLost):
+        stale.save_checkpoint(db, {"step": 1})
+    db.rollback()
+    assert job_service.finish(db, job_id, "succeeded", attempt=1) is False
+
+    db.expire_all()
+    found = db.query(Job).filter(Job.id == job_id).one()
+    assert (found.status, found.progress, found.checkpoint) == ("running", 0.5, None)
+    assert job_service.finish(db, job_id, "succeeded", attempt=2) is True
+
+
+def test_cancel_reaches_the_running_handler(client, db):
+    job_id = running_job(db, "export_template", {"template_id": "x"})
+
+    response = client.post(f"/api/v1/jobs/{job_id}/cancel")
+
+    assert response.json()["data"]["cancel_requested"] is True
+    with pytest.raises(JobCancelled):
+        JobContext(job_id, {}, 300, attempt=1).report()
+
+
+def test_export_is_not_published_by_a_stale_claim(db, template_id):
+    params = {"template_id": template_id}
+    job_id = running_job(db, "export_template", params, attempts=2)
+
+    with pytest.raises(JobLeaseLost):
+        job_handlers.export_template(JobContext(job_id, params, 300, attempt=1))
+
+    assert not db.query(JobFile).filter(JobFile.job_id == job_id).count()
+    directory = os.environ["EXPORT_DIR"]
+    assert not [name for name in os.listdir(directory) if name.startswith(job_id)]
+
+
+def test_export_result_is_served_from_the_database(client, db, template_id):
+    response = client.post("/api/v1/jobs", json={"kind": "export_template", "params": {"template_id": template_id}})
+    job_id = response.json()["data"]["id"]
+
+    found = wait_for_job(client, job_id)
+    assert found["status"] == "succeeded", found
+    # Nothing is left on the worker's disk; any process can serve the result
+    directory = os.environ["EXPORT_DIR"]
+    assert not [name for name in os.listdir(directory) if name.startswith(job_id)]
+    download = client.get(f"/api/v1/jobs/{job_id}/result")
+    assert download.status_code == 200
+    assert download.content[:2] == b"PK"
+    assert f"template_{template_id}.xlsx" in download.headers["content-disposition"]
+
+    assert client.delete(f"/api/v1/jobs/{job_id}").status_code == 200
+    assert not db.query(JobFile).filter(JobFile.job_id == job_id).count()
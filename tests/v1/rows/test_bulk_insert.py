@@ -0,0 +1,71 @@
+from conftest import add_rows
+
+
+def test_batch_inserts_every_row_in_order(client, template_id):
+    result = add_rows(client, template_id, [{"name": f"n{i}", "age": i} for i in range(1500)])
+
+    assert result["rows_inserted"] == 1500
+    rows = client.get(f"/api/v1/rows/sheet/{template_id}/1").json()["data"]
+    assert [row["row_number"] for row in rows] == list(range(1, 1501))
+    assert rows[0]["data"] == {"name": "n0", "age": 0}
+    assert rows[-1]["data"] == {"name": "n1499", "age": 1499}
+
+
+def test_batches_continue_the_row_numbers(client, template_id):
+    add_rows(client, template_id, [{"name": "a"}, {"name": "b"}])
+    add_rows(client, template_id, [{"name": "c"}])
+    created = client.post("/api/v1/rows/create", json={
+        "template_id": template_id, "sheet_no": 1, "row_number": 0, "data": {"name": "d"},
+    })
+    assert created.status_code == 201
+
+    rows = client.get(f"/api/v1/rows/sheet/{template_id}/1").json()["data"]
+    assert [(row["row_number"], row["data"]["name"]) for row in rows] == [
+        (1, "a"), (2, "b"), (3, "c"), (4, "d")
+    ]
+
+
+def test_batch_coerces_cells_to_column_types(client, template_id):
+    add_rows(client, template_id, [{"name": "a", "age": "42"}, {"name": "b", "age": "1.5"}])
+
+    rows = client.get(f"/api/v1/rows/sheet/{template_id}/1").json()["data"]
+    assert [row["data"]["age"] for row in rows] == [42, 1.5]
+
+
+def test_invalid_batch_is_rejected_whole(client, template_id):
+    response = client.post("/api/v1/rows/batch", json={
+        "template_id": template_id, "sheet_no": 1,
+        "rows": [{"data": {"name": "ok"}}, {"data": {"age": "old"}}],
+    })
+
+    assert response.status_code == 422
+    assert {error["row"] for error in response.json()["detail"]} == {1}
+    assert not client.get(f"/api/v1/rows/sheet/{template_id}/1").json()["data"]
+
+
+def test_upload_counts_each_rejected_row_once(client, template_id):
+    body = b"name,age\n,abc\nok,4\n,5\n"
+    response = client.post(f"/api/v1/rows/upload/{template_id}/1?format=csv", content=body)
+
+    assert response.status_code == 201
+    data = response.json()["data"]
+    assert data["rows_inserted"] == 1
+    assert data["rows_rejected"] == 2
+    assert [error["line"] for error in data["errors"]] == [2, 4]
+    assert "name is required" in data["errors"][0]["error"]
+    assert "age" in data["errors"][0]["error"]
+
+
+def test_upload_keeps_quoted_fields_open_across_blocks(client, template_id, monkeypatch):
+    from api.utils import row_streams
+
+    monkeypatch.setattr(row_streams, "CSV_BLOCK_ROWS", 2)
+    body = b'name,age\n"multi\nline\nname",1\nplain,2\n"bad\n'
+    response = client.post(f"/api/v1/rows/upload/{template_id}/1?format=csv", content=body)
+
+    assert response.status_code == 201
+    data = response.json()["data"]
+    assert data["rows_inserted"] == 2
+    assert [error["line"] for error in data["errors"]] == [6]
+    rows = client.get(f"/api/v1/rows/sheet/{template_id}/1").json()["data"]
+    assert [row["data"]["name"] for row in rows] == ["multi\nline\nname", "plain"]
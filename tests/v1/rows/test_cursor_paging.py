@@ -0,0 +1,44 @@
+from conftest import add_rows
+
+
+def fetch_page(client, template_id, **params):
+    response = client.get(f"/api/v1/rows/sheet/{template_id}/1", params=params)
+    assert response.status_code == 200, response.text
+    return response.json()["data"]
+
+
+def test_cursor_walks_every_row_once(client, template_id):
+    add_rows(client, template_id, [{"name": f"n{i}"} for i in range(25)])
+
+    names, cursor = [], None
+    while True:
+        page = fetch_page(client, template_id, limit=10, **({"after": cursor} if cursor else {}))
+        names += [row["data"]["name"] for row in page["rows"]]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+
+    assert names == [f"n{i}" for i in range(25)]
+
+
+def test_from_row_starts_the_window(client, template_id):
+    add_rows(client, template_id, [{"name": f"n{i}"} for i in range(5)])
+
+    page = fetch_page(client, template_id, from_row=4, limit=10)
+
+    assert [row["row_number"] for row in page["rows"]] == [4, 5]
+    assert page["next_cursor"] is None
+
+
+def test_columns_project_row_data(client, template_id):
+    add_rows(client, template_id, [{"name": "a", "age": 1}])
+
+    page = fetch_page(client, template_id, limit=5, columns="age")
+
+    assert page["rows"][0]["data"] == {"age": 1}
+
+
+def test_malformed_cursor_is_a_400(client, template_id):
+    for cursor in ("not-a-cursor", "eyJyb3dfbnVtYmVyIjogIngifQ"):
+        response = client.get(f"/api/v1/rows/sheet/{template_id}/1", params={"after": cursor})
+        assert response.status_code == 400
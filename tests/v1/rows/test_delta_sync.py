@@ -0,0 +1,157 @@
+import datetime as dt
+
+from sqlalchemy import update
+
+from conftest import add_rows
+
+
+def changes(client, template_id, since=None, **params):
+    if since:
+        params["since"] = since
+    response = client.get(f"/api/v1/rows/changes/{template_id}", params=params)
+    assert response.status_code == 200, response.text
+    return response.json()["data"]
+
+
+def test_first_sync_returns_every_row(client, template_id):
+    add_rows(client, template_id, [{"name": "a"}, {"name": "b"}])
+
+    first = changes(client, template_id)
+
+    assert sorted(row["data"]["name"] for row in first["rows"]) == ["a", "b"]
+    assert first["deleted"] == []
+    assert first["has_more"] is False
+
+
+def test_cursor_returns_only_later_writes_and_deletes(client, template_id):
+    add_rows(client, template_id, [{"name": "a"}, {"name": "b"}])
+    cursor = changes(client, template_id)["next_cursor"]
+    rows = client.get(f"/api/v1/rows/sheet/{template_id}/1").json()["data"]
+
+    client.put(f"/api/v1/rows/{rows[0]['row_id']}", json={"data": {"name": "a2"}})
+    client.delete(f"/api/v1/rows/{rows[1]['row_id']}")
+    add_rows(client, template_id, [{"name": "c"}])
+    delta = changes(client, template_id, cursor)
+
+    assert [row["data"]["name"] for row in delta["rows"]] == ["a2", "c"]
+    assert [deleted["row_id"] for deleted in delta["deleted"]] == [rows[1]["row_id"]]
+    assert changes(client, template_id, delta["next_cursor"])["rows"] == []
+
+
+def test_paged_sync_sees_each_change_once(client, template_id):
+    add_rows(client, template_id, [{"name": f"n{i}"} for i in range(7)])
+
+    seen, cursor = [], None
+    while True:
+        page = changes(client, template_id, cursor, limit=3)
+        seen += [row["row_id"] for row in page["rows"]]
+        cursor = page["next_cursor"]
+        if not page["has_more"]:
+            break
+
+    assert len(seen) == len(set(seen)) == 7
+
+
+def test_cursor_older_than_pruned_deletes_is_gone(client, template_id):
+    from api.db.database import SessionLocal
+    from api.v1.models import RowTombstone
+    from api.v1.services.changes import change_service
+
+    add_rows(client, template_id, [{"name": "a"}, {"name": "b"}])
+    cursor = changes(client, template_id)["next_cursor"]
+    row_id = client.get(f"/api/v1/rows/sheet/{template_id}/1").json()["data"][0]["row_id"]
+    client.delete(f"/api/v1/rows/{row_id}")
+
+    db = SessionLocal()
+    try:
+        db.execute(
+            update(RowTombstone)
+            .where(RowTombstone.template_id == template_id)
+            .values(created_at=dt.datetime(2000, 1, 1, tzinfo=dt.timezone.utc))
+        )
+        db.commit()
+        assert change_service.prune_tombstones(db) >= 1
+    finally:
+        db.close()
+
+    response = client.get(f"/api/v1/rows/changes/{template_id}", params={"since": cursor})
+    assert response.status_code == 410
+    resync = changes(client, template_id)
+    assert [row["data"]["name"] for row in resync["rows"]] == ["b"]
+    assert changes(client, template_id, resync["next_cursor"])["rows"] == []
+
+
+def test_bulk_writes_insert_rows_with_their_sequence(client, db, template_id):
+    from sqlalchemy import event
+
+    from api.v1.models import Row, Template
+    from conftest import engine
+
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        add_rows(client, template_id, [{"name": "a"}, {"name": "b"}])
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+    # Stamped by the insert itself: no second pass over the new rows
+    assert not [statement for statement in statements if statement.lstrip().upper().startswith("UPDATE ROWS")]
+    change_seq = db.query(Template.change_seq).filter(Template.template_id == template_id).scalar()
+    assert {seq for (seq,) in db.query(Row.change_seq).filter(Row.template_id == template_id)} == {change_seq}
+
+
+def test_single_row_create_takes_the_next_sequence(client, db, template_id):
+    from api.v1.models import Row
+
+    created = [
+        client.post("/api/v1/rows/create", json={
+            "template_id": template_id, "sheet_no": 1, "row_number": 0, "data": {"name": name},
+        }).json()["data"]["row_id"]
+        for name in ("a", "b")
+    ]
+
+    seqs = [db.query(Row.change_seq).filter(Row.row_id == row_id).scalar() for row_id in created]
+    assert 0 < seqs[0] < seqs[1]
+    assert [row["row_id"] for row in changes(client, template_id)["rows"]] == created
+
+
+def test_writes_lock_the_sheet_before_the_template(client, template_id):
+    from sqlalchemy import event
+
+    from conftest import engine
+
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        table = statement.split()[1].lower() if statement.lstrip().upper().startswith("UPDATE") else None
+        if table in ("sheets", "templates"):
+            statements.append(table)
+
+    def locks(write):
+        statements.clear()
+        event.listen(engine, "before_cursor_execute", record)
+        try:
+            write()
+        finally:
+            event.remove(engine, "before_cursor_execute", record)
+        return statements[:2]
+
+    created = {}
+
+    def create():
+        response = client.post("/api/v1/rows/create", json={
+            "template_id": template_id, "sheet_no": 1, "row_number": 0, "data": {"name": "a"},
+        })
+        created.update(response.json()["data"])
+
+    # Writes that reserve row numbers and those that only bump the sheet's version take the same order
+    assert locks(create) == ["sheets", "templates"]
+    assert locks(lambda: add_rows(client, template_id, [{"name": "b"}])) == ["sheets", "templates"]
+    assert locks(lambda: client.put(
+        f"/api/v1/rows/{created['row_id']}", json={"data": {"name": "c"}}
+    )) == ["sheets", "templates"]
+    assert locks(lambda: client.delete(f"/api/v1/rows/{created['row_id']}")) == ["sheets", "templates"]
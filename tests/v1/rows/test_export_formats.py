@@ -0,0 +1,65 @@
+import csv
+import io
+import json
+import zipfile
+
+from openpyxl import load_workbook
+
+from conftest import add_rows
+
+
+def export(client, template_id, **params):
+    response = client.get(f"/api/v1/rows/export/{template_id}", params=params)
+    assert response.status_code == 200, response.text
+    return response
+
+
+def test_csv_has_a_header_and_a_line_per_row(client, template_id):
+    add_rows(client, template_id, [{"name": "a, with comma", "age": 1}, {"name": "b"}])
+
+    response = export(client, template_id, format="csv", sheet_no=1)
+
+    assert response.headers["content-type"].startswith("text/csv")
+    assert list(csv.reader(io.StringIO(response.text))) == [
+        ["name", "age"], ["a, with comma", "1"], ["b", ""]
+    ]
+
+
+def test_ndjson_has_a_line_per_row_of_every_sheet(client, template_id):
+    add_rows(client, template_id, [{"name": "a"}])
+    add_rows(client, template_id, [{"x": "y"}], sheet_no=2)
+
+    response = export(client, template_id, format="ndjson")
+
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [(line["sheet_no"], line["data"]) for line in lines] == [(1, {"name": "a"}), (2, {"x": "y"})]
+
+
+def test_zip_has_one_csv_per_sheet(client, template_id):
+    add_rows(client, template_id, [{"name": "a", "age": 2}])
+    add_rows(client, template_id, [{"x": "y"}], sheet_no=2)
+
+    response = export(client, template_id, format="zip")
+
+    with zipfile.ZipFile(io.BytesIO(response.content)) as archive:
+        assert archive.testzip() is None
+        sheets = {name: archive.read(name).decode() for name in archive.namelist()}
+    assert len(sheets) == 2
+    assert sorted(sheets.values()) == ["name,age\r\na,2\r\n", "x\r\ny\r\n"]
+
+
+def test_excel_download_matches_the_rows(client, template_id, tmp_path):
+    add_rows(client, template_id, [{"name": "a", "age": 3}, {"name": "b"}])
+
+    response = client.get(f"/api/v1/rows/excel_download/{template_id}")
+    assert response.status_code == 200, response.text
+    path = tmp_path / "export.xlsx"
+    path.write_bytes(response.content)
+
+    workbook = load_workbook(path, read_only=True)
+    people = [list(row) for row in workbook["People"].iter_rows(values_only=True)]
+    assert people[0] == ["name", "age"]
+    assert people[1:] == [["a", 3], ["b", None]]
+    assert client.get(
+        f"/api/v1/rows/excel_download/{template_id}", headers={"If-None-Match": response.headers["ETag"]}
+    ).status_code == 304
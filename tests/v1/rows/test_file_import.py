@@ -0,0 +1,71 @@
+import datetime as dt
+import io
+
+import pytest
+from openpyxl import Workbook
+
+
+@pytest.fixture
+def dated_template_id(client):
+    """A template whose sheet 1 "Visits" has name (text), day (date), at (datetime) and note (text)"""
+    response = client.post("/api/v1/templates/create", json={"sheets": [
+        {"sheet_no": 1, "sheet_name": "Visits", "columns": [
+            {"name": "name", "type": "text", "required": True, "sheet_no": 1},
+            {"name": "day", "type": "date", "required": False, "sheet_no": 1},
+            {"name": "at", "type": "datetime", "required": False, "sheet_no": 1},
+            {"name": "note", "type": "text", "required": False, "sheet_no": 1},
+        ]},
+    ]})
+    assert response.status_code == 201, response.text
+    return response.json()["data"]
+
+
+def workbook(*rows, title="Visits"):
+    book = Workbook()
+    sheet = book.active
+    sheet.title = title
+    for values in rows:
+        sheet.append(values)
+    stream = io.BytesIO()
+    book.save(stream)
+    return stream.getvalue()
+
+
+def import_file(client, template_id, name, content):
+    response = client.post(f"/api/v1/rows/import/{template_id}/1", files={"file": (name, content)})
+    assert response.status_code == 201, response.text
+    return response.json()["data"]
+
+
+def sheet_data(client, template_id):
+    return [row["data"] for row in client.get(f"/api/v1/rows/sheet/{template_id}/1").json()["data"]]
+
+
+def test_xlsx_headers_map_to_columns(client, dated_template_id):
+    result = import_file(client, dated_template_id, "visits.xlsx", workbook(
+        [" Name ", "NOTE", "unknown"],
+        ["a", "first", 1],
+        [None, None, None],
+        ["b", None, 2],
+    ))
+
+    assert result["rows_inserted"] == 2
+    assert result["unmapped_headers"] == ["unknown"]
+    assert sheet_data(client, dated_template_id) == [{"name": "a", "note": "first"}, {"name": "b"}]
+
+
+def test_xlsx_dates_match_csv(client, dated_template_id):
+    import_file(client, dated_template_id, "visits.xlsx", workbook(
+        ["name", "Day", "at", "note"],
+        ["xlsx", dt.datetime(2020, 1, 2), dt.datetime(2020, 1, 2, 3, 4, 5), dt.datetime(2021, 5, 6)],
+    ))
+    import_file(
+        client, dated_template_id, "visits.csv",
+        b"name,day,at,note\ncsv,2020-01-02,2020-01-02T03:04:05,2021-05-06T00:00:00\n",
+    )
+
+    xlsx, csv = sheet_data(client, dated_template_id)
+    # Excel keeps every date as a datetime; a date column only keeps the day
+    assert xlsx["day"] == csv["day"] == "2020-01-02"
+    assert xlsx["at"] == csv["at"] == "2020-01-02T03:04:05"
+    assert xlsx["note"] == csv["note"] == "2021-05-06T00:00:00"
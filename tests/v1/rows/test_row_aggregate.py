@@ -0,0 +1,80 @@
+import pytest
+
+from conftest import add_rows
+
+
+def aggregate(client, template_id, body, sheet_no=1, expected=200):
+    response = client.post(f"/api/v1/rows/aggregate/{template_id}/{sheet_no}", json=body)
+    assert response.status_code == expected, response.text
+    return response.json()
+
+
+def test_groups_are_computed_per_key(client, template_id):
+    add_rows(client, template_id, [
+        {"name": "ann", "age": 30},
+        {"name": "ann", "age": 10},
+        {"name": "bob", "age": 5},
+        {"name": "cid"},
+    ])
+
+    result = aggregate(client, template_id, {
+        "aggregates": [{"op": "count"}, {"op": "sum", "column": "age"}, {"op": "count", "column": "age"}],
+        "group_by": "name",
+    })["data"]
+
+    assert result["group_by"] == "name"
+    assert result["groups"] == [
+        {"key": "ann", "values": {"count": 2, "sum_age": 40, "count_age": 2}},
+        {"key": "bob", "values": {"count": 1, "sum_age": 5, "count_age": 1}},
+        {"key": "cid", "values": {"count": 1, "sum_age": None, "count_age": 0}},
+    ]
+
+
+def test_without_group_by_and_with_a_filter(client, template_id):
+    add_rows(client, template_id, [{"name": "a", "age": 1}, {"name": "a", "age": 2}, {"name": "b", "age": 6}])
+
+    result = aggregate(client, template_id, {
+        "aggregates": [{"op": "avg", "column": "age"}, {"op": "count_distinct", "column": "name"}],
+        "filter": {"age": {"$gte": 2}},
+    })["data"]
+
+    assert result["groups"] == [{"key": None, "values": {"avg_age": 4, "count_distinct_name": 2}}]
+
+
+def test_number_cells_are_cast_before_aggregating(client, template_id):
+    # Lexically "9" > "10" and "9.5" > "10"; cast as numbers they are not
+    add_rows(client, template_id, [{"name": "a", "age": 9}, {"name": "b", "age": "10"}, {"name": "c", "age": 9.5}])
+
+    values = aggregate(client, template_id, {"aggregates": [
+        {"op": "min", "column": "age"}, {"op": "max", "column": "age"}, {"op": "sum", "column": "age"},
+    ]})["data"]["groups"][0]["values"]
+
+    assert values == {"min_age": 9, "max_age": 10, "sum_age": 28.5}
+
+
+def test_text_cells_compare_lexically(client, template_id):
+    add_rows(client, template_id, [{"name": "b"}, {"name": "ab"}, {"name": "c"}])
+
+    values = aggregate(client, template_id, {"aggregates": [
+        {"op": "min", "column": "name"}, {"op": "max", "column": "name"},
+    ]})["data"]["groups"][0]["values"]
+
+    assert values == {"min_name": "ab", "max_name": "c"}
+
+
+@pytest.mark.parametrize("body, detail", [
+    ({"aggregates": [{"op": "sum", "column": "missing"}]}, "Unknown column missing"),
+    ({"aggregates": [{"op": "count"}], "group_by": "missing"}, "Unknown column missing"),
+    ({"aggregates": [{"op": "sum"}]}, "sum needs a column"),
+    ({"aggregates": [{"op": "avg", "column": "name"}]}, "avg needs a number column, name is text"),
+    ({"aggregates": [{"op": "count"}], "filter": {"age": {"$near": 1}}}, "Unsupported filter operator: $near"),
+])
+def test_bad_aggregates_are_rejected(client, template_id, body, detail):
+    response = aggregate(client, template_id, body, expected=400)
+
+    assert detail in str(response)
+
+
+def test_unknown_function_is_rejected(client, template_id):
+    aggregate(client, template_id, {"aggregates": [{"op": "median", "column": "age"}]}, expected=422)
+    aggregate(client, template_id, {"aggregates": []}, expected=422)
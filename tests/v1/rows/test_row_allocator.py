@@ -0,0 +1,76 @@
+import threading
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import create_engine, update
+from sqlalchemy.orm import Session
+
+from api.v1.models import Row, Sheet
+from api.v1.services.row_allocator import row_number_allocator
+
+from conftest import add_rows
+
+
+def test_reserves_consecutive_ranges(db, template_id):
+    assert row_number_allocator.reserve(db, template_id, 1, 3) == 1
+    assert row_number_allocator.reserve(db, template_id, 1) == 4
+    assert row_number_allocator.reserve(db, template_id, 2, 2) == 1
+
+
+def test_seeds_the_counter_from_existing_rows(client, db, template_id):
+    add_rows(client, template_id, [{"name": "a"}, {"name": "b"}])
+    # A sheet written before the counter existed
+    db.execute(update(Sheet).where(Sheet.template_id == template_id).values(last_row_number=None))
+    db.commit()
+
+    assert row_number_allocator.reserve(db, template_id, 1) == 3
+
+
+def test_concurrent_writers_get_disjoint_ranges(template_id):
+    from api.db.database import SessionLocal
+
+    starts = []
+
+    def reserve():
+        with SessionLocal() as session:
+            for _ in range(5):
+                starts.append(row_number_allocator.reserve(session, template_id, 1, 10))
+                session.commit()
+
+    threads = [threading.Thread(target=reserve) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(starts) == list(range(1, 200, 10))
+
+
+def test_needs_no_second_connection(db, template_id):
+    # A pool of one: a reservation on a connection of its own would time out
+    engine = create_engine(db.get_bind().url, pool_size=1, max_overflow=0, pool_timeout=0.5)
+    try:
+        with Session(engine) as session:
+            session.connection()
+            assert row_number_allocator.reserve(session, template_id, 1) == 1
+    finally:
+        engine.dispose()
+
+
+def test_runs_in_the_callers_transaction(db, template_id):
+    pending = Row(template_id=template_id, sheet_no=1, row_number=1, data={})
+    db.add(pending)
+
+    assert row_number_allocator.reserve(db, template_id, 1, 5) == 1
+    # Nothing was committed behind the caller's back
+    assert pending in db.new
+    db.rollback()
+
+    assert row_number_allocator.reserve(db, template_id, 1) == 1
+
+
+def test_missing_sheet_is_404(db, template_id):
+    with pytest.raises(HTTPException) as raised:
+        row_number_allocator.reserve(db, template_id, 9)
+
+    assert raised.value.status_code == 404
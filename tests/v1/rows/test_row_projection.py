@@ -0,0 +1,45 @@
+from conftest import add_rows
+
+
+def sheet(client, template_id, **params):
+    response = client.get(f"/api/v1/rows/sheet/{template_id}/1", params=params)
+    assert response.status_code == 200, response.text
+    return response
+
+
+def test_rows_keep_only_the_asked_columns(client, template_id):
+    add_rows(client, template_id, [{"name": "a", "age": 1}, {"name": "b"}])
+
+    full = sheet(client, template_id).json()["data"]
+    projected = sheet(client, template_id, columns="age, missing").json()["data"]
+
+    assert [row["data"] for row in projected] == [{"age": 1}, {}]
+    # Everything but data is unchanged, keys in the same order
+    for whole, part in zip(full, projected):
+        assert list(part) == list(whole)
+        assert {**whole, "data": part["data"]} == part
+
+
+def test_projection_with_paging(client, template_id):
+    add_rows(client, template_id, [{"name": str(number), "age": number} for number in range(3)])
+
+    first = sheet(client, template_id, columns="name", limit=2).json()["data"]
+    rest = sheet(client, template_id, columns="name", after=first["next_cursor"]).json()["data"]
+
+    assert [row["data"] for row in first["rows"] + rest["rows"]] == [{"name": "0"}, {"name": "1"}, {"name": "2"}]
+
+
+def test_projection_is_part_of_the_etag(client, template_id):
+    add_rows(client, template_id, [{"name": "a", "age": 1}])
+    etag = sheet(client, template_id).headers["ETag"]
+
+    projected = sheet(client, template_id, columns="name")
+
+    assert projected.headers["ETag"] != etag
+    assert projected.json()["data"][0]["data"] == {"name": "a"}
+
+
+def test_empty_projection_returns_whole_rows(client, template_id):
+    add_rows(client, template_id, [{"name": "a", "age": 1}])
+
+    assert sheet(client, template_id, columns=" , ").json()["data"][0]["data"] == {"name": "a", "age": 1}
@@ -0,0 +1,73 @@
+from conftest import add_rows
+
+
+def search(client, template_id, q, **params):
+    response = client.get(f"/api/v1/rows/search/{template_id}", params={"q": q, **params})
+    assert response.status_code == 200, response.text
+    return response.json()["data"]
+
+
+def names(result):
+    return [hit["row"]["data"]["name"] for hit in result["hits"]]
+
+
+def test_matches_are_ranked_and_highlighted(client, template_id):
+    add_rows(client, template_id, [
+        {"name": "apple pie", "age": 3},
+        {"name": "apple apple tart"},
+        {"name": "pear"},
+    ])
+
+    result = search(client, template_id, "apple")
+
+    assert sorted(names(result)) == ["apple apple tart", "apple pie"]
+    assert result["hits"][0]["rank"] >= result["hits"][1]["rank"]
+    assert result["hits"][0]["highlights"]["name"].count("<mark>apple</mark>") >= 1
+    assert "age" not in result["hits"][0]["highlights"]
+    assert result["next_cursor"] is None
+
+
+def test_numbers_and_sheets(client, template_id):
+    add_rows(client, template_id, [{"name": "n", "age": 4242}])
+    add_rows(client, template_id, [{"x": "shared word"}], sheet_no=2)
+    add_rows(client, template_id, [{"name": "shared word"}])
+
+    assert names(search(client, template_id, "4242")) == ["n"]
+    assert len(search(client, template_id, "shared")["hits"]) == 2
+    only_first = search(client, template_id, "shared", sheet_no=1)
+    assert [hit["row"]["sheet_no"] for hit in only_first["hits"]] == [1]
+
+
+def test_cursor_walks_every_hit_once(client, template_id):
+    add_rows(client, template_id, [{"name": f"common {number}"} for number in range(7)])
+
+    seen, cursor = [], None
+    while True:
+        page = search(client, template_id, "common", limit=3, **({"after": cursor} if cursor else {}))
+        seen.extend(names(page))
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+
+    assert sorted(seen) == sorted(f"common {number}" for number in range(7))
+
+
+def test_index_follows_updates_and_deletes(client, template_id):
+    add_rows(client, template_id, [{"name": "before"}, {"name": "doomed"}])
+    rows = client.get(f"/api/v1/rows/sheet/{template_id}/1").json()["data"]
+
+    client.put(f"/api/v1/rows/{rows[0]['row_id']}", json={"data": {"name": "after"}})
+    client.delete(f"/api/v1/rows/{rows[1]['row_id']}")
+
+    assert search(client, template_id, "before")["hits"] == []
+    assert names(search(client, template_id, "after")) == ["after"]
+    assert search(client, template_id, "doomed")["hits"] == []
+
+
+def test_bad_requests(client, template_id):
+    url = f"/api/v1/rows/search/{template_id}"
+
+    assert client.get(url, params={"q": "  "}).status_code == 400
+    assert client.get(url, params={"q": "a", "after": "not-a-cursor"}).status_code == 400
+    assert client.get(url, params={"q": "a", "sheet_no": 9}).status_code == 404
+    assert client.get("/api/v1/rows/search/missing", params={"q": "a"}).status_code == 404
@@ -0,0 +1,67 @@
+import datetime as dt
+
+from api.utils.row_validator import RowError, RowValidator
+
+
+def test_clean_columns_are_coerced_whole():
+    validator = RowValidator([("n", "number", False), ("d", "date", False), ("b", "boolean", False)])
+    rows = [
+        {"n": "1", "d": " 2020-01-02 ", "b": "Yes"},
+        {"n": "2", "d": "2020-12-31", "b": "no"},
+    ]
+
+    assert validator.validate(rows) == []
+    assert rows == [
+        {"n": 1, "d": "2020-01-02", "b": True},
+        {"n": 2, "d": "2020-12-31", "b": False},
+    ]
+
+
+def test_mixed_columns_fall_back_to_cells():
+    validator = RowValidator([("n", "number", False), ("d", "datetime", False)])
+    rows = [
+        {"n": "1", "d": "2020-01-02"},
+        {"n": "1.5", "d": "2020-01-02T03:04:05"},
+        {"n": 3, "d": dt.date(2021, 1, 1)},
+    ]
+
+    assert validator.validate(rows) == []
+    assert [row["n"] for row in rows] == [1, 1.5, 3]
+    assert [row["d"] for row in rows] == ["2020-01-02", "2020-01-02T03:04:05", "2021-01-01"]
+
+
+def test_only_bad_cells_fail():
+    validator = RowValidator([("n", "number", False)])
+    rows = [{"n": "1"}, {"n": "one"}, {"n": "inf"}, {"n": "4"}]
+
+    errors = validator.validate(rows)
+
+    assert [(error.index, error.column) for error in errors] == [(1, "n"), (2, "n")]
+    assert [row["n"] for row in rows] == [1, "one", "inf", 4]
+
+
+def test_required_columns_and_error_order():
+    validator = RowValidator([("name", "text", True), ("age", "number", False)])
+    rows = [{"name": "a", "age": "x"}, {"name": ""}, {"age": 3}]
+
+    assert validator.validate(rows) == [
+        RowError(0, "age", "age: invalid value 'x'"),
+        RowError(1, "name", "name is required"),
+        RowError(2, "name", "name is required"),
+    ]
+
+
+def test_unknown_types_and_keys_are_left_alone():
+    validator = RowValidator([("shape", "polygon", False), ("name", "text", False)])
+    rows = [{"shape": [1, 2], "name": "a", "extra": {"x": 1}}]
+
+    assert validator.validate(rows) == []
+    assert rows == [{"shape": [1, 2], "name": "a", "extra": {"x": 1}}]
+
+
+def test_text_rejects_nested_values():
+    validator = RowValidator([("name", "text", False)])
+    rows = [{"name": 5}, {"name": {"first": "a"}}]
+
+    assert [error.index for error in validator.validate(rows)] == [1]
+    assert rows[0]["name"] == "5"
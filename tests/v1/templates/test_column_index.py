@@ -0,0 +1,135 @@
+from sqlalchemy import select, text
+
+from api.db.indexes import column_index_name
+from api.utils.json_paths import cell
+from api.v1.models import Column, Job, Row
+from conftest import engine, wait_for_job
+
+
+def index_names():
+    with engine.connect() as connection:
+        return {
+            name for (name,) in connection.execute(
+                text("SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = 'rows'")
+            )
+        }
+
+
+def is_indexed(db, template_id, name):
+    db.expire_all()
+    return db.query(Column.indexed).filter(Column.template_id == template_id, Column.name == name).scalar()
+
+
+def index_url(template_id, column, sheet_no=1):
+    return f"/api/v1/templates/{template_id}/sheets/{sheet_no}/columns/{column}/index"
+
+
+def test_index_is_built_then_dropped(client, db, template_id):
+    name = column_index_name(template_id, 1, "age")
+
+    queued = client.put(index_url(template_id, "age"))
+    assert queued.status_code == 202
+    assert wait_for_job(client, queued.json()["data"]["id"])["status"] == "succeeded"
+    assert name in index_names()
+    assert is_indexed(db, template_id, "age") is True
+
+    dropped = client.delete(index_url(template_id, "age"))
+    assert wait_for_job(client, dropped.json()["data"]["id"])["status"] == "succeeded"
+    assert name not in index_names()
+    assert is_indexed(db, template_id, "age") is False
+
+
+def test_filters_on_the_column_use_its_index(client, template_id):
+    job_id = client.put(index_url(template_id, "age")).json()["data"]["id"]
+    wait_for_job(client, job_id)
+
+    query = select(Row.row_id).where(
+        Row.template_id == template_id, Row.sheet_no == 1, cell("age", "number") >= 18
+    )
+    compiled = query.compile(engine, compile_kwargs={"literal_binds": True})
+    with engine.connect() as connection:
+        plan = " ".join(str(step[-1]) for step in connection.execute(text(f"EXPLAIN QUERY PLAN {compiled}")))
+
+    assert column_index_name(template_id, 1, "age") in plan
+
+
+def test_columns_created_indexed_get_their_index(client, db):
+    response = client.post("/api/v1/templates/create", json={"sheets": [
+        {"sheet_no": 1, "sheet_name": "Indexed", "columns": [
+            {"name": "code", "type": "text", "required": False, "sheet_no": 1, "indexed": True},
+        ]},
+    ]})
+    template_id = response.json()["data"]
+    name = column_index_name(template_id, 1, "code")
+
+    queued = [
+        found.id for found in db.query(Job).filter(Job.kind == "column_index")
+        if found.params["template_id"] == template_id
+    ]
+    assert len(queued) == 1
+    assert wait_for_job(client, queued[0])["status"] == "succeeded"
+
+    assert name in index_names()
+    assert is_indexed(db, template_id, "code") is True
+
+
+def test_unknown_column_is_404(client, template_id):
+    assert client.put(index_url(template_id, "missing")).status_code == 404
+    assert client.put(index_url(template_id, "age", sheet_no=9)).status_code == 404
+
+
+def index_sql(name):
+    with engine.connect() as connection:
+        return connection.execute(
+            text("SELECT sql FROM sqlite_master WHERE type = 'index' AND name = :name"), {"name": name}
+        ).scalar()
+
+
+def column_index_jobs(db, template_id):
+    db.expire_all()
+    return [
+        found for found in db.query(Job).filter(Job.kind == "column_index").order_by(Job.created_at, Job.id)
+        if found.params["template_id"] == template_id
+    ]
+
+
+def update_age(db, template_id, column_type, indexed):
+    from api.v1.schemas.template import TemplateUpdate
+    from api.v1.services.template import template_service
+
+    template_service.update(db, template_id, TemplateUpdate(sheets=[
+        {"sheet_no": 1, "sheet_name": "People", "columns": [
+            {"name": "name", "type": "text", "required": True, "sheet_no": 1},
+            {"name": "age", "type": column_type, "required": False, "sheet_no": 1, "indexed": indexed},
+        ]},
+    ]))
+    return column_index_jobs(db, template_id)[-1]
+
+
+def test_type_change_rebuilds_the_index_in_one_job(client, db, template_id):
+    name = column_index_name(template_id, 1, "age")
+    wait_for_job(client, client.put(index_url(template_id, "age")).json()["data"]["id"])
+    before = index_sql(name)
+
+    rebuild = update_age(db, template_id, "text", True)
+
+    assert rebuild.params == {
+        "template_id": template_id, "sheet_no": 1, "column": "age", "indexed": True, "rebuild": True,
+    }
+    assert len(column_index_jobs(db, template_id)) == 2
+    assert wait_for_job(client, rebuild.id)["status"] == "succeeded"
+    assert index_sql(name) not in (None, before)
+    assert is_indexed(db, template_id, "age") is True
+
+
+def test_type_change_of_a_column_no_longer_indexed_only_drops(client, db, template_id):
+    name = column_index_name(template_id, 1, "age")
+    wait_for_job(client, client.put(index_url(template_id, "age")).json()["data"]["id"])
+
+    dropped = update_age(db, template_id, "text", False)
+
+    assert dropped.params["indexed"] is False and "rebuild" not in dropped.params
+    assert len(column_index_jobs(db, template_id)) == 2
+    assert wait_for_job(client, dropped.id)["status"] == "succeeded"
+    assert name not in index_names()
+    assert is_indexed(db, template_id, "age") is False
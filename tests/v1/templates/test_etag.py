@@ -0,0 +1,58 @@
+from conftest import add_rows
+
+
+def test_unchanged_template_is_not_modified(client, template_id):
+    first = client.get(f"/api/v1/templates/{template_id}")
+    etag = first.headers["ETag"]
+
+    again = client.get(f"/api/v1/templates/{template_id}", headers={"If-None-Match": etag})
+
+    assert again.status_code == 304
+    assert again.headers["ETag"] == etag
+    assert again.content == b""
+
+
+def test_row_write_changes_the_template_etag(client, template_id):
+    etag = client.get(f"/api/v1/templates/{template_id}").headers["ETag"]
+
+    add_rows(client, template_id, [{"name": "new"}])
+    response = client.get(f"/api/v1/templates/{template_id}", headers={"If-None-Match": etag})
+
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+
+
+def test_sheet_etag_follows_its_own_sheet(client, template_id):
+    url = f"/api/v1/rows/sheet/{template_id}/1"
+    etag = client.get(url).headers["ETag"]
+
+    assert client.get(url, headers={"If-None-Match": etag}).status_code == 304
+    add_rows(client, template_id, [{"x": "other sheet"}], sheet_no=2)
+    assert client.get(url, headers={"If-None-Match": etag}).status_code == 304
+    add_rows(client, template_id, [{"name": "this sheet"}])
+    assert client.get(url, headers={"If-None-Match": etag}).status_code == 200
+
+
+def test_paging_arguments_are_part_of_the_etag(client, template_id):
+    url = f"/api/v1/rows/sheet/{template_id}/1"
+    etag = client.get(url).headers["ETag"]
+
+    assert client.get(url, params={"limit": 1}, headers={"If-None-Match": etag}).status_code == 200
+
+
+def test_template_update_changes_the_template_etag(client, db, template_id):
+    from api.v1.schemas.template import TemplateUpdate
+    from api.v1.services.template import template_service
+
+    etag = client.get(f"/api/v1/templates/{template_id}").headers["ETag"]
+
+    template_service.update(db, template_id, TemplateUpdate(sheets=[
+        {"sheet_no": 1, "sheet_name": "Renamed", "columns": [
+            {"name": "name", "type": "text", "required": True, "sheet_no": 1},
+        ]},
+    ]))
+    response = client.get(f"/api/v1/templates/{template_id}", headers={"If-None-Match": etag})
+
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+    assert response.json()["data"]["sheets"][0]["name"] == "Renamed"
@@ -0,0 +1,96 @@
+from sqlalchemy import delete, update
+
+from api.v1.models import Column, Template
+from api.v1.services.metadata import TemplateMetadataService
+from api.v1.services.version import version_service
+
+
+def rename_column(db, template_id, old, new):
+    db.execute(update(Column).where(Column.template_id == template_id, Column.name == old).values(name=new))
+
+
+def column_names(metadata, sheet_no=1):
+    return [column.name for column in metadata.sheets[sheet_no].columns]
+
+
+def test_cached_entry_is_served_while_the_version_holds(db, template_id):
+    cache = TemplateMetadataService(maxsize=10, ttl=60)
+    first = cache.template(db, template_id)
+
+    # Changed without a version bump: the entry is still current as far as the cache knows
+    rename_column(db, template_id, "age", "years")
+    db.commit()
+
+    assert cache.template(db, template_id) is first
+    assert cache.stats()["hits"] == 1
+
+
+def test_version_bump_made_elsewhere_reloads_the_entry(db, template_id):
+    cache = TemplateMetadataService(maxsize=10, ttl=60)
+    assert column_names(cache.template(db, template_id)) == ["name", "age"]
+
+    # Another process: no invalidate reaches this cache, only the version changes
+    rename_column(db, template_id, "age", "years")
+    version_service.bump_template(db, template_id)
+    db.commit()
+
+    reloaded = cache.template(db, template_id)
+    assert column_names(reloaded) == ["name", "years"]
+    assert reloaded.version == db.query(Template.version).filter(Template.template_id == template_id).scalar()
+    assert cache.template(db, template_id) is reloaded
+
+
+def test_deleted_template_is_not_served(db, template_id):
+    cache = TemplateMetadataService(maxsize=10, ttl=60)
+    cache.template(db, template_id)
+
+    # Another process deletes it
+    db.execute(delete(Template).where(Template.template_id == template_id))
+    db.commit()
+
+    assert cache.get(db, template_id) is None
+    assert cache.stats()["size"] == 0
+
+
+def test_load_racing_an_invalidation_is_not_cached(db, template_id, monkeypatch):
+    cache = TemplateMetadataService(maxsize=10, ttl=60)
+    load = cache._load
+
+    def racing_load(db, template_id):
+        metadata = load(db, template_id)
+        cache.invalidate(template_id)
+        return metadata
+
+    monkeypatch.setattr(cache, "_load", racing_load)
+    cache.template(db, template_id)
+    monkeypatch.undo()
+
+    assert cache.stats()["size"] == 0
+    cache.template(db, template_id)
+    assert cache.stats()["size"] == 1
+
+
+def test_rows_are_validated_against_the_updated_template(client, db, template_id):
+    from api.v1.schemas.template import TemplateUpdate
+    from api.v1.services.template import template_service
+
+    # Warm the process-wide entry with the old definition
+    assert client.post("/api/v1/rows/create", json={
+        "template_id": template_id, "sheet_no": 1, "row_number": 0, "data": {"name": "before"},
+    }).status_code == 201
+
+    template_service.update(db, template_id, TemplateUpdate(sheets=[
+        {"sheet_no": 1, "sheet_name": "People", "columns": [
+            {"name": "name", "type": "text", "required": True, "sheet_no": 1},
+            {"name": "email", "type": "text", "required": True, "sheet_no": 1},
+        ]},
+    ]))
+
+    missing = client.post("/api/v1/rows/create", json={
+        "template_id": template_id, "sheet_no": 1, "row_number": 0, "data": {"name": "after"},
+    })
+    assert missing.status_code == 422
+    created = client.post("/api/v1/rows/create", json={
+        "template_id": template_id, "sheet_no": 1, "row_number": 0, "data": {"name": "after", "email": "a@b.c"},
+    })
+    assert created.status_code == 201, created.text
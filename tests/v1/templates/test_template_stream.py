@@ -0,0 +1,59 @@
+import json
+
+from api.v1.services import template as template_module
+from api.v1.services.metadata import template_metadata
+from conftest import add_rows
+
+
+def test_streamed_document_matches_the_buffered_one(client, template_id):
+    add_rows(client, template_id, [{"name": "a", "age": 1}, {"name": "b", "age": 2}])
+    add_rows(client, template_id, [{"x": "other"}], sheet_no=2)
+
+    buffered = client.get(f"/api/v1/templates/{template_id}")
+    streamed = client.get(f"/api/v1/templates/{template_id}", params={"stream": "true"})
+
+    assert streamed.status_code == 200
+    assert streamed.headers["content-type"] == "application/json"
+    assert streamed.headers["ETag"] == buffered.headers["ETag"]
+    assert json.loads(streamed.content) == buffered.json()
+
+
+def test_rows_are_streamed_in_batches(client, template_id, monkeypatch):
+    monkeypatch.setattr(template_module, "STREAM_BATCH_SIZE", 2)
+    add_rows(client, template_id, [{"name": str(number)} for number in range(5)])
+
+    response = client.get(f"/api/v1/templates/{template_id}", params={"stream": "true"})
+
+    sheets = json.loads(response.content)["data"]["sheets"]
+    assert [row["name"] for row in sheets[0]["rows"]] == ["0", "1", "2", "3", "4"]
+    assert sheets[1]["rows"] == []
+
+
+def test_stream_yields_chunks_before_the_end(db, client, template_id, monkeypatch):
+    monkeypatch.setattr(template_module, "STREAM_BATCH_SIZE", 2)
+    add_rows(client, template_id, [{"name": str(number)} for number in range(5)])
+
+    metadata = template_metadata.template(db, template_id)
+    chunks = list(template_module.template_service.stream(metadata, "ok"))
+
+    # Header, sheet 1 opening, three row chunks and close, empty sheet 2 (two), trailer
+    assert len(chunks) == 9
+    assert json.loads(b"".join(chunks))["data"]["id"] == template_id
+
+
+def test_streamed_projection(client, template_id):
+    add_rows(client, template_id, [{"name": "a", "age": 1}])
+
+    response = client.get(
+        f"/api/v1/templates/{template_id}", params={"stream": "true", "columns": "age"}
+    )
+
+    sheet = json.loads(response.content)["data"]["sheets"][0]
+    assert [column["name"] for column in sheet["columns"]] == ["age"]
+    assert sheet["rows"] == [{"age": 1}]
+
+
+def test_missing_template_is_404_when_streamed(client):
+    response = client.get("/api/v1/templates/missing", params={"stream": "true"})
+
+    assert response.status_code == 404